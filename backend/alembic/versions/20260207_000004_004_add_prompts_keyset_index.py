@@ -0,0 +1,36 @@
+"""Add composite index for keyset pagination of prompts
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-02-07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches the default listing order (updated_at DESC, id DESC) per user,
+    # so both the first page and keyset continuations stop after LIMIT rows
+    op.create_index(
+        "ix_prompts_user_id_updated_at_id",
+        "prompts",
+        ["user_id", sa.text("updated_at DESC"), sa.text("id DESC")],
+    )
+
+    # The composite index covers every lookup the single-column one served
+    op.drop_index("ix_prompts_user_id", table_name="prompts")
+
+
+def downgrade() -> None:
+    op.create_index("ix_prompts_user_id", "prompts", ["user_id"])
+    op.drop_index("ix_prompts_user_id_updated_at_id", table_name="prompts")
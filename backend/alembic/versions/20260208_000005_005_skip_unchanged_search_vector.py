@@ -0,0 +1,53 @@
+"""Only rebuild search_vector when indexed columns change
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-02-08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_search_vector_trigger ON prompts;")
+
+    # Always build the vector for new rows
+    op.execute("""
+        CREATE TRIGGER prompts_search_vector_insert_trigger
+        BEFORE INSERT ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_search_vector_update();
+    """)
+
+    # Re-run to_tsvector on update only if title, tags or content changed
+    op.execute("""
+        CREATE TRIGGER prompts_search_vector_update_trigger
+        BEFORE UPDATE OF title, tags, content ON prompts
+        FOR EACH ROW
+        WHEN (
+            OLD.title IS DISTINCT FROM NEW.title
+            OR OLD.tags IS DISTINCT FROM NEW.tags
+            OR OLD.content IS DISTINCT FROM NEW.content
+        )
+        EXECUTE FUNCTION prompts_search_vector_update();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_search_vector_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_search_vector_insert_trigger ON prompts;")
+
+    op.execute("""
+        CREATE TRIGGER prompts_search_vector_trigger
+        BEFORE INSERT OR UPDATE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_search_vector_update();
+    """)
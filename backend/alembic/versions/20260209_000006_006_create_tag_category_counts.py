@@ -0,0 +1,169 @@
+"""Create per-user tag and category counters maintained by triggers
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-02-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_tag_counts",
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tag", sa.Text, primary_key=True),
+        sa.Column("count", sa.Integer, nullable=False),
+    )
+    op.create_table(
+        "user_category_counts",
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("category", sa.String(100), primary_key=True),
+        sa.Column("count", sa.Integer, nullable=False),
+    )
+
+    # Case-insensitive prefix lookups (autocomplete) and most-used listings
+    op.execute(
+        "CREATE INDEX ix_user_tag_counts_prefix "
+        "ON user_tag_counts (user_id, lower(tag) text_pattern_ops);"
+    )
+    op.execute(
+        "CREATE INDEX ix_user_tag_counts_count "
+        "ON user_tag_counts (user_id, count DESC);"
+    )
+    op.execute(
+        "CREATE INDEX ix_user_category_counts_prefix "
+        "ON user_category_counts (user_id, lower(category) text_pattern_ops);"
+    )
+    op.execute(
+        "CREATE INDEX ix_user_category_counts_count "
+        "ON user_category_counts (user_id, count DESC);"
+    )
+
+    # Same isolation as prompts
+    for table in ("user_tag_counts", "user_category_counts"):
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY;")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY;")
+        op.execute(f"""
+            CREATE POLICY {table}_user_isolation ON {table}
+            FOR ALL
+            USING (user_id = current_setting('app.current_user_id', true)::uuid)
+            WITH CHECK (user_id = current_setting('app.current_user_id', true)::uuid);
+        """)
+
+    # Apply the tag delta of one prompt row: remove OLD.tags, add NEW.tags
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_tag_counts_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.tags IS NOT NULL THEN
+                UPDATE user_tag_counts c
+                SET count = c.count - d.n
+                FROM (SELECT t, count(*) AS n FROM unnest(OLD.tags) AS t GROUP BY t) d
+                WHERE c.user_id = OLD.user_id AND c.tag = d.t;
+
+                DELETE FROM user_tag_counts
+                WHERE user_id = OLD.user_id AND tag = ANY(OLD.tags) AND count <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.tags IS NOT NULL THEN
+                INSERT INTO user_tag_counts (user_id, tag, count)
+                SELECT NEW.user_id, t, count(*) FROM unnest(NEW.tags) AS t GROUP BY t
+                ON CONFLICT (user_id, tag)
+                DO UPDATE SET count = user_tag_counts.count + EXCLUDED.count;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Apply the category delta of one prompt row
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_category_counts_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.category IS NOT NULL THEN
+                UPDATE user_category_counts
+                SET count = count - 1
+                WHERE user_id = OLD.user_id AND category = OLD.category;
+
+                DELETE FROM user_category_counts
+                WHERE user_id = OLD.user_id AND category = OLD.category AND count <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.category IS NOT NULL THEN
+                INSERT INTO user_category_counts (user_id, category, count)
+                VALUES (NEW.user_id, NEW.category, 1)
+                ON CONFLICT (user_id, category)
+                DO UPDATE SET count = user_category_counts.count + 1;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("""
+        CREATE TRIGGER prompts_tag_counts_insert_delete_trigger
+        AFTER INSERT OR DELETE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_tag_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_tag_counts_update_trigger
+        AFTER UPDATE OF tags, user_id ON prompts
+        FOR EACH ROW
+        WHEN (OLD.tags IS DISTINCT FROM NEW.tags OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION prompts_tag_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_category_counts_insert_delete_trigger
+        AFTER INSERT OR DELETE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_category_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_category_counts_update_trigger
+        AFTER UPDATE OF category, user_id ON prompts
+        FOR EACH ROW
+        WHEN (OLD.category IS DISTINCT FROM NEW.category OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION prompts_category_counts_update();
+    """)
+
+    # Backfill from existing prompts. Lift FORCE so the table owner can see
+    # every tenant's rows, then restore it.
+    for table in ("prompts", "user_tag_counts", "user_category_counts"):
+        op.execute(f"ALTER TABLE {table} NO FORCE ROW LEVEL SECURITY;")
+    op.execute("""
+        INSERT INTO user_tag_counts (user_id, tag, count)
+        SELECT user_id, t, count(*) FROM prompts, unnest(tags) AS t GROUP BY user_id, t;
+    """)
+    op.execute("""
+        INSERT INTO user_category_counts (user_id, category, count)
+        SELECT user_id, category, count(*) FROM prompts
+        WHERE category IS NOT NULL
+        GROUP BY user_id, category;
+    """)
+    for table in ("prompts", "user_tag_counts", "user_category_counts"):
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY;")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_category_counts_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_category_counts_insert_delete_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_tag_counts_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_tag_counts_insert_delete_trigger ON prompts;")
+    op.execute("DROP FUNCTION IF EXISTS prompts_category_counts_update();")
+    op.execute("DROP FUNCTION IF EXISTS prompts_tag_counts_update();")
+
+    # Dropping the tables also drops their policies and indexes
+    op.drop_table("user_category_counts")
+    op.drop_table("user_tag_counts")
@@ -0,0 +1,68 @@
+"""Add per-user library version bumped on every prompt write
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-02-10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("library_version", sa.BigInteger, nullable=False, server_default="0"),
+    )
+
+    # Statement-level, so a multi-row write bumps each affected user once.
+    # Transition tables are only allowed on single-event triggers, hence
+    # one function per event.
+    for event, table in (("insert", "new_rows"), ("update", "new_rows"), ("delete", "old_rows")):
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION prompts_bump_library_version_{event}() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users SET library_version = library_version + 1
+                WHERE id IN (SELECT DISTINCT user_id FROM {table});
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+
+    op.execute("""
+        CREATE TRIGGER prompts_library_version_insert_trigger
+        AFTER INSERT ON prompts
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION prompts_bump_library_version_insert();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_library_version_update_trigger
+        AFTER UPDATE ON prompts
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION prompts_bump_library_version_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_library_version_delete_trigger
+        AFTER DELETE ON prompts
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION prompts_bump_library_version_delete();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_delete_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_insert_trigger ON prompts;")
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP FUNCTION IF EXISTS prompts_bump_library_version_{event}();")
+
+    op.drop_column("users", "library_version")
@@ -0,0 +1,88 @@
+"""Create prompt change log with tombstones for delta sync
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-02-11
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE prompt_changes_seq;")
+
+    # One row per prompt (deleted prompts stay as tombstones). xid is the
+    # id of the writing transaction, so readers can tell which changes are
+    # guaranteed committed; seq orders changes within a transaction.
+    op.create_table(
+        "prompt_changes",
+        sa.Column("prompt_id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("deleted", sa.Boolean, nullable=False),
+        sa.Column("xid", sa.BigInteger, nullable=False, server_default=sa.text("pg_current_xact_id()::text::bigint")),
+        sa.Column("seq", sa.BigInteger, nullable=False, server_default=sa.text("nextval('prompt_changes_seq')")),
+    )
+    op.create_index("ix_prompt_changes_user_id_xid_seq", "prompt_changes", ["user_id", "xid", "seq"])
+
+    # Same isolation as prompts
+    op.execute("ALTER TABLE prompt_changes ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE prompt_changes FORCE ROW LEVEL SECURITY;")
+    op.execute("""
+        CREATE POLICY prompt_changes_user_isolation ON prompt_changes
+        FOR ALL
+        USING (user_id = current_setting('app.current_user_id', true)::uuid)
+        WITH CHECK (user_id = current_setting('app.current_user_id', true)::uuid);
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_record_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (OLD.id, OLD.user_id, true)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET deleted = true, xid = EXCLUDED.xid, seq = EXCLUDED.seq;
+            ELSE
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (NEW.id, NEW.user_id, false)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET user_id = EXCLUDED.user_id, deleted = false, xid = EXCLUDED.xid, seq = EXCLUDED.seq;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_record_change_trigger
+        AFTER INSERT OR UPDATE OR DELETE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_record_change();
+    """)
+
+    # Backfill existing prompts. Lift FORCE so the table owner can see
+    # every tenant's rows, then restore it.
+    for table in ("prompts", "prompt_changes"):
+        op.execute(f"ALTER TABLE {table} NO FORCE ROW LEVEL SECURITY;")
+    op.execute("""
+        INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+        SELECT id, user_id, false FROM prompts;
+    """)
+    for table in ("prompts", "prompt_changes"):
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY;")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_record_change_trigger ON prompts;")
+    op.execute("DROP FUNCTION IF EXISTS prompts_record_change();")
+    op.drop_table("prompt_changes")
+    op.execute("DROP SEQUENCE IF EXISTS prompt_changes_seq;")
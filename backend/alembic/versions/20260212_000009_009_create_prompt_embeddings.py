@@ -0,0 +1,46 @@
+"""Create prompt embeddings for similarity search
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-02-12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Embeddings are computed by the application; prompts without a row here
+    # (existing or bulk-imported ones) are filled in when their owner's
+    # similarity index is first loaded
+    op.create_table(
+        "prompt_embeddings",
+        sa.Column("prompt_id", UUID(as_uuid=True), sa.ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("embedding", sa.LargeBinary, nullable=False),
+    )
+    op.create_index("ix_prompt_embeddings_user_id", "prompt_embeddings", ["user_id"])
+
+    # Same isolation as prompts
+    op.execute("ALTER TABLE prompt_embeddings ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE prompt_embeddings FORCE ROW LEVEL SECURITY;")
+    op.execute("""
+        CREATE POLICY prompt_embeddings_user_isolation ON prompt_embeddings
+        FOR ALL
+        USING (user_id = current_setting('app.current_user_id', true)::uuid)
+        WITH CHECK (user_id = current_setting('app.current_user_id', true)::uuid);
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("prompt_embeddings")
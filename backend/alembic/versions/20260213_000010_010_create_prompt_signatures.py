@@ -0,0 +1,46 @@
+"""Create prompt MinHash signatures for duplicate detection
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-02-13
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Signatures are computed by the application; prompts without a row here
+    # (those created before this migration) are filled in when their owner's
+    # duplicate index is first loaded
+    op.create_table(
+        "prompt_signatures",
+        sa.Column("prompt_id", UUID(as_uuid=True), sa.ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("signature", sa.LargeBinary, nullable=False),
+    )
+    op.create_index("ix_prompt_signatures_user_id", "prompt_signatures", ["user_id"])
+
+    # Same isolation as prompts
+    op.execute("ALTER TABLE prompt_signatures ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE prompt_signatures FORCE ROW LEVEL SECURITY;")
+    op.execute("""
+        CREATE POLICY prompt_signatures_user_isolation ON prompt_signatures
+        FOR ALL
+        USING (user_id = current_setting('app.current_user_id', true)::uuid)
+        WITH CHECK (user_id = current_setting('app.current_user_id', true)::uuid);
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("prompt_signatures")
@@ -0,0 +1,174 @@
+"""Keep user deletes working with the change log and prune old tombstones
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-02-14
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# How long tombstones of deleted prompts are kept. Sync tokens older than
+# the newest pruned tombstone are rejected, so clients that have not synced
+# for this long reload their list.
+TOMBSTONE_RETENTION = "30 days"
+
+# Tables isolated per user by a <table>_user_isolation policy
+ISOLATED_TABLES = (
+    "prompts",
+    "user_tag_counts",
+    "user_category_counts",
+    "prompt_changes",
+    "prompt_embeddings",
+    "prompt_signatures",
+)
+
+# Once a pooled connection has run set_config, the setting reads as ''
+# rather than NULL outside a user's transaction, and ''::uuid raises. A
+# user delete runs there, and its cascade fires the counter triggers.
+CURRENT_USER = "NULLIF(current_setting('app.current_user_id', true), '')::uuid"
+OLD_CURRENT_USER = "current_setting('app.current_user_id', true)::uuid"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "prompt_changes",
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    op.execute(
+        "CREATE INDEX ix_prompt_changes_tombstones "
+        "ON prompt_changes (user_id, changed_at) WHERE deleted;"
+    )
+
+    # Newest change position whose tombstone was pruned, per user
+    op.create_table(
+        "prompt_change_horizons",
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("xid", sa.BigInteger, nullable=False),
+        sa.Column("seq", sa.BigInteger, nullable=False),
+    )
+
+    for table in ISOLATED_TABLES:
+        op.execute(f"""
+            ALTER POLICY {table}_user_isolation ON {table}
+            USING (user_id = {CURRENT_USER})
+            WITH CHECK (user_id = {CURRENT_USER});
+        """)
+
+    # Same isolation as prompts
+    op.execute("ALTER TABLE prompt_change_horizons ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE prompt_change_horizons FORCE ROW LEVEL SECURITY;")
+    op.execute(f"""
+        CREATE POLICY prompt_change_horizons_user_isolation ON prompt_change_horizons
+        FOR ALL
+        USING (user_id = {CURRENT_USER})
+        WITH CHECK (user_id = {CURRENT_USER});
+    """)
+
+    # Deleting a user cascades to its prompts, and the user row is already
+    # gone when their triggers run. The change log is cascaded away with the
+    # user, so there is nothing to record (and the FK would reject it).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_record_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF NOT EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+                    RETURN NULL;
+                END IF;
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (OLD.id, OLD.user_id, true)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET deleted = true, xid = EXCLUDED.xid, seq = EXCLUDED.seq,
+                    changed_at = EXCLUDED.changed_at;
+            ELSE
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (NEW.id, NEW.user_id, false)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET user_id = EXCLUDED.user_id, deleted = false, xid = EXCLUDED.xid, seq = EXCLUDED.seq,
+                    changed_at = EXCLUDED.changed_at;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Every delete statement prunes its users' expired tombstones, so they
+    # only accumulate for as long as the retention period, and moves each
+    # user's horizon past what it pruned
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION prompts_prune_tombstones() RETURNS trigger AS $$
+        BEGIN
+            WITH pruned AS (
+                DELETE FROM prompt_changes c
+                USING (
+                    SELECT DISTINCT user_id FROM old_rows
+                    WHERE user_id IN (SELECT id FROM users)
+                ) o
+                WHERE c.user_id = o.user_id
+                  AND c.deleted
+                  AND c.changed_at < now() - interval '{TOMBSTONE_RETENTION}'
+                RETURNING c.user_id, c.xid, c.seq
+            )
+            INSERT INTO prompt_change_horizons (user_id, xid, seq)
+            SELECT DISTINCT ON (user_id) user_id, xid, seq
+            FROM pruned
+            ORDER BY user_id, xid DESC, seq DESC
+            ON CONFLICT (user_id) DO UPDATE
+            SET xid = EXCLUDED.xid, seq = EXCLUDED.seq
+            WHERE (prompt_change_horizons.xid, prompt_change_horizons.seq)
+                < (EXCLUDED.xid, EXCLUDED.seq);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_prune_tombstones_trigger
+        AFTER DELETE ON prompts
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION prompts_prune_tombstones();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_prune_tombstones_trigger ON prompts;")
+    op.execute("DROP FUNCTION IF EXISTS prompts_prune_tombstones();")
+
+    # Restore the function from 008
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_record_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (OLD.id, OLD.user_id, true)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET deleted = true, xid = EXCLUDED.xid, seq = EXCLUDED.seq;
+            ELSE
+                INSERT INTO prompt_changes (prompt_id, user_id, deleted)
+                VALUES (NEW.id, NEW.user_id, false)
+                ON CONFLICT (prompt_id) DO UPDATE
+                SET user_id = EXCLUDED.user_id, deleted = false, xid = EXCLUDED.xid, seq = EXCLUDED.seq;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.drop_table("prompt_change_horizons")
+    for table in ISOLATED_TABLES:
+        op.execute(f"""
+            ALTER POLICY {table}_user_isolation ON {table}
+            USING (user_id = {OLD_CURRENT_USER})
+            WITH CHECK (user_id = {OLD_CURRENT_USER});
+        """)
+    op.execute("DROP INDEX IF EXISTS ix_prompt_changes_tombstones;")
+    op.drop_column("prompt_changes", "changed_at")
@@ -0,0 +1,112 @@
+"""Keep library versions in their own table, bumped once per transaction at commit
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-02-15
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bumping users.library_version from a statement trigger row-locked the
+    # user for the rest of every writing transaction, so all of a user's
+    # writes (bulk imports included) ran one after another. The counter now
+    # has its own row, and a deferred trigger bumps it when the transaction
+    # commits: concurrent writers only wait for each other's COMMIT.
+    op.create_table(
+        "library_versions",
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("version", sa.BigInteger, nullable=False),
+        # Transaction that last bumped it, so each transaction bumps it once
+        sa.Column("xid", sa.BigInteger, nullable=False),
+    )
+    op.create_index("ix_library_versions_version", "library_versions", ["version"])
+    op.execute("""
+        INSERT INTO library_versions (user_id, version, xid)
+        SELECT id, library_version, 0 FROM users WHERE library_version > 0;
+    """)
+
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_delete_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_insert_trigger ON prompts;")
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP FUNCTION IF EXISTS prompts_bump_library_version_{event}();")
+    op.drop_column("users", "library_version")
+
+    # Owners that no longer exist (a user delete cascading to its prompts)
+    # select nothing, so no counter is created for them
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_bump_library_version() RETURNS trigger AS $$
+        DECLARE
+            owners uuid[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                owners := ARRAY[NEW.user_id];
+            ELSIF TG_OP = 'DELETE' THEN
+                owners := ARRAY[OLD.user_id];
+            ELSE
+                owners := ARRAY[OLD.user_id, NEW.user_id];
+            END IF;
+
+            INSERT INTO library_versions (user_id, version, xid)
+            SELECT id, 1, pg_current_xact_id()::text::bigint FROM users WHERE id = ANY(owners)
+            ON CONFLICT (user_id) DO UPDATE
+            SET version = library_versions.version + 1, xid = EXCLUDED.xid
+            WHERE library_versions.xid <> EXCLUDED.xid;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    # Constraint triggers are row-level only; rows after the first of a
+    # transaction find the counter already bumped and change nothing
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER prompts_library_version_trigger
+        AFTER INSERT OR UPDATE OR DELETE ON prompts
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION prompts_bump_library_version();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS prompts_library_version_trigger ON prompts;")
+    op.execute("DROP FUNCTION IF EXISTS prompts_bump_library_version();")
+
+    op.add_column(
+        "users",
+        sa.Column("library_version", sa.BigInteger, nullable=False, server_default="0"),
+    )
+    op.execute("""
+        UPDATE users SET library_version = v.version
+        FROM library_versions v WHERE v.user_id = users.id;
+    """)
+    op.drop_table("library_versions")
+
+    # Restore the statement-level triggers from 007
+    for event, table in (("insert", "new_rows"), ("update", "new_rows"), ("delete", "old_rows")):
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION prompts_bump_library_version_{event}() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users SET library_version = library_version + 1
+                WHERE id IN (SELECT DISTINCT user_id FROM {table});
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+        op.execute(f"""
+            CREATE TRIGGER prompts_library_version_{event}_trigger
+            AFTER {event.upper()} ON prompts
+            REFERENCING {"OLD" if event == "delete" else "NEW"} TABLE AS {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION prompts_bump_library_version_{event}();
+        """)
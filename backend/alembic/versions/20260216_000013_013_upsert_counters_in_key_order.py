@@ -0,0 +1,176 @@
+"""Apply tag and category counter deltas per statement, in key order
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-02-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# counter -> (table, key column, (user_id, k) of every key held by {rows})
+COUNTERS = {
+    "tag": ("user_tag_counts", "tag", "SELECT user_id, k FROM {rows}, unnest(tags) AS k"),
+    "category": (
+        "user_category_counts",
+        "category",
+        "SELECT user_id, category AS k FROM {rows} WHERE category IS NOT NULL",
+    ),
+}
+
+# event -> transition tables it has, with the sign their keys count with
+EVENTS = {
+    "insert": (("new_rows", 1),),
+    "update": (("old_rows", -1), ("new_rows", 1)),
+    "delete": (("old_rows", -1),),
+}
+
+
+def counter_function(counter: str, event: str) -> str:
+    table, column, keys = COUNTERS[counter]
+    deltas = "\n                    UNION ALL\n                    ".join(
+        f"SELECT user_id, k, {sign} AS n FROM ({keys.format(rows=rows)}) {rows}"
+        for rows, sign in EVENTS[event]
+    )
+    # Rows whose count reached zero; the upsert already locked them
+    prune = "" if event == "insert" else f"""
+            DELETE FROM {table} c
+            USING ({keys.format(rows="old_rows")}) o
+            WHERE c.user_id = o.user_id AND c.{column} = o.k AND c.count <= 0;"""
+    return f"""
+        CREATE OR REPLACE FUNCTION prompts_apply_{counter}_deltas_{event}() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {table} (user_id, {column}, count)
+            SELECT user_id, k, sum(n) FROM (
+                    {deltas}
+            ) d
+            WHERE user_id IN (SELECT id FROM users)
+            GROUP BY user_id, k
+            HAVING sum(n) <> 0
+            ORDER BY user_id, k
+            ON CONFLICT (user_id, {column})
+            DO UPDATE SET count = {table}.count + EXCLUDED.count;{prune}
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade() -> None:
+    # The row-level triggers from 006 upserted each row's keys in the order
+    # the row listed them, and a multi-row statement went row by row, so two
+    # writers sharing tags could lock the same counters in opposite orders
+    # and deadlock. Each statement now applies the net delta of all its rows
+    # in one upsert sorted by (user_id, key), so every writer locks counters
+    # in the same order; it also writes each counter once per statement.
+    # Owners that no longer exist (a user delete cascading to its prompts)
+    # are skipped: their counters are cascaded away with them.
+    op.execute("DROP TRIGGER IF EXISTS prompts_category_counts_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_category_counts_insert_delete_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_tag_counts_update_trigger ON prompts;")
+    op.execute("DROP TRIGGER IF EXISTS prompts_tag_counts_insert_delete_trigger ON prompts;")
+    op.execute("DROP FUNCTION IF EXISTS prompts_category_counts_update();")
+    op.execute("DROP FUNCTION IF EXISTS prompts_tag_counts_update();")
+
+    for counter in COUNTERS:
+        for event, tables in EVENTS.items():
+            op.execute(counter_function(counter, event))
+            referencing = " ".join(
+                f"{'OLD' if rows == 'old_rows' else 'NEW'} TABLE AS {rows}" for rows, _ in tables
+            )
+            # Transition tables rule out UPDATE OF columns; updates that keep
+            # the keys have a zero delta and write nothing
+            op.execute(f"""
+                CREATE TRIGGER prompts_{counter}_deltas_{event}_trigger
+                AFTER {event.upper()} ON prompts
+                REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION prompts_apply_{counter}_deltas_{event}();
+            """)
+
+
+def downgrade() -> None:
+    for counter in COUNTERS:
+        for event in EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS prompts_{counter}_deltas_{event}_trigger ON prompts;")
+            op.execute(f"DROP FUNCTION IF EXISTS prompts_apply_{counter}_deltas_{event}();")
+
+    # Restore the row-level triggers from 006
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_tag_counts_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.tags IS NOT NULL THEN
+                UPDATE user_tag_counts c
+                SET count = c.count - d.n
+                FROM (SELECT t, count(*) AS n FROM unnest(OLD.tags) AS t GROUP BY t) d
+                WHERE c.user_id = OLD.user_id AND c.tag = d.t;
+
+                DELETE FROM user_tag_counts
+                WHERE user_id = OLD.user_id AND tag = ANY(OLD.tags) AND count <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.tags IS NOT NULL THEN
+                INSERT INTO user_tag_counts (user_id, tag, count)
+                SELECT NEW.user_id, t, count(*) FROM unnest(NEW.tags) AS t GROUP BY t
+                ON CONFLICT (user_id, tag)
+                DO UPDATE SET count = user_tag_counts.count + EXCLUDED.count;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION prompts_category_counts_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.category IS NOT NULL THEN
+                UPDATE user_category_counts
+                SET count = count - 1
+                WHERE user_id = OLD.user_id AND category = OLD.category;
+
+                DELETE FROM user_category_counts
+                WHERE user_id = OLD.user_id AND category = OLD.category AND count <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.category IS NOT NULL THEN
+                INSERT INTO user_category_counts (user_id, category, count)
+                VALUES (NEW.user_id, NEW.category, 1)
+                ON CONFLICT (user_id, category)
+                DO UPDATE SET count = user_category_counts.count + 1;
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_tag_counts_insert_delete_trigger
+        AFTER INSERT OR DELETE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_tag_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_tag_counts_update_trigger
+        AFTER UPDATE OF tags, user_id ON prompts
+        FOR EACH ROW
+        WHEN (OLD.tags IS DISTINCT FROM NEW.tags OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION prompts_tag_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_category_counts_insert_delete_trigger
+        AFTER INSERT OR DELETE ON prompts
+        FOR EACH ROW EXECUTE FUNCTION prompts_category_counts_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER prompts_category_counts_update_trigger
+        AFTER UPDATE OF category, user_id ON prompts
+        FOR EACH ROW
+        WHEN (OLD.category IS DISTINCT FROM NEW.category OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+        EXECUTE FUNCTION prompts_category_counts_update();
+    """)
@@ -0,0 +1,34 @@
+"""Persist token revocations
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-02-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Revoked tokens by SHA-256 digest, until they would have expired anyway.
+    # Workers check it on a token cache miss, so a worker started after a
+    # revocation was broadcast still refuses the token.
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("digest", sa.LargeBinary, primary_key=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("revoked_tokens")
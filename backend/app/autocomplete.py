@@ -0,0 +1,94 @@
+"""Shared lookup path for the tag and category autocomplete endpoints."""
+import asyncio
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.db import rls_session
+
+# (user_id, kind, library_version, lowercased prefix)
+Key = tuple[UUID, str, int, str]
+
+settings = get_settings()
+
+# Results with a flag telling whether they hold every match for the prefix
+autocomplete_cache: TTLCache[Key, tuple[list[str], bool]] = TTLCache(
+    settings.autocomplete_cache_size, settings.autocomplete_cache_ttl
+)
+
+# Queries currently running, shared by identical concurrent requests
+_in_flight: dict[Key, asyncio.Task] = {}
+
+
+def prefix_pattern(q: str) -> str:
+    """LIKE pattern matching names that start with q (already lowercased)."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _from_cache(key: Key, limit: int) -> list[str] | None:
+    """Answer from the exact prefix, or from a broader one that was complete."""
+    user_id, kind, version, prefix = key
+    cached = autocomplete_cache.peek(key)
+    if cached is not None:
+        return autocomplete_cache.get(key)[0]
+
+    # Peek so only this lookup is counted, not every broader prefix tried
+    for length in range(len(prefix) - 1, -1, -1):
+        broader = (user_id, kind, version, prefix[:length])
+        cached = autocomplete_cache.peek(broader)
+        if cached is not None:
+            names, complete = cached
+            if not complete:
+                # Shorter prefixes hold supersets, so they can't be complete either
+                break
+            autocomplete_cache.get(broader)
+            return [name for name in names if name.lower().startswith(prefix)][:limit]
+    autocomplete_cache.misses += 1
+    return None
+
+
+async def _fetch(user_id: UUID, fetch: Callable[[AsyncSession], Awaitable[list[str]]]) -> list[str]:
+    async with rls_session(user_id) as db:
+        return await fetch(db)
+
+
+async def autocomplete(
+    kind: str,
+    user_id: UUID,
+    version: int,
+    q: str | None,
+    limit: int,
+    db: AsyncSession,
+    fetch: Callable[[AsyncSession], Awaitable[list[str]]],
+) -> list[str]:
+    """
+    Return up to `limit` names for a prefix, querying the database at most once.
+
+    Identical concurrent lookups from a user join the query already running
+    instead of starting their own, and a narrower prefix is filtered from a
+    cached broader result when that result was not truncated by `limit`.
+    The shared query runs on its own session, so it outlives any one caller.
+    """
+    key: Key = (user_id, kind, version, q.lower() if q else "")
+
+    names = _from_cache(key, limit)
+    if names is not None:
+        return names
+
+    # Give this request's connection back to the pool while waiting
+    await db.close()
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(user_id, fetch))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    # Shielded so one caller going away doesn't cancel the others' result
+    names = await asyncio.shield(task)
+    autocomplete_cache.set(key, (names, len(names) < limit))
+    return names
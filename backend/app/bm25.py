@@ -0,0 +1,223 @@
+"""In-memory BM25 inverted index over one user's prompts.
+
+Terms are case-folded words; a term's frequency in a prompt is weighted by
+field like search_vector's A/B/C weights (ts_rank defaults: title 1.0,
+tags 0.4, content 0.2), and so is the document length BM25 normalizes by.
+There is no stemming; instead the last query word is expanded to every
+indexed term it prefixes, which also serves search-as-you-type.
+"""
+import bisect
+import math
+import re
+from uuid import UUID
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+TITLE_WEIGHT = 1.0
+TAGS_WEIGHT = 0.4
+CONTENT_WEIGHT = 0.2
+
+# Shorter last words are matched exactly rather than expanded
+MIN_PREFIX_CHARS = 2
+# Expansions kept for a prefix, most common terms first
+MAX_PREFIX_TERMS = 50
+# Compact once this many slots are dead and they outnumber live ones
+MIN_COMPACT_SLOTS = 1024
+
+_WORD_RE = re.compile(r"\w+")
+
+# term -> weighted frequency in one prompt
+Document = dict[str, float]
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into case-folded words."""
+    return _WORD_RE.findall(text.lower())
+
+
+def document_terms(title: str, content: str, tags: list[str] | None) -> Document:
+    """Return a prompt's field-weighted term frequencies."""
+    terms: Document = {}
+    for text, weight in (
+        (title, TITLE_WEIGHT),
+        (" ".join(tags or []), TAGS_WEIGHT),
+        (content, CONTENT_WEIGHT),
+    ):
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0.0) + weight
+    return terms
+
+
+class Postings:
+    """Growable parallel arrays of (slot, weighted frequency) for one term."""
+
+    __slots__ = ("slots", "weights", "size", "df")
+
+    def __init__(self) -> None:
+        self.slots = np.empty(4, dtype=np.int32)
+        self.weights = np.empty(4, dtype=np.float32)
+        self.size = 0
+        # Live documents containing the term
+        self.df = 0
+
+    def append(self, slot: int, weight: float) -> None:
+        if self.size == len(self.slots):
+            self.slots = np.resize(self.slots, self.size * 2)
+            self.weights = np.resize(self.weights, self.size * 2)
+        self.slots[self.size] = slot
+        self.weights[self.size] = weight
+        self.size += 1
+        self.df += 1
+
+    def compact(self, remap: np.ndarray) -> None:
+        """Drop dead slots and renumber the rest through remap (-1 = dead)."""
+        slots = remap[self.slots[:self.size]]
+        keep = slots >= 0
+        self.slots = slots[keep].astype(np.int32)
+        self.weights = self.weights[:self.size][keep]
+        self.size = len(self.slots)
+
+
+class UserTermIndex:
+    """
+    One user's inverted index.
+
+    Each indexed prompt occupies a slot; postings list slots in ascending
+    order. Updating a prompt frees its old slot and takes a new one, and
+    freed slots stay in the postings as tombstones until enough accumulate
+    to compact everything in one pass.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, Postings] = {}
+        self.slot_ids: list[UUID | None] = []
+        self.slot_terms: list[tuple[str, ...] | None] = []
+        self.slots: dict[UUID, int] = {}
+        self.lengths = np.empty(16, dtype=np.float32)
+        self.alive = np.zeros(16, dtype=bool)
+        self.total_length = 0.0
+        self._sorted_terms: list[str] | None = None
+        # library_version and change-log position the index reflects
+        self.version = -1
+        self.token = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def upsert(self, prompt_id: UUID, document: Document) -> None:
+        """Index a prompt, replacing any previous version of it."""
+        self.remove(prompt_id)
+        slot = len(self.slot_ids)
+        if slot == len(self.lengths):
+            self.lengths = np.resize(self.lengths, slot * 2)
+            self.alive = np.resize(self.alive, slot * 2)
+
+        for term, weight in document.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = Postings()
+                self._sorted_terms = None
+            postings.append(slot, weight)
+
+        length = sum(document.values())
+        self.lengths[slot] = length
+        self.alive[slot] = True
+        self.total_length += length
+        self.slot_ids.append(prompt_id)
+        self.slot_terms.append(tuple(document))
+        self.slots[prompt_id] = slot
+
+    def remove(self, prompt_id: UUID) -> None:
+        """Unindex a prompt if present."""
+        slot = self.slots.pop(prompt_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.total_length -= float(self.lengths[slot])
+        for term in self.slot_terms[slot]:
+            postings = self.postings[term]
+            postings.df -= 1
+            if postings.df == 0:
+                del self.postings[term]
+                self._sorted_terms = None
+        self.slot_ids[slot] = None
+        self.slot_terms[slot] = None
+
+        dead = len(self.slot_ids) - len(self.slots)
+        if dead >= MIN_COMPACT_SLOTS and dead > len(self.slots):
+            self._compact()
+
+    def search(self, query: str, limit: int) -> list[tuple[UUID, float]]:
+        """
+        Return up to limit prompts matching every query word, best first.
+
+        The last word also matches terms it is a prefix of.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or not self.slots:
+            return []
+
+        n = len(self.slot_ids)
+        live = len(self.slots)
+        avgdl = self.total_length / live or 1.0
+        norm = K1 * (1 - B + B * self.lengths[:n] / avgdl)
+        scores = np.zeros(n, dtype=np.float32)
+        matched_all = self.alive[:n].copy()
+
+        for position, word in enumerate(words):
+            if position == len(words) - 1 and len(word) >= MIN_PREFIX_CHARS:
+                terms = self._expand(word)
+            else:
+                terms = [word] if word in self.postings else []
+            if not terms:
+                return []
+
+            matched = np.zeros(n, dtype=bool)
+            for term in terms:
+                postings = self.postings[term]
+                slots = postings.slots[:postings.size]
+                tf = postings.weights[:postings.size]
+                idf = math.log(1 + (live - postings.df + 0.5) / (postings.df + 0.5))
+                scores[slots] += idf * tf * (K1 + 1) / (tf + norm[slots])
+                matched[slots] = True
+            matched_all &= matched
+
+        candidates = np.flatnonzero(matched_all)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.slot_ids[slot], float(scores[slot])) for slot in ordered]
+
+    def _expand(self, prefix: str) -> list[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = []
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms.sort(key=lambda term: self.postings[term].df, reverse=True)
+            terms = terms[:MAX_PREFIX_TERMS]
+        return terms
+
+    def _compact(self) -> None:
+        n = len(self.slot_ids)
+        alive = self.alive[:n]
+        remap = np.where(alive, np.cumsum(alive) - 1, -1)
+        for postings in self.postings.values():
+            postings.compact(remap)
+
+        self.slot_ids = [prompt_id for prompt_id in self.slot_ids if prompt_id is not None]
+        self.slot_terms = [terms for terms in self.slot_terms if terms is not None]
+        self.lengths = self.lengths[:n][alive].copy()
+        self.alive = np.ones(len(self.slot_ids), dtype=bool)
+        if not len(self.alive):
+            self.lengths = np.empty(16, dtype=np.float32)
+            self.alive = np.zeros(16, dtype=bool)
+        self.slots = {prompt_id: slot for slot, prompt_id in enumerate(self.slot_ids)}
@@ -0,0 +1,120 @@
+"""Incremental parsing of streamed bulk import bodies."""
+import codecs
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+# (index, record, error) - exactly one of record / error is meaningful
+ParsedRecord = tuple[int, Any, str | None]
+
+_decoder = json.JSONDecoder()
+
+
+async def iter_json_records(
+    chunks: AsyncIterator[bytes],
+    max_record_chars: int,
+) -> AsyncIterator[ParsedRecord]:
+    """
+    Yield records from an NDJSON or JSON-array body as it streams in.
+
+    The format is sniffed from the first non-whitespace character: `[`
+    starts a JSON array, anything else is NDJSON. A malformed NDJSON line
+    only fails that record; a malformed JSON array can't be resynchronised,
+    so it yields one error and stops. Anything but whitespace after the
+    array's closing `]` is an error too.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    index = 0
+    is_array: bool | None = None
+    array_started = False
+    expect_value = True
+    eof = False
+
+    async def read_more() -> bool:
+        nonlocal buffer, eof
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            buffer += text_decoder.decode(b"", final=True)
+            eof = True
+            return False
+        buffer += text_decoder.decode(chunk)
+        return True
+
+    while True:
+        if is_array is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                buffer = ""
+                if not await read_more():
+                    return
+                continue
+            is_array = stripped[0] == "["
+            buffer = stripped
+
+        if not is_array:
+            newline = buffer.find("\n")
+            if newline == -1 and not eof:
+                if len(buffer) > max_record_chars:
+                    yield index, None, "Record exceeds maximum size"
+                    return
+                await read_more()
+                continue
+            line, buffer = (buffer, "") if newline == -1 else (buffer[:newline], buffer[newline + 1:])
+            if line.strip():
+                try:
+                    yield index, json.loads(line), None
+                except json.JSONDecodeError as exc:
+                    yield index, None, f"Malformed JSON: {exc.msg}"
+                index += 1
+            if eof and not buffer:
+                return
+            continue
+
+        # JSON array: consume '[', then values separated by ',' up to ']'
+        buffer = buffer.lstrip()
+        if not buffer:
+            if not await read_more():
+                yield index, None, "Malformed JSON: unterminated array; import stopped"
+                return
+            continue
+        if not array_started:
+            buffer = buffer[1:]
+            array_started = True
+            continue
+        if buffer[0] == "]" and (not expect_value or index == 0):
+            # Only whitespace may follow the array
+            buffer = buffer[1:]
+            while not buffer.strip():
+                buffer = ""
+                if not await read_more():
+                    return
+            yield index, None, "Malformed JSON: unexpected data after the array"
+            return
+        if not expect_value:
+            if buffer[0] != ",":
+                yield index, None, "Malformed JSON: expected ',' or ']'; import stopped"
+                return
+            buffer = buffer[1:]
+            expect_value = True
+            continue
+        try:
+            record, end = _decoder.raw_decode(buffer)
+        except json.JSONDecodeError as exc:
+            if eof:
+                yield index, None, f"Malformed JSON: {exc.msg}; import stopped"
+                return
+            if len(buffer) > max_record_chars:
+                yield index, None, "Record exceeds maximum size; import stopped"
+                return
+            await read_more()
+            continue
+        # A bare number at the end of the buffer may still be incomplete
+        if end == len(buffer) and not eof and not isinstance(record, (dict, list, str)):
+            await read_more()
+            continue
+        buffer = buffer[end:]
+        expect_value = False
+        yield index, record, None
+        index += 1
@@ -0,0 +1,135 @@
+"""Small in-process caches."""
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries expire a fixed time after being set."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Return a live entry, or None on miss or expiry."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, key: K) -> V | None:
+        """Return a live entry without counting it or refreshing its LRU position."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Drop a single entry."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies, bounded by entries and bytes.
+
+    Keys are (owner, generation, *rest). Storing an entry with a newer
+    generation drops the owner's older entries, since they can no longer
+    be hit.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        # owner -> (generation, keys stored for it)
+        self._owners: dict[Any, tuple[int, set[tuple]]] = {}
+
+    def get(self, key: tuple) -> bytes | None:
+        """Return a cached body, or None on miss."""
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def set(self, key: tuple, body: bytes) -> None:
+        """Store a body; bodies larger than a quarter of max_bytes are skipped."""
+        if len(body) > self.max_bytes // 4:
+            return
+
+        self._remove(key)
+        owner, generation = key[0], key[1]
+        current = self._owners.get(owner)
+        if current is not None and current[0] < generation:
+            for stale in list(current[1]):
+                self._remove(stale)
+            current = None
+        elif current is not None and current[0] > generation:
+            # Computed from an older generation than one already cached
+            return
+        if current is None:
+            current = (generation, set())
+            self._owners[owner] = current
+
+        self._entries[key] = body
+        self.bytes += len(body)
+        current[1].add(key)
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters, entry count and size in bytes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+    def _remove(self, key: tuple) -> None:
+        body = self._entries.pop(key, None)
+        if body is None:
+            return
+        self.bytes -= len(body)
+        owner = self._owners.get(key[0])
+        if owner is not None:
+            owner[1].discard(key)
+            if not owner[1]:
+                del self._owners[key[0]]
@@ -1,5 +1,6 @@
 """Application configuration using Pydantic settings."""
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 
@@ -9,11 +10,97 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # Per process; python -m app.server lowers the pool settings to each
+    # worker's share of db_max_connections (all workers' connections, LISTEN
+    # ones included; keep it below PostgreSQL's max_connections)
+    db_max_connections: int = 80
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Prompts listing
+    prompts_count_estimate_cap: int = 1000
+    prompts_snippet_chars: int = 240
+    # Rows per bulk import INSERT; capped at 5461 (asyncpg's 32767 bind
+    # parameters, 6 per row)
+    bulk_import_batch_size: int = 1000
+    bulk_import_max_record_chars: int = 1_000_000
+    export_batch_size: int = 500
+    list_cache_max_entries: int = 10000
+    list_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Full-text search backend for GET /prompts?q=: "postgres" (ts_rank)
+    # or "bm25" (in-memory inverted index per user)
+    search_backend: Literal["postgres", "bm25"] = "postgres"
+    search_candidates: int = 1000
+    search_index_max_prompts: int = 1_000_000
+
+    # Similarity search: 256 float32 per vector, so 100k vectors are ~100 MB
+    # per worker (up to twice that while a user's matrix grows)
+    vector_index_max_vectors: int = 100_000
+    semantic_candidates: int = 1000
+
+    # Near-duplicate detection: 512-byte signatures plus band buckets, so
+    # 100k signatures take roughly 100-200 MB per worker
+    duplicate_threshold: float = 0.8
+    duplicate_index_max_signatures: int = 100_000
+
+    # Change stream (SSE)
+    stream_queue_size: int = 100
+    stream_heartbeat_seconds: float = 15.0
+
+    # Tag/category autocomplete
+    autocomplete_cache_size: int = 10000
+    autocomplete_cache_ttl: float = 300.0
+
+    # Metrics: with metrics_dir set, workers share their metrics through
+    # snapshot files there so /metrics covers every worker
+    metrics_dir: str | None = None
+    metrics_flush_seconds: float = 5.0
+
+    # Slow statement log (opt-in; unset threshold disables it)
+    slow_query_threshold_ms: float | None = None
+    slow_query_explain_rate: float = 0.0
+    slow_query_log_size: int = 200
+
+    # Request profiler: admins opt in per request with an X-Profile header;
+    # a sample rate above 0 also profiles that fraction of all requests
+    profiler_sample_rate: float = 0.0
+    profiler_interval: float = 0.001
+    profiler_max_profiles: int = 50
+
+    # Production server (python -m app.server): gunicorn supervising uvicorn
+    # workers; the worker count defaults to the CPUs available, at most 8 and
+    # at most db_max_connections / 5, and workers are replaced after
+    # max_requests (plus jitter) to bound memory growth
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int | None = None
+    server_max_requests: int = 10000
+    server_max_requests_jitter: int = 1000
+    server_graceful_timeout: float = 30.0
+    server_keepalive: int = 5
+    # Seconds without a heartbeat before gunicorn restarts a worker; must
+    # exceed warmup_timeout
+    server_timeout: int = 120
+
+    # Startup warm-up: also load the in-memory indexes of this many of the
+    # most active users before a worker reports ready; the whole warm-up is
+    # cut short after warmup_timeout seconds
+    warmup_users: int = 0
+    warmup_timeout: float = 60.0
 
     # Security
     jwt_secret: str = "change-me-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expire_days: int = 7
+    jwt_cache_size: int = 10000
+
+    # User profile cache (/auth/me)
+    profile_cache_size: int = 10000
+    profile_cache_ttl: float = 60.0
 
     # Google OAuth
     google_client_id: str = ""
@@ -23,11 +110,19 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: str = "http://localhost:80"
 
+    # Admin endpoints: comma-separated emails of admin users
+    admin_emails: str = ""
+
     @property
     def cors_origins_list(self) -> list[str]:
         """Parse CORS origins as a list."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def admin_emails_list(self) -> list[str]:
+        """Parse admin emails as a lowercase list."""
+        return [email.strip().lower() for email in self.admin_emails.split(",") if email.strip()]
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,16 +1,34 @@
 """Database configuration and utilities."""
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from uuid import UUID
 
+from sqlalchemy import BigInteger, Text, cast, event, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session
 
 from app.config import get_settings
+from app.metrics import instrument_engine
+from app.slow_queries import create_slow_query_log
 
-# Create async engine
+# Session.info key holding the user id used for Row-Level Security
+RLS_USER_ID_KEY = "rls_user_id"
+
+settings = get_settings()
+
+# Create async engine with a connection pool
 engine = create_async_engine(
-    get_settings().database_url,
-    poolclass=NullPool,  # Recommended for async
+    settings.database_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    # Always roll back on checkin so transaction-local settings never survive
+    pool_reset_on_return="rollback",
 )
+slow_query_log = create_slow_query_log()
+instrument_engine(engine, [slow_query_log.observe] if slow_query_log else [])
 
 # Session factory
 async_session_factory = async_sessionmaker(
@@ -20,12 +38,45 @@ async_session_factory = async_sessionmaker(
 )
 
 
+@event.listens_for(Session, "after_begin")
+def apply_rls_context(session: Session, transaction, connection) -> None:
+    """
+    Set the RLS user for every transaction the session begins.
+
+    The setting is transaction-local (is_local = true), so it is discarded
+    on COMMIT/ROLLBACK and can never leak to the next user of a pooled
+    connection.
+    """
+    user_id = session.info.get(RLS_USER_ID_KEY)
+    if user_id is not None:
+        connection.execute(
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": user_id},
+        )
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database sessions."""
     async with async_session_factory() as session:
         yield session
 
 
+@asynccontextmanager
+async def rls_session(user_id: UUID) -> AsyncGenerator[AsyncSession, None]:
+    """Open a session bound to a user's RLS context outside of a request's dependencies."""
+    async with async_session_factory() as session:
+        session.info[RLS_USER_ID_KEY] = str(user_id)
+        yield session
+
+
+async def snapshot_xmin(db: AsyncSession) -> int:
+    """Return the xmin of db's current snapshot; every older transaction has finished."""
+    result = await db.execute(
+        select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger))
+    )
+    return result.scalar_one()
+
+
 def get_sync_database_url() -> str:
     """Get synchronous database URL (for Alembic migrations)."""
     url = get_settings().database_url
@@ -0,0 +1,130 @@
+"""Per-user LSH indexes over MinHash signatures for near-duplicate detection."""
+from uuid import UUID
+
+import numpy as np
+
+from app.config import get_settings
+from app.minhash import BANDS, bands, from_bytes, signature, similarity, to_bytes
+from app.models.prompt_signature import PromptSignature
+from app.user_index import StoredUserIndexes
+
+
+class UserSignatures:
+    """
+    One user's signatures with a bucket table per LSH band.
+
+    Prompts that share any band bucket are candidates; candidates are kept
+    only if their estimated similarity reaches the threshold.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.signatures: dict[UUID, np.ndarray] = {}
+        self.buckets: list[dict[bytes, set[UUID]]] = [{} for _ in range(BANDS)]
+        # library_version and change-log position the index reflects
+        self.version = -1
+        self.token = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def upsert(self, prompt_id: UUID, sig: np.ndarray) -> None:
+        """Insert or replace a prompt's signature."""
+        self.remove(prompt_id)
+        self.signatures[prompt_id] = sig
+        for table, key in zip(self.buckets, bands(sig)):
+            table.setdefault(key, set()).add(prompt_id)
+
+    def remove(self, prompt_id: UUID) -> None:
+        """Drop a prompt's signature if present."""
+        sig = self.signatures.pop(prompt_id, None)
+        if sig is None:
+            return
+        for table, key in zip(self.buckets, bands(sig)):
+            bucket = table[key]
+            bucket.discard(prompt_id)
+            if not bucket:
+                del table[key]
+
+    def query(self, sig: np.ndarray, exclude: UUID | None = None) -> list[tuple[UUID, float]]:
+        """Return likely duplicates of a signature, most similar first."""
+        candidates: set[UUID] = set()
+        for table, key in zip(self.buckets, bands(sig)):
+            candidates.update(table.get(key, ()))
+        candidates.discard(exclude)
+
+        matches = []
+        for prompt_id in candidates:
+            score = similarity(sig, self.signatures[prompt_id])
+            if score >= self.threshold:
+                matches.append((prompt_id, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def clusters(self) -> list[list[UUID]]:
+        """
+        Group prompts into near-duplicate clusters, largest first.
+
+        Within each bucket, members are checked against the bucket's first
+        member only and merged with union-find, so the work is linear in
+        bucket sizes rather than quadratic.
+        """
+        parent: dict[UUID, UUID] = {}
+
+        def find(prompt_id: UUID) -> UUID:
+            root = parent.setdefault(prompt_id, prompt_id)
+            while root != parent[root]:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            return root
+
+        for table in self.buckets:
+            for bucket in table.values():
+                if len(bucket) < 2:
+                    continue
+                members = iter(bucket)
+                first = next(members)
+                first_sig = self.signatures[first]
+                for prompt_id in members:
+                    if find(prompt_id) != find(first) and (
+                        similarity(first_sig, self.signatures[prompt_id]) >= self.threshold
+                    ):
+                        parent[find(prompt_id)] = find(first)
+
+        groups: dict[UUID, list[UUID]] = {}
+        for prompt_id in parent:
+            groups.setdefault(find(prompt_id), []).append(prompt_id)
+        return sorted(
+            (group for group in groups.values() if len(group) > 1),
+            key=len,
+            reverse=True,
+        )
+
+
+class SignatureIndexes(StoredUserIndexes[UserSignatures, np.ndarray]):
+    """Per-user LSH indexes over prompt_signatures."""
+
+    model = PromptSignature
+    column = "signature"
+
+    def __init__(self, max_entries: int, threshold: float) -> None:
+        super().__init__(max_entries)
+        self.threshold = threshold
+
+    def new_index(self) -> UserSignatures:
+        return UserSignatures(self.threshold)
+
+    def compute(self, title: str, content: str, tags: list[str] | None) -> np.ndarray:
+        return signature(title, content)
+
+    def encode(self, vector: np.ndarray) -> bytes:
+        return to_bytes(vector)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return from_bytes(data)
+
+
+signature_indexes = SignatureIndexes(
+    get_settings().duplicate_index_max_signatures,
+    get_settings().duplicate_threshold,
+)
@@ -2,44 +2,31 @@
 from uuid import UUID
 
 import jwt
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Request, status
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings, get_settings
-from app.db import get_db
+from app.db import RLS_USER_ID_KEY, get_db
+from app.models.library_version import LibraryVersion
 from app.models.user import User
+from app.token_cache import is_token_revoked, token_cache
 
 
-async def get_current_user_id(
-    access_token: str | None = Cookie(default=None),
-    settings: Settings = Depends(get_settings),
-) -> UUID:
+def decode_token(access_token: str, settings: Settings) -> dict:
     """
-    Extract and validate user_id from JWT token in cookie.
+    Verify a JWT's signature and expiry and return its payload.
 
-    Returns the user_id if token is valid.
-    Raises 401 if token is missing or invalid.
+    Raises 401 if the token is invalid or has expired.
     """
-    if not access_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-        )
-
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             access_token,
             settings.jwt_secret,
             algorithms=[settings.jwt_algorithm],
+            # Revocations are kept until exp, so every token needs one
+            options={"require": ["exp"]},
         )
-        user_id_str = payload.get("user_id")
-        if not user_id_str:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-            )
-        return UUID(user_id_str)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,6 +39,57 @@ async def get_current_user_id(
         )
 
 
+def payload_user_id(payload: dict) -> UUID:
+    """
+    Return the user_id a decoded JWT was issued to.
+
+    Raises 401 if the payload names no valid user id.
+    """
+    try:
+        return UUID(payload["user_id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+        )
+
+
+async def get_current_user_id(
+    access_token: str | None = Cookie(default=None),
+    settings: Settings = Depends(get_settings),
+    db: AsyncSession = Depends(get_db),
+) -> UUID:
+    """
+    Extract and validate user_id from JWT token in cookie.
+
+    Returns the user_id if token is valid.
+    Raises 401 if token is missing, invalid or revoked.
+    Verified tokens are cached until they expire, so repeated requests
+    skip the signature check and the revocation lookup.
+    """
+    if not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+
+    user_id = token_cache.lookup(access_token)
+    if user_id is not None:
+        return user_id
+
+    payload = decode_token(access_token, settings)
+    user_id = payload_user_id(payload)
+
+    if await is_token_revoked(db, access_token) or not token_cache.store(
+        access_token, user_id, payload["exp"]
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+    return user_id
+
+
 async def get_current_user(
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
@@ -74,6 +112,24 @@ async def get_current_user(
     return user
 
 
+async def get_admin_user(
+    user: User = Depends(get_current_user),
+    settings: Settings = Depends(get_settings),
+) -> User:
+    """
+    Get the current user if they are an admin.
+
+    Raises 403 unless the user's email is listed in admin_emails.
+    """
+    if user.email.lower() not in settings.admin_emails_list:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    return user
+
+
 async def get_db_with_rls(
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
@@ -81,11 +137,71 @@ async def get_db_with_rls(
     """
     Get database session with RLS context set.
 
-    Sets the PostgreSQL session variable app.current_user_id
+    Registers the user on the session so that every transaction it begins
+    sets the transaction-local PostgreSQL variable app.current_user_id
     for Row-Level Security policies.
     """
-    await db.execute(
-        text("SELECT set_config('app.current_user_id', :user_id, false)"),
-        {"user_id": str(user_id)},
-    )
+    db.info[RLS_USER_ID_KEY] = str(user_id)
+    if db.in_transaction():
+        # Transaction already started before the user was known
+        await db.execute(
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": str(user_id)},
+        )
     return db
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    """Headers for a response that clients should revalidate with If-None-Match."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def get_library_version(
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+) -> int:
+    """
+    Get the user's library_version.
+
+    Every transaction that writes the user's prompts bumps it as it
+    commits, so it identifies the current state of everything derived
+    from the user's prompts.
+    """
+    result = await db.execute(
+        select(LibraryVersion.version).where(LibraryVersion.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def get_library_etag(
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    version: int = Depends(get_library_version),
+) -> str:
+    """
+    Get a weak ETag for everything derived from the user's prompts.
+
+    Raises 304 Not Modified if the client's If-None-Match already holds it,
+    before the endpoint runs its own queries.
+    """
+    etag = f'W/"{user_id.hex[:8]}-{version}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(etag, if_none_match):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=etag_headers(etag),
+        )
+
+    return etag
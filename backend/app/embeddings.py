@@ -0,0 +1,71 @@
+"""Offline text embeddings for prompt similarity.
+
+A hashed bag of word unigrams, word bigrams and character trigrams,
+weighted like the full-text search vector (title > tags > content),
+sublinear in term frequency and L2-normalized. No model downloads and no
+network access; the same text always yields the same vector.
+"""
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+EMBEDDING_DTYPE = np.float32
+
+# Field weights, mirroring the A/B/C weights of search_vector
+TITLE_WEIGHT = 3.0
+TAGS_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _features(text: str) -> list[str]:
+    words = _WORD_RE.findall(text.lower())
+    features = list(words)
+    features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def embed_text(title: str, content: str, tags: list[str] | None) -> np.ndarray:
+    """Return the unit-length embedding of a prompt."""
+    indices: list[int] = []
+    weights: list[float] = []
+    for text, weight in (
+        (title, TITLE_WEIGHT),
+        (" ".join(tags or []), TAGS_WEIGHT),
+        (content, CONTENT_WEIGHT),
+    ):
+        for feature in _features(text):
+            # Stable across processes (unlike hash()); the top bit picks the
+            # sign so colliding features tend to cancel out
+            h = zlib.crc32(feature.encode())
+            indices.append(h % EMBEDDING_DIM)
+            weights.append(weight if h & 0x80000000 else -weight)
+
+    if not indices:
+        return np.zeros(EMBEDDING_DIM, dtype=EMBEDDING_DTYPE)
+
+    counts = np.bincount(indices, weights=weights, minlength=EMBEDDING_DIM)
+    vector = (np.sign(counts) * np.log1p(np.abs(counts))).astype(EMBEDDING_DTYPE)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Return the unit-length embedding of free-text search input."""
+    return embed_text(text, "", None)
+
+
+def to_bytes(vector: np.ndarray) -> bytes:
+    """Serialize an embedding for the prompt_embeddings.embedding column."""
+    return vector.astype(EMBEDDING_DTYPE).tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    """Deserialize an embedding stored by to_bytes."""
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
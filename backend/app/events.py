@@ -0,0 +1,124 @@
+"""Per-user prompt change events, fanned out from LISTEN/NOTIFY."""
+import asyncio
+import json
+import logging
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.functions import Function
+
+from app.config import get_settings
+from app.pubsub import listener, notify
+
+logger = logging.getLogger(__name__)
+
+PROMPT_EVENTS_CHANNEL = "prompt_events"
+
+# Sent instead of events a subscriber missed; clients should re-sync
+RESYNC_EVENT = {"type": "resync"}
+# Queued when the worker shuts down; the stream ends on it
+CLOSED = None
+
+
+async def publish_prompt_event(
+    db: AsyncSession, user_id: UUID, event_type: str, **data: Any
+) -> None:
+    """Queue a change event for the user's subscribers; sent when db commits."""
+    await notify(db, PROMPT_EVENTS_CHANNEL, _event_payload(user_id, event_type, data))
+
+
+def prompt_event_notification(user_id: UUID, event_type: str, **data: Any) -> Function:
+    """
+    pg_notify call queueing a change event from within a write statement.
+
+    Like publish_prompt_event, but saves the round trip: select it once per
+    written row, so nothing is sent when the write matched no rows.
+    """
+    return func.pg_notify(PROMPT_EVENTS_CHANNEL, _event_payload(user_id, event_type, data))
+
+
+def _event_payload(user_id: UUID, event_type: str, data: dict[str, Any]) -> str:
+    return json.dumps({"user_id": str(user_id), "type": event_type, **data})
+
+
+class ChangeFeed:
+    """
+    Fan-out of change events to the worker's stream subscribers.
+
+    Each subscriber has a bounded queue. A subscriber that falls behind
+    loses its backlog and gets a single resync event instead, so a slow
+    client can't grow memory without limit.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self.closed = False
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def subscribe(self, user_id: UUID) -> asyncio.Queue:
+        """Register a new subscriber queue for a user."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(str(user_id), set()).add(queue)
+        if self.closed:
+            queue.put_nowait(CLOSED)
+        return queue
+
+    def unsubscribe(self, user_id: UUID, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        queues = self._subscribers.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(user_id)]
+
+    def on_notification(self, payload: str) -> None:
+        """Deliver a NOTIFY payload to the subscribers of its user."""
+        if self.closed:
+            return
+        event = json.loads(payload)
+        user_key = event.pop("user_id")
+        for queue in self._subscribers.get(user_key, ()):
+            self._deliver(queue, event)
+
+    def resync_all(self) -> None:
+        """Tell every subscriber it may have missed events."""
+        if self.closed:
+            return
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._deliver(queue, RESYNC_EVENT)
+
+    def close(self) -> None:
+        """End every stream, so a shutting-down worker isn't held open by them."""
+        self.closed = True
+        for queues in self._subscribers.values():
+            for queue in queues:
+                # Whatever is still queued is moot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(CLOSED)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of users and subscribers connected."""
+        return {
+            "users": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: dict) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+
+feed = ChangeFeed(get_settings().stream_queue_size)
+
+listener.subscribe(PROMPT_EVENTS_CHANNEL, feed.on_notification)
+# Events published while disconnected were missed
+listener.on_reconnect(feed.resync_all)
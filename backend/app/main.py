@@ -1,17 +1,58 @@
 """FastAPI application entry point."""
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 
+from app.autocomplete import autocomplete_cache
 from app.config import get_settings
 from app.db import engine
+from app.metrics import MetricsMiddleware, collect, flush_periodically, registry
+from app.profile_cache import profile_cache
+from app.profiling import ProfilerMiddleware
+from app.pubsub import listener
+from app.routers.admin import router as admin_router
 from app.routers.auth import router as google_auth_router
 from app.routers.auth_general import router as auth_router
 from app.routers.categories import router as categories_router
+from app.routers.prompts import list_cache
 from app.routers.prompts import router as prompts_router
 from app.routers.tags import router as tags_router
+from app.token_cache import load_revocations, token_cache
+from app.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the worker's LISTEN connection and metrics flushing for the lifetime of the app.
+
+    The worker warms up before it reports ready on /health, and stops
+    reporting ready as soon as it starts shutting down.
+    """
+    app.state.ready = False
+    await listener.start()
+    # After LISTEN starts, so a revocation can't fall between the two
+    await load_revocations()
+    flusher = None
+    if get_settings().metrics_dir:
+        flusher = asyncio.create_task(flush_periodically())
+    await warm_up()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if flusher:
+        flusher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await flusher
+    await listener.stop()
+    await engine.dispose()
+
 
-app = FastAPI(title="Prompt Library API")
+app = FastAPI(title="Prompt Library API", lifespan=lifespan)
 
 # Configure CORS
 settings = get_settings()
@@ -22,8 +63,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilerMiddleware)
+# Outermost, so it times everything including CORS handling and profiling
+app.add_middleware(MetricsMiddleware)
+
+registry.register_cache("prompts_list", list_cache)
+registry.register_cache("autocomplete", autocomplete_cache)
+registry.register_cache("profile", profile_cache)
+registry.register_cache("token", token_cache)
 
 # Include routers
+app.include_router(admin_router)
 app.include_router(auth_router)
 app.include_router(google_auth_router)
 app.include_router(categories_router)
@@ -32,8 +82,12 @@ app.include_router(tags_router)
 
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint for Docker health checks."""
+async def health_check(response: Response):
+    """Health check endpoint for Docker health checks; 503 until the worker has warmed up."""
+    if not getattr(app.state, "ready", False):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting", "database": "unknown"}
+
     db_status = "disconnected"
     try:
         async with engine.connect() as conn:
@@ -43,3 +97,9 @@ async def health_check():
         pass
 
     return {"status": "healthy", "database": db_status}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus metrics of every worker; not routed through nginx."""
+    return PlainTextResponse(await collect(), media_type="text/plain; version=0.0.4")
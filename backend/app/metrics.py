@@ -0,0 +1,369 @@
+"""Prometheus metrics for requests, database use and caches.
+
+Each worker keeps plain counters and histograms in process memory. They are
+only touched from the event loop thread (SQLAlchemy's event hooks run in
+greenlets on that same thread), so recording takes no locks. With
+Settings.metrics_dir set, every worker periodically writes a snapshot to
+`<metrics_dir>/<pid>.json` and /metrics merges all snapshots, so a scrape
+that lands on any worker reports the whole server. Dead workers' counters
+are kept, so the directory must be cleared before the server starts
+(start.sh does this).
+"""
+import asyncio
+import bisect
+import contextlib
+import os
+import time
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Protocol
+
+import orjson
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Connection.info key of the start times of running statements, by cursor
+STATEMENT_START_KEY = "statement_start"
+
+# Called after each statement with (conn, statement, parameters, duration, executemany)
+StatementObserver = Callable[..., None]
+
+# Route label for requests that matched no route, to bound label values
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Metric name -> (type, help)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route and status code."),
+    "http_request_errors_total": ("counter", "HTTP requests that ended in a 5xx."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency."),
+    "db_request_duration_seconds": ("histogram", "Database time spent per HTTP request."),
+    "db_statements_per_request": ("histogram", "SQL statements executed per HTTP request."),
+    "db_pool_checkout_wait_seconds": ("histogram", "Time to check a connection out of the pool."),
+    "db_pool_size": ("gauge", "Connections the pool keeps open."),
+    "db_pool_checked_out": ("gauge", "Connections currently in use."),
+    "db_pool_overflow": ("gauge", "Connections open beyond the pool size."),
+    "cache_hits_total": ("counter", "Cache lookups that found an entry."),
+    "cache_misses_total": ("counter", "Cache lookups that found nothing."),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class CacheStats(Protocol):
+    """Anything exposing hit/miss counters through stats()."""
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket, cumulated on export."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestStats:
+    """Database use of the request being served."""
+
+    __slots__ = ("scope", "db_time", "statements")
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.db_time = 0.0
+        self.statements = 0
+
+    @property
+    def route(self) -> str:
+        """Route template of the request, once routing has matched one."""
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class Registry:
+    """This worker's metrics."""
+
+    def __init__(self) -> None:
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.caches: dict[str, CacheStats] = {}
+        self.engine: AsyncEngine | None = None
+
+    def inc(self, name: str, labels: Labels, amount: float = 1) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(
+        self, name: str, labels: Labels, buckets: tuple[float, ...], value: float
+    ) -> None:
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def register_cache(self, name: str, cache: CacheStats) -> None:
+        """Report a cache's hit and miss counters under cache=name."""
+        self.caches[name] = cache
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return this worker's metrics as JSON-serializable samples."""
+        counters = [[name, labels, value] for (name, labels), value in self.counters.items()]
+        for cache_name, cache in self.caches.items():
+            stats = cache.stats()
+            labels = (("cache", cache_name),)
+            counters.append(["cache_hits_total", labels, stats["hits"]])
+            counters.append(["cache_misses_total", labels, stats["misses"]])
+
+        gauges = []
+        if self.engine is not None:
+            pool = self.engine.sync_engine.pool
+            gauges.append(["db_pool_size", (), pool.size()])
+            gauges.append(["db_pool_checked_out", (), pool.checkedout()])
+            gauges.append(["db_pool_overflow", (), max(pool.overflow(), 0)])
+
+        return {
+            "time": time.time(),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": [
+                [name, labels, list(histogram.buckets), histogram.counts, histogram.sum]
+                for (name, labels), histogram in self.histograms.items()
+            ],
+        }
+
+
+registry = Registry()
+
+
+def time_statements(sync_engine: Engine, observers: Iterable[StatementObserver]) -> None:
+    """
+    Time every statement on sync_engine once and pass the duration to observers.
+
+    Start times are kept per cursor, and a statement that fails has its
+    start time dropped by the handle_error hook, since after_cursor_execute
+    never runs for it.
+    """
+    observers = list(observers)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(STATEMENT_START_KEY, {})[cursor] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info[STATEMENT_START_KEY].pop(cursor)
+        for observer in observers:
+            observer(conn, statement, parameters, elapsed, executemany)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context):
+        execution = context.execution_context
+        if context.connection is not None and execution is not None:
+            context.connection.info.get(STATEMENT_START_KEY, {}).pop(execution.cursor, None)
+
+
+def _record_statement(conn, statement, parameters, duration, executemany) -> None:
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_time += duration
+        stats.statements += 1
+
+
+def instrument_engine(engine: AsyncEngine, observers: Iterable[StatementObserver] = ()) -> None:
+    """
+    Time statements and pool checkouts of engine into the registry.
+
+    Each statement is timed once; observers (the slow query log) get the
+    same duration that is added to the current request's stats.
+    """
+    sync_engine = engine.sync_engine
+    registry.engine = engine
+    time_statements(sync_engine, [_record_statement, *observers])
+
+    # The pool has no "checkout started" event, so time its connect() call,
+    # which includes waiting for a free connection or opening a new one
+    pool = sync_engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            registry.observe(
+                "db_pool_checkout_wait_seconds", (), POOL_WAIT_BUCKETS, time.perf_counter() - start
+            )
+
+    pool.connect = timed_connect
+
+
+class MetricsMiddleware:
+    """Record latency, status and database use of every HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            current_request.reset(token)
+            # The route template, not the raw path, keeps label values bounded
+            labels = (("method", scope["method"]), ("route", stats.route))
+            registry.inc("http_requests_total", labels + (("status", str(status_code)),))
+            if status_code >= 500:
+                registry.inc("http_request_errors_total", labels)
+            registry.observe("http_request_duration_seconds", labels, LATENCY_BUCKETS, duration)
+            registry.observe("db_request_duration_seconds", labels, DB_TIME_BUCKETS, stats.db_time)
+            registry.observe(
+                "db_statements_per_request", labels, STATEMENT_BUCKETS, stats.statements
+            )
+
+
+def _write_snapshot(directory: str, data: bytes) -> None:
+    """Atomically replace this worker's snapshot file."""
+    path = Path(directory) / f"{os.getpid()}.json"
+    temporary = path.with_suffix(".tmp")
+    temporary.write_bytes(data)
+    temporary.replace(path)
+
+
+def _read_snapshots(directory: str) -> list[dict[str, Any]]:
+    snapshots = []
+    for path in Path(directory).glob("*.json"):
+        with contextlib.suppress(OSError, orjson.JSONDecodeError):
+            snapshots.append(orjson.loads(path.read_bytes()))
+    return snapshots
+
+
+def merge(snapshots: Iterable[dict[str, Any]], stale_after: float) -> dict[str, Any]:
+    """
+    Sum snapshots of several workers.
+
+    Gauges of snapshots older than stale_after seconds are dropped, since
+    they describe workers that are gone; their counters still count.
+    """
+    now = time.time()
+    counters: dict[tuple[str, Labels], float] = {}
+    gauges: dict[tuple[str, Labels], float] = {}
+    histograms: dict[tuple[str, Labels], Histogram] = {}
+
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        if now - snapshot["time"] <= stale_after:
+            for name, labels, value in snapshot["gauges"]:
+                key = (name, tuple(map(tuple, labels)))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, buckets, counts, total in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(tuple(buckets))
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.sum += total
+
+    return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render(merged: dict[str, Any]) -> str:
+    """Render merged metrics in the Prometheus text exposition format."""
+    series: dict[str, list[str]] = {name: [] for name in METRICS}
+
+    for (name, labels), value in sorted(merged["counters"].items()):
+        series[name].append(f"{name}{_format_labels(labels)} {float(value)!r}")
+    for (name, labels), value in sorted(merged["gauges"].items()):
+        series[name].append(f"{name}{_format_labels(labels)} {float(value)!r}")
+    for (name, labels), histogram in sorted(merged["histograms"].items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            series[name].append(
+                f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+            )
+        series[name].append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+        series[name].append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    lines = []
+    for name, samples in series.items():
+        metric_type, help_text = METRICS[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+async def collect() -> str:
+    """Render this worker's metrics, or every worker's with metrics_dir set."""
+    settings = get_settings()
+    if not settings.metrics_dir:
+        return render(merge([registry.snapshot()], stale_after=float("inf")))
+
+    # Snapshots are taken on the event loop, the only thread that updates
+    # the registry; only file I/O moves to a thread
+    data = orjson.dumps(registry.snapshot())
+    await asyncio.to_thread(_write_snapshot, settings.metrics_dir, data)
+    snapshots = await asyncio.to_thread(_read_snapshots, settings.metrics_dir)
+    return render(merge(snapshots, stale_after=3 * settings.metrics_flush_seconds))
+
+
+async def flush_periodically() -> None:
+    """Write this worker's snapshot every metrics_flush_seconds until cancelled."""
+    settings = get_settings()
+    os.makedirs(settings.metrics_dir, exist_ok=True)
+    try:
+        while True:
+            data = orjson.dumps(registry.snapshot())
+            await asyncio.to_thread(_write_snapshot, settings.metrics_dir, data)
+            await asyncio.sleep(settings.metrics_flush_seconds)
+    finally:
+        # Last counts of a worker that is shutting down
+        with contextlib.suppress(OSError):
+            _write_snapshot(settings.metrics_dir, orjson.dumps(registry.snapshot()))
@@ -0,0 +1,77 @@
+"""MinHash signatures and LSH banding for near-duplicate prompts.
+
+A prompt is reduced to the set of its word 3-shingles (title and content,
+case-folded). Each of NUM_PERM multiply-shift hash functions keeps the
+minimum over that set; the fraction of equal positions between two
+signatures estimates the Jaccard similarity of the shingle sets. Splitting
+a signature into BANDS bands of ROWS rows and bucketing on each band finds
+pairs above roughly (1 / BANDS) ** (1 / ROWS) ~ 0.7 similarity without
+comparing every pair.
+"""
+import re
+import zlib
+from collections.abc import Iterator
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIGNATURE_DTYPE = np.uint32
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+# Fixed seeds: signatures are stored, so every process must agree on them
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def _shingles(title: str, content: str) -> set[str]:
+    words = _WORD_RE.findall(f"{title} {content}".lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(title: str, content: str) -> np.ndarray:
+    """Return the MinHash signature of a prompt's title and content."""
+    shingles = _shingles(title, content)
+    if not shingles:
+        return np.full(NUM_PERM, np.iinfo(SIGNATURE_DTYPE).max, dtype=SIGNATURE_DTYPE)
+
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Multiply-shift hashing; uint64 arithmetic wraps mod 2**64 by design
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _A) + _B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(SIGNATURE_DTYPE)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def bands(sig: np.ndarray) -> Iterator[bytes]:
+    """Yield the LSH bucket key of each band of a signature."""
+    data = sig.tobytes()
+    width = ROWS * sig.itemsize
+    for band in range(BANDS):
+        yield data[band * width:(band + 1) * width]
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    """Serialize a signature for the prompt_signatures.signature column."""
+    return sig.astype(SIGNATURE_DTYPE).tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    """Deserialize a signature stored by to_bytes."""
+    return np.frombuffer(data, dtype=SIGNATURE_DTYPE)
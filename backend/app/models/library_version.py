@@ -0,0 +1,27 @@
+"""Per-user library version counter for SQLAlchemy."""
+from uuid import UUID
+
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class LibraryVersion(Base):
+    """Number of transactions that wrote a user's prompts.
+
+    Maintained by a deferred trigger, bumped once per transaction as it
+    commits (see migration 012). Users who never wrote have no row.
+    """
+
+    __tablename__ = "library_versions"
+
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    # Transaction that last bumped it
+    xid: Mapped[int] = mapped_column(BigInteger, nullable=False)
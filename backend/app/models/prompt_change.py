@@ -0,0 +1,53 @@
+"""Prompt change log models for SQLAlchemy."""
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class PromptChange(Base):
+    """Latest change to each prompt, kept as a tombstone after deletion.
+
+    Maintained by trigger; one row per prompt, moved forward on every write.
+    Tombstones are pruned once they are older than the retention period
+    (see migration 011).
+    """
+
+    __tablename__ = "prompt_changes"
+
+    prompt_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    deleted: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    # Writing transaction id and a sequence number ordering writes within it
+    xid: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+
+class PromptChangeHorizon(Base):
+    """Newest change log position of a user whose tombstone was pruned.
+
+    Sync tokens before it may have missed deletes. Maintained by trigger.
+    """
+
+    __tablename__ = "prompt_change_horizons"
+
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    xid: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
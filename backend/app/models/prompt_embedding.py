@@ -0,0 +1,26 @@
+"""Prompt embedding model for SQLAlchemy."""
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class PromptEmbedding(Base):
+    """Similarity embedding of a prompt (float32 vector, see app.embeddings)."""
+
+    __tablename__ = "prompt_embeddings"
+
+    prompt_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
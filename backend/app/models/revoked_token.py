@@ -0,0 +1,16 @@
+"""Revoked token model for SQLAlchemy."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class RevokedToken(Base):
+    """A logged-out JWT, by SHA-256 digest, kept until it would have expired."""
+
+    __tablename__ = "revoked_tokens"
+
+    digest: Mapped[bytes] = mapped_column(LargeBinary, primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,36 @@
+"""Per-user tag and category usage counters for SQLAlchemy."""
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.user import Base
+
+
+class UserTagCount(Base):
+    """Number of a user's prompts carrying a tag (maintained by trigger)."""
+
+    __tablename__ = "user_tag_counts"
+
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tag: Mapped[str] = mapped_column(Text, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class UserCategoryCount(Base):
+    """Number of a user's prompts in a category (maintained by trigger)."""
+
+    __tablename__ = "user_category_counts"
+
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    category: Mapped[str] = mapped_column(String(100), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,63 @@
+"""Opaque keyset cursors and sync tokens for list endpoints."""
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+# Sort orders a cursor can belong to
+ORDER_UPDATED = "updated"
+ORDER_RANK = "rank"
+
+
+def encode_cursor(order: str, key: datetime | float, row_id: UUID) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    value = key.isoformat() if isinstance(key, datetime) else key
+    payload = json.dumps({"o": order, "k": value, "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> tuple[datetime | float, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises 400 if the cursor is malformed or was issued for another sort order
+    (e.g. a search cursor replayed without `q`).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["o"] != order:
+            raise ValueError("cursor order mismatch")
+        if order == ORDER_UPDATED:
+            key: datetime | float = datetime.fromisoformat(payload["k"])
+        else:
+            key = float(payload["k"])
+        return key, UUID(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def encode_sync_token(xid: int, seq: int) -> str:
+    """Encode a position in the prompt change log."""
+    return f"{xid}.{seq}"
+
+
+def decode_sync_token(token: str) -> tuple[int, int]:
+    """
+    Decode a token produced by encode_sync_token.
+
+    Raises 400 if the token is malformed.
+    """
+    try:
+        xid, seq = token.split(".")
+        return int(xid), int(seq)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token",
+        )
@@ -0,0 +1,30 @@
+"""Per-worker cache of user profiles served by /auth/me."""
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.pubsub import listener, notify
+
+PROFILE_CHANNEL = "user_profile_invalidated"
+
+settings = get_settings()
+profile_cache: TTLCache[UUID, Any] = TTLCache(
+    settings.profile_cache_size, settings.profile_cache_ttl
+)
+
+
+async def publish_profile_change(db: AsyncSession, user_id: UUID) -> None:
+    """Tell every worker to drop the user's cached profile once db commits."""
+    await notify(db, PROFILE_CHANNEL, str(user_id))
+
+
+def _on_profile_change(payload: str) -> None:
+    profile_cache.invalidate(UUID(payload))
+
+
+listener.subscribe(PROFILE_CHANNEL, _on_profile_change)
+# Changes published while disconnected were missed
+listener.on_reconnect(profile_cache.clear)
@@ -0,0 +1,161 @@
+"""Opt-in sampling profiler for individual requests.
+
+A request is profiled when an admin sends the X-Profile header, or when it
+falls in Settings.profiler_sample_rate. The profiler (pyinstrument, in
+async mode so awaited time is attributed to the awaiting code) samples the
+request's task only; finished profiles are kept per worker in a bounded
+buffer and served from /admin/profiles as speedscope JSON (a flame graph
+viewer format) or pyinstrument's HTML. Requests that are not profiled pay
+one header lookup and one random draw.
+"""
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import NamedTuple
+from uuid import uuid4
+
+from fastapi import HTTPException
+from pyinstrument import Profiler
+from pyinstrument.session import Session
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+from app.db import async_session_factory
+from app.dependencies import (
+    decode_token,
+    get_admin_user,
+    get_current_user,
+    get_current_user_id,
+    payload_user_id,
+)
+from app.profile_cache import profile_cache
+from app.token_cache import token_cache
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class StoredProfile(NamedTuple):
+    """A finished profile and the request it belongs to."""
+
+    id: str
+    at: datetime
+    method: str
+    path: str
+    route: str | None
+    status: int
+    duration_ms: float
+    # "header" (asked for by an admin) or "sample"
+    trigger: str
+    session: Session
+
+
+class ProfileStore:
+    """Bounded buffer of recent profiles, newest last."""
+
+    def __init__(self, size: int) -> None:
+        self.profiles: deque[StoredProfile] = deque(maxlen=size)
+
+    def add(self, profile: StoredProfile) -> None:
+        self.profiles.append(profile)
+
+    def get(self, profile_id: str) -> StoredProfile | None:
+        return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+    def recent(self, limit: int) -> list[StoredProfile]:
+        """Return up to limit profiles, newest first."""
+        return list(reversed(self.profiles))[:limit]
+
+
+profile_store = ProfileStore(get_settings().profiler_max_profiles)
+
+
+async def _is_admin(scope: Scope) -> bool:
+    """
+    Resolve the request's user through the regular auth dependencies.
+
+    The token is checked first, then the admin list against the user's
+    cached profile if there is one, so most non-admins are turned away
+    without a query.
+    """
+    settings = get_settings()
+    access_token = Request(scope).cookies.get("access_token")
+    if not access_token or not settings.admin_emails_list:
+        return False
+    try:
+        user_id = token_cache.lookup(access_token) or payload_user_id(
+            decode_token(access_token, settings)
+        )
+        profile = profile_cache.peek(user_id)
+        if profile is not None and profile.email.lower() not in settings.admin_emails_list:
+            return False
+        async with async_session_factory() as db:
+            user_id = await get_current_user_id(access_token, settings, db)
+            user = await get_current_user(user_id, db)
+        await get_admin_user(user, settings)
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilerMiddleware:
+    """Profile requests that ask for it (admins only) or are sampled."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        requested = PROFILE_HEADER in Headers(scope=scope)
+        sampled = random.random() < settings.profiler_sample_rate
+        if not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        if requested and not await _is_admin(scope):
+            requested = False
+            if not sampled:
+                await self.app(scope, receive, send)
+                return
+
+        profile_id = uuid4().hex
+        status_code = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Only the admin who asked learns where the profile is
+                if requested:
+                    headers = [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = Profiler(interval=settings.profiler_interval, async_mode="enabled")
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session: Session = profiler.stop()
+            route = scope.get("route")
+            profile_store.add(
+                StoredProfile(
+                    id=profile_id,
+                    at=datetime.now(timezone.utc),
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=getattr(route, "path", None),
+                    status=status_code,
+                    duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                    trigger="header" if requested else "sample",
+                    session=session,
+                )
+            )
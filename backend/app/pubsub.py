@@ -0,0 +1,96 @@
+"""Cross-worker notifications over PostgreSQL LISTEN/NOTIFY."""
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+
+class PgListener:
+    """
+    One dedicated LISTEN connection per worker, fanned out to handlers.
+
+    The connection is re-established with backoff if it drops. Reconnect
+    handlers run every time it (re)connects, because notifications sent
+    while disconnected are lost and caches must assume they missed some.
+    """
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self._handlers: dict[str, list[Handler]] = {}
+        self._reconnect_handlers: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call handler(payload) for every notification on channel."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]) -> None:
+        """Call handler() whenever the listen connection is (re)established."""
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        """Start listening in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.get_running_loop().create_future()
+                connection.add_termination_listener(
+                    lambda _: closed.done() or closed.set_result(None)
+                )
+                for channel in self._handlers:
+                    await connection.add_listener(channel, self._dispatch)
+                for handler in self._reconnect_handlers:
+                    handler()
+                delay = 1.0
+                await closed
+                logger.warning("LISTEN connection lost, reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.warning("LISTEN connection failed, retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+
+async def notify(db: AsyncSession, channel: str, payload: str) -> None:
+    """Queue a notification; PostgreSQL delivers it when db commits."""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload},
+    )
+
+
+listener = PgListener(get_settings().database_url.replace("postgresql+asyncpg://", "postgresql://"))
@@ -0,0 +1,28 @@
+"""Response classes shared by the API routers."""
+from typing import Any
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _encode_default(value: Any) -> Any:
+    # asyncpg returns its own uuid.UUID subclass, which orjson only
+    # encodes natively as the exact type
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Endpoints return this directly with plain dicts/lists to skip Pydantic
+    model construction and FastAPI's response_model re-validation. UUIDs and
+    datetimes are encoded natively; UTC offsets render as `Z`, matching
+    Pydantic's output.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_UTC_Z)
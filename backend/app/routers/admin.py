@@ -0,0 +1,110 @@
+"""Admin-only diagnostics endpoints.
+
+Slow statements and profiles are kept per worker, so each call reports
+the worker that served it.
+"""
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+from app.config import Settings, get_settings
+from app.db import slow_query_log
+from app.dependencies import get_admin_user
+from app.profiling import profile_store
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+
+class SlowQuery(BaseModel):
+    """A statement that exceeded the slow-query threshold."""
+
+    at: datetime
+    duration_ms: float
+    route: str
+    sql: str
+    parameters: list[str]
+    plan: list[str] | None
+
+
+class SlowQueriesResponse(BaseModel):
+    """Slow statements recorded by the worker that served the request."""
+
+    enabled: bool
+    threshold_ms: float | None
+    queries: list[SlowQuery]
+
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+async def list_slow_queries(
+    limit: int = Query(default=50, ge=1, le=1000),
+    settings: Settings = Depends(get_settings),
+) -> SlowQueriesResponse:
+    """List recent slow statements, newest first.
+
+    `plan` is set for the sampled fraction that was re-run under
+    EXPLAIN (ANALYZE, BUFFERS).
+    """
+    if slow_query_log is None:
+        return SlowQueriesResponse(enabled=False, threshold_ms=None, queries=[])
+
+    return SlowQueriesResponse(
+        enabled=True,
+        threshold_ms=settings.slow_query_threshold_ms,
+        queries=[SlowQuery(**entry) for entry in slow_query_log.recent(limit)],
+    )
+
+
+class ProfileSummary(BaseModel):
+    """A stored request profile, without the profile data."""
+
+    id: str
+    at: datetime
+    method: str
+    path: str
+    route: str | None
+    status: int
+    duration_ms: float
+    trigger: str
+
+
+@router.get("/profiles", response_model=list[ProfileSummary])
+async def list_profiles(
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> list[ProfileSummary]:
+    """List recent request profiles, newest first.
+
+    Send any `X-Profile` header with a request to have it profiled; the
+    response's `X-Profile-Id` names the stored profile.
+    """
+    return [ProfileSummary(**profile._asdict()) for profile in profile_store.recent(limit)]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    profile_format: Literal["speedscope", "html"] = Query(default="speedscope", alias="format"),
+) -> Response:
+    """Download a request profile.
+
+    `speedscope` JSON opens as a flame graph at https://www.speedscope.app;
+    `html` is pyinstrument's interactive call tree.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+
+    if profile_format == "html":
+        return Response(HTMLRenderer().render(profile.session), media_type="text/html")
+    return Response(
+        SpeedscopeRenderer().render(profile.session),
+        media_type="application/json",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'
+        },
+    )
@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import Settings, get_settings
 from app.db import get_db
 from app.models.user import User
+from app.profile_cache import profile_cache, publish_profile_change
 
 router = APIRouter(prefix="/auth/google", tags=["auth"])
 
@@ -154,6 +155,8 @@ async def google_callback(
         user.email = email
         user.name = name
         user.picture_url = picture_url
+        # Delivered to every worker on commit
+        await publish_profile_change(db, user.id)
     else:
         # Create new user
         user = User(
@@ -166,6 +169,7 @@ async def google_callback(
 
     await db.commit()
     await db.refresh(user)
+    profile_cache.invalidate(user.id)
 
     # Generate JWT token
     token = create_jwt_token(user.id, settings)
@@ -1,11 +1,16 @@
 """General authentication endpoints."""
 from datetime import datetime
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.config import Settings, get_settings
+from app.db import get_db
+from app.dependencies import decode_token, get_current_user, get_current_user_id
+from app.profile_cache import profile_cache
+from app.token_cache import publish_revocation, token_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -24,21 +29,49 @@ class UserProfile(BaseModel):
 
 @router.get("/me", response_model=UserProfile)
 async def get_me(
-    current_user: User = Depends(get_current_user),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ) -> UserProfile:
-    """Get the current authenticated user's profile."""
-    return UserProfile(
-        id=str(current_user.id),
-        email=current_user.email,
-        name=current_user.name,
-        picture_url=current_user.picture_url,
-        created_at=current_user.created_at,
-    )
+    """Get the current authenticated user's profile.
+
+    Profiles are cached per worker for a short TTL and dropped on every
+    worker when the user record changes.
+    """
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        current_user = await get_current_user(user_id, db)
+        profile = UserProfile(
+            id=str(current_user.id),
+            email=current_user.email,
+            name=current_user.name,
+            picture_url=current_user.picture_url,
+            created_at=current_user.created_at,
+        )
+        profile_cache.set(user_id, profile)
+    return profile
 
 
 @router.post("/logout")
-async def logout() -> Response:
-    """Clear the authentication cookie."""
+async def logout(
+    access_token: str | None = Cookie(default=None),
+    db: AsyncSession = Depends(get_db),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    """Revoke the current token in every worker and clear the authentication cookie."""
+    if access_token:
+        try:
+            payload = decode_token(access_token, settings)
+        except HTTPException:
+            # Already invalid or expired - nothing to revoke
+            payload = None
+        if payload is not None:
+            exp = payload["exp"]
+            token_cache.revoke(access_token, exp)
+            # Stored for workers started later, and delivered to every
+            # running worker on commit
+            await publish_revocation(db, access_token, exp)
+            await db.commit()
+
     response = Response(status_code=status.HTTP_200_OK)
     response.delete_cookie(key="access_token", path="/")
     return response
@@ -1,10 +1,17 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import desc, func, select
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_current_user_id, get_db_with_rls
-from app.models.prompt import Prompt
+from app.autocomplete import autocomplete, prefix_pattern
+from app.dependencies import (
+    etag_headers,
+    get_current_user_id,
+    get_db_with_rls,
+    get_library_etag,
+    get_library_version,
+)
+from app.models.tag_counts import UserCategoryCount
 from app.schemas.prompt import CategoriesResponse
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -12,33 +19,36 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("", response_model=CategoriesResponse)
 async def list_categories(
+    response: Response,
     q: str | None = Query(default=None, description="Prefix filter for categories"),
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
+    version: int = Depends(get_library_version),
+    etag: str = Depends(get_library_etag),
 ) -> CategoriesResponse:
     """Get user's unique categories sorted by usage frequency.
 
     - Returns categories from user's prompts
     - Optional prefix filter via `q` parameter
     - Sorted by usage frequency (most used first)
+    - Identical concurrent requests share one query
     - Limited to 50 categories
     """
-    # Count prompts per category - explicitly scoped to user
-    count_col = func.count().label("cnt")
-    query = (
-        select(Prompt.category, count_col)
-        .where(Prompt.category.isnot(None), Prompt.user_id == user_id)
-        .group_by(Prompt.category)
-    )
+    async def fetch(db: AsyncSession) -> list[str]:
+        # Read the trigger-maintained per-user counters - explicitly scoped to user
+        query = select(UserCategoryCount.category).where(UserCategoryCount.user_id == user_id)
 
-    # Apply prefix filter if provided
-    if q:
-        query = query.where(Prompt.category.ilike(f"{q}%"))
+        # Apply case-insensitive prefix filter (served by the lower(category) index)
+        if q:
+            query = query.where(func.lower(UserCategoryCount.category).like(prefix_pattern(q.lower())))
 
-    # Order by frequency (most used first) and limit to 50
-    query = query.order_by(desc(count_col)).limit(50)
+        # Order by frequency (most used first) and limit to 50
+        query = query.order_by(UserCategoryCount.count.desc(), UserCategoryCount.category).limit(50)
 
-    result = await db.execute(query)
-    rows = result.all()
+        result = await db.execute(query)
+        return list(result.scalars())
 
-    return CategoriesResponse(categories=[row.category for row in rows])
+    names = await autocomplete("categories", user_id, version, q, 50, db, fetch)
+    response.headers.update(etag_headers(etag))
+
+    return CategoriesResponse(categories=names)
@@ -1,111 +1,816 @@
 """Prompts CRUD API endpoints."""
-from uuid import UUID
+import asyncio
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import (
+    CTE,
+    REAL,
+    ColumnElement,
+    Select,
+    cast,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.functions import Function
 
-from app.dependencies import get_current_user_id, get_db_with_rls
+from app.bulk import iter_json_records
+from app.cache import ResponseCache
+from app.config import Settings, get_settings
+from app.db import rls_session, snapshot_xmin
+from app.dedup import UserSignatures, signature_indexes
+from app.dependencies import (
+    etag_headers,
+    get_current_user_id,
+    get_db_with_rls,
+    get_library_etag,
+    get_library_version,
+)
+from app.embeddings import embed_query
+from app.events import CLOSED, feed, prompt_event_notification, publish_prompt_event
 from app.models.prompt import Prompt
+from app.models.prompt_change import PromptChange, PromptChangeHorizon
+from app.pagination import (
+    ORDER_RANK,
+    ORDER_UPDATED,
+    decode_cursor,
+    decode_sync_token,
+    encode_cursor,
+    encode_sync_token,
+)
+from app.responses import FastJSONResponse
 from app.schemas.prompt import (
+    BulkImportDuplicate,
+    BulkImportError,
+    BulkImportResponse,
+    DuplicateClustersResponse,
+    DuplicateMatch,
+    PromptChangesResponse,
     PromptCreate,
+    PromptCreateResponse,
+    PromptPatch,
     PromptResponse,
     PromptsListResponse,
     PromptUpdate,
+    SimilarPromptsResponse,
+    TotalKind,
 )
+from app.search import SearchPlan, ranked_plan, search_backend
+from app.vector_index import vector_indexes
 
 router = APIRouter(prefix="/prompts", tags=["prompts"])
 
+# Encoded GET /prompts bodies keyed by (user, library_version, filters, page)
+list_cache = ResponseCache(
+    get_settings().list_cache_max_entries,
+    get_settings().list_cache_max_bytes,
+)
+
+# Columns returned to clients; write paths fetch them with RETURNING so the
+# trigger-maintained updated_at comes back without a second query
+RESPONSE_COLUMNS = (
+    Prompt.id,
+    Prompt.user_id,
+    Prompt.title,
+    Prompt.content,
+    Prompt.category,
+    Prompt.tags,
+    Prompt.created_at,
+    Prompt.updated_at,
+)
+RESPONSE_FIELDS = tuple(column.key for column in RESPONSE_COLUMNS)
+
+# Fields that feed a prompt's similarity embedding and MinHash signature
+EMBEDDED_FIELDS = {"title", "content", "tags"}
+SIGNED_FIELDS = {"title", "content"}
 
-@router.post("", response_model=PromptResponse, status_code=status.HTTP_201_CREATED)
+SNIPPET_HEADLINE_OPTIONS = (
+    'StartSel="**", StopSel="**", MaxWords=35, MinWords=15, '
+    'MaxFragments=2, FragmentDelimiter=" ... "'
+)
+
+# Columns of each bulk-imported row. asyncpg binds at most 32767 parameters
+# per statement and a batch INSERT binds one per column of every row, so
+# larger batches would always fail and fall back to row-by-row inserts.
+BULK_IMPORT_COLUMNS = ("id", "user_id", "title", "content", "category", "tags")
+BULK_IMPORT_MAX_BATCH_SIZE = 32767 // len(BULK_IMPORT_COLUMNS)
+
+EXPORT_CSV_HEADER = ("id", "title", "content", "category", "tags", "created_at", "updated_at")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.post("", response_model=PromptCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_prompt(
     prompt_data: PromptCreate,
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
-) -> PromptResponse:
-    """Create a new prompt."""
-    prompt = Prompt(
-        user_id=user_id,
-        title=prompt_data.title,
-        content=prompt_data.content,
-        category=prompt_data.category,
-        tags=prompt_data.tags or [],
-    )
-    db.add(prompt)
+) -> PromptCreateResponse:
+    """Create a new prompt.
+
+    `likely_duplicates` lists existing prompts whose text is nearly the
+    same, most similar first. Writes never wait for the duplicate index:
+    if it is not in memory yet it starts loading in the background and the
+    list stays empty until it is there.
+    """
+    duplicates_index = _loaded_duplicates_index(user_id)
+    # Generated here so the whole write is one statement
+    prompt_id = uuid4()
+    tags = prompt_data.tags or []
+    embedding = vector_indexes.compute(prompt_data.title, prompt_data.content, tags)
+    signature = signature_indexes.compute(prompt_data.title, prompt_data.content, tags)
+    written = (
+        insert(Prompt)
+        .values(
+            id=prompt_id,
+            user_id=user_id,
+            title=prompt_data.title,
+            content=prompt_data.content,
+            category=prompt_data.category,
+            tags=tags,
+        )
+        .returning(*RESPONSE_COLUMNS)
+        .cte("written")
+    )
+    result = await db.execute(
+        _with_side_effects(
+            written,
+            [
+                vector_indexes.upsert_written(written, embedding),
+                signature_indexes.upsert_written(written, signature),
+            ],
+            prompt_event_notification(user_id, "created", id=str(prompt_id)),
+        )
+    )
+    prompt = result.one()
     await db.commit()
-    await db.refresh(prompt)
-    return PromptResponse.model_validate(prompt)
+
+    likely_duplicates = (
+        [] if duplicates_index is None
+        else _record_duplicates(duplicates_index, prompt.id, signature)
+    )
+    return PromptCreateResponse.model_validate(
+        {**prompt._mapping, "likely_duplicates": likely_duplicates}
+    )
+
+
+def _with_side_effects(written: CTE, upserts: list[Insert], notification: Function) -> Select:
+    """
+    Select what `written` returns, with everything else a write does.
+
+    `written` is the INSERT, UPDATE or DELETE as a CTE. The index upserts run
+    beside it as data-modifying CTEs, and the change event is queued once per
+    row written, so the write, its stored index values and its event take one
+    round trip, and nothing is published when no row was written.
+    """
+    notified = select(notification.label("notified")).select_from(written).cte("notified")
+    statement = select(*written.c).select_from(written).join(notified, true())
+    return statement.add_cte(
+        *(upsert.cte(f"upsert_{i}") for i, upsert in enumerate(upserts))
+    )
+
+
+def _loaded_duplicates_index(user_id: UUID) -> UserSignatures | None:
+    """Return the user's duplicate index if loaded; otherwise start loading it."""
+    duplicates_index = signature_indexes.loaded(user_id)
+    if duplicates_index is None:
+        signature_indexes.load_in_background(user_id)
+    return duplicates_index
+
+
+def _record_duplicates(
+    duplicates_index: UserSignatures, prompt_id: UUID, signature: np.ndarray
+) -> list[DuplicateMatch]:
+    """Look up a committed prompt's likely duplicates, then add it to the index."""
+    matches = duplicates_index.query(signature, exclude=prompt_id)
+    duplicates_index.upsert(prompt_id, signature)
+    return [DuplicateMatch(id=match_id, similarity=score) for match_id, score in matches]
+
+
+async def _insert_prompt_batch(
+    db: AsyncSession,
+    user_id: UUID,
+    rows: list[tuple[int, dict[str, Any]]],
+    errors: list[BulkImportError],
+) -> list[tuple[int, UUID, np.ndarray]]:
+    """
+    Insert a batch of validated prompts with one multi-row INSERT.
+
+    If the batch fails, the rows are retried one savepoint at a time so only
+    the offending records are reported. Returns (index, id, signature) of
+    each row created.
+    """
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(Prompt).values([values for _, values in rows]))
+        inserted = rows
+    except DBAPIError:
+        inserted = []
+        for index, values in rows:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(Prompt).values(values))
+                inserted.append((index, values))
+            except DBAPIError as exc:
+                errors.append(BulkImportError(index=index, detail=str(exc.orig)))
+
+    # Signatures are stored with the rows; embeddings are left to the lazy
+    # backfill so large imports stay cheap
+    signatures = await signature_indexes.store(
+        db,
+        user_id,
+        ((values["id"], values["title"], values["content"], values["tags"]) for _, values in inserted),
+    )
+    if inserted:
+        await publish_prompt_event(db, user_id, "imported", count=len(inserted))
+    await db.commit()
+    return [
+        (index, prompt_id, signature)
+        for (index, _), (prompt_id, signature) in zip(inserted, signatures)
+    ]
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_prompts(
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+    settings: Settings = Depends(get_settings),
+) -> BulkImportResponse:
+    """Import many prompts from a streamed NDJSON or JSON-array body.
+
+    - Each record is validated like `POST /prompts`
+    - Valid records are inserted in batches, each committed on its own
+    - Invalid records are reported by their zero-based index and skipped
+    - Records that nearly duplicate an existing prompt, or an earlier
+      record of the same import, are listed in `duplicates`; existing
+      prompts are only checked if the duplicate index is already in memory
+    """
+    created = 0
+    batch_size = min(settings.bulk_import_batch_size, BULK_IMPORT_MAX_BATCH_SIZE)
+    errors: list[BulkImportError] = []
+    duplicates: list[BulkImportDuplicate] = []
+    batch: list[tuple[int, dict[str, Any]]] = []
+    duplicates_index = _loaded_duplicates_index(user_id)
+    if duplicates_index is None:
+        # Records are still checked against each other
+        duplicates_index = signature_indexes.new_index()
+
+    async def flush() -> int:
+        inserted = await _insert_prompt_batch(db, user_id, batch, errors)
+        for index, prompt_id, signature in inserted:
+            matches = _record_duplicates(duplicates_index, prompt_id, signature)
+            if matches:
+                duplicates.append(
+                    BulkImportDuplicate(index=index, id=prompt_id, likely_duplicates=matches)
+                )
+        return len(inserted)
+
+    records = iter_json_records(request.stream(), settings.bulk_import_max_record_chars)
+    async for index, record, error in records:
+        if error:
+            errors.append(BulkImportError(index=index, detail=error))
+            continue
+
+        try:
+            prompt_data = PromptCreate.model_validate(record)
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'record'}: {err['msg']}"
+                for err in exc.errors()
+            )
+            errors.append(BulkImportError(index=index, detail=detail))
+            continue
+
+        batch.append(
+            (
+                index,
+                {
+                    # Generated here so signatures can be stored with the batch
+                    "id": uuid4(),
+                    "user_id": user_id,
+                    "title": prompt_data.title,
+                    "content": prompt_data.content,
+                    "category": prompt_data.category,
+                    "tags": prompt_data.tags or [],
+                },
+            )
+        )
+        if len(batch) >= batch_size:
+            created += await flush()
+            batch = []
+
+    if batch:
+        created += await flush()
+
+    return BulkImportResponse(created=created, errors=errors, duplicates=duplicates)
+
+
+def _prompt_filters(
+    user_id: UUID,
+    q: str | None,
+    category: str | None,
+    tags: str | None,
+) -> list[ColumnElement[bool]]:
+    """Build the WHERE clauses shared by the list and export endpoints."""
+    # Explicitly scoped to user
+    filters: list[ColumnElement[bool]] = [Prompt.user_id == user_id]
+
+    # Apply full-text search filter
+    if q:
+        # Convert search query to tsquery and filter by search_vector
+        filters.append(
+            Prompt.search_vector.op("@@")(func.plainto_tsquery("english", q))
+        )
+
+    # Apply category filter (exact match)
+    if category:
+        filters.append(Prompt.category == category)
+
+    # Apply tags filter (AND logic - all provided tags must be present)
+    if tags:
+        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        if tag_list:
+            # Use @> operator for array containment (all tags must be present)
+            filters.append(Prompt.tags.op("@>")(tag_list))
+
+    return filters
+
+
+def _list_columns(fields: str | None, q: str | None, snippet_chars: int) -> list:
+    """
+    Resolve the `fields` parameter of the list endpoint to select columns.
+
+    Raises 400 for unknown field names.
+    """
+    if not fields:
+        return list(RESPONSE_COLUMNS)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(RESPONSE_FIELDS) - {"snippet"}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+
+    # id is always returned so clients can address the prompt
+    columns = [
+        column for column in RESPONSE_COLUMNS if column.key in requested or column.key == "id"
+    ]
+
+    if "snippet" in requested:
+        if q:
+            # Excerpt around the matched terms, highlighted as Markdown bold
+            snippet = func.ts_headline(
+                "english",
+                Prompt.content,
+                func.plainto_tsquery("english", q),
+                SNIPPET_HEADLINE_OPTIONS,
+            )
+        else:
+            snippet = func.left(Prompt.content, snippet_chars)
+        columns.append(snippet.label("snippet"))
+
+    return columns
 
 
 @router.get("", response_model=PromptsListResponse)
 async def list_prompts(
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(
+        default=None, description="Opaque cursor from a previous next_cursor"
+    ),
     q: str | None = Query(default=None, description="Full-text search query"),
     category: str | None = Query(default=None, description="Exact category filter"),
     tags: str | None = Query(
         default=None, description="Comma-separated tags filter (AND logic)"
     ),
+    total_mode: TotalKind = Query(
+        default="exact",
+        alias="total",
+        description="How to compute total: exact, estimate (capped count) or none",
+    ),
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated fields to return; `snippet` adds a content preview",
+    ),
+    semantic: str | None = Query(
+        default=None, description="Rank by similarity to this text instead of filtering"
+    ),
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
-) -> PromptsListResponse:
+    settings: Settings = Depends(get_settings),
+    version: int = Depends(get_library_version),
+    etag: str = Depends(get_library_etag),
+) -> Response:
     """List user's prompts with pagination, search, and filtering.
 
-    - Search is weighted: title (A) > tags (B) > content (C)
+    - Search is weighted: title (A) > tags (B) > content (C); it runs on
+      the backend chosen by `search_backend` (Postgres full-text search, or
+      in-memory BM25 with prefix matching on the last word, which returns
+      the best `search_candidates` matches and pages by offset only)
     - Filters combine with AND logic
     - Results sorted by relevance when searching, by updated_at otherwise
+    - Pass `next_cursor` back as `cursor` for keyset pagination; `offset`
+      keeps working but cannot be combined with `cursor`
+    - `total=exact` counts in the page query itself, `total=estimate` stops
+      counting at a cap, `total=none` skips counting; `total_kind` tells
+      which one was returned
+    - `fields` limits each prompt to the listed fields (`id` is always
+      included); `snippet` is a truncated preview of content, or a
+      `ts_headline` excerpt around the matches when searching
+    - `semantic` orders prompts by embedding similarity to the given text
+      (the closest `semantic_candidates` only, paged by offset); category
+      and tags still filter, `q` cannot be combined with it
+    - Responses are cached per user until the library changes
     """
-    # Build base query with filters - explicitly scoped to user
-    base_query = select(Prompt).where(Prompt.user_id == user_id)
-    count_query = select(func.count()).select_from(Prompt).where(Prompt.user_id == user_id)
+    if cursor and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor and offset cannot be combined",
+        )
+    if semantic and q:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="semantic cannot be combined with q",
+        )
 
-    # Apply full-text search filter
-    if q:
-        # Convert search query to tsquery and filter by search_vector
-        search_filter = Prompt.search_vector.op("@@")(
-            func.plainto_tsquery("english", q)
+    # Equivalent filter spellings share an entry; a write bumps the version
+    # so older entries are never hit again
+    cache_key = (
+        user_id,
+        version,
+        " ".join(q.lower().split()) if q else None,
+        category,
+        tuple(sorted({tag.strip() for tag in tags.split(",") if tag.strip()})) if tags else (),
+        tuple(sorted({field.strip() for field in fields.split(",") if field.strip()})) if fields else (),
+        total_mode,
+        limit,
+        offset,
+        cursor,
+        " ".join(semantic.lower().split()) if semantic else None,
+    )
+    body = list_cache.get(cache_key)
+    if body is not None:
+        return Response(body, media_type="application/json", headers=etag_headers(etag))
+
+    # Search and similarity each restrict and order the rows through a plan
+    plan: SearchPlan | None = None
+    if semantic:
+        index = await vector_indexes.get(db, user_id, version)
+        matches = index.search(embed_query(semantic), settings.semantic_candidates)
+        plan = ranked_plan([prompt_id for prompt_id, _ in matches])
+    elif q:
+        plan = await search_backend.plan(db, user_id, version, q)
+    if cursor and plan and not plan.keyset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor is not supported for this search; use offset",
         )
-        base_query = base_query.where(search_filter)
-        count_query = count_query.where(search_filter)
 
-    # Apply category filter (exact match)
-    if category:
-        base_query = base_query.where(Prompt.category == category)
-        count_query = count_query.where(Prompt.category == category)
+    # Build base query with filters - explicitly scoped to user
+    filters = _prompt_filters(user_id, None, category, tags)
+    if plan:
+        filters.append(plan.filter)
+    columns = _list_columns(fields, q, settings.prompts_snippet_chars)
+    field_names = [column.key for column in columns]
+    base_query = select(*columns).where(*filters)
+    count_query = select(func.count()).select_from(Prompt).where(*filters)
 
-    # Apply tags filter (AND logic - all provided tags must be present)
-    if tags:
-        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
-        if tag_list:
-            # Use @> operator for array containment (all tags must be present)
-            base_query = base_query.where(Prompt.tags.op("@>")(tag_list))
-            count_query = count_query.where(Prompt.tags.op("@>")(tag_list))
+    # Apply ordering: by the plan's rank when searching, by updated_at
+    # otherwise. id breaks ties so the order is total and usable as a keyset.
+    if plan:
+        order = ORDER_RANK
+        sort_key = plan.sort_key
+    else:
+        order = ORDER_UPDATED
+        sort_key = Prompt.updated_at
+    query = base_query.add_columns(sort_key.label("sort_key")).order_by(
+        sort_key.desc(), Prompt.id.desc()
+    )
 
-    # Get total count with filters applied
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    # Continue after the cursor row, or fall back to offset pagination
+    if cursor:
+        cursor_key, cursor_id = decode_cursor(cursor, order)
+        if order == ORDER_RANK:
+            cursor_key = cast(cursor_key, REAL)
+        query = query.where(tuple_(sort_key, Prompt.id) < tuple_(cursor_key, cursor_id))
+    else:
+        query = query.offset(offset)
 
-    # Apply ordering: by relevance when searching, by updated_at otherwise
-    if q:
-        # Order by text search rank (relevance) descending
-        rank_expression = func.ts_rank(
-            Prompt.search_vector, func.plainto_tsquery("english", q)
+    # Fold the exact count into the page query as a window aggregate.
+    # Cursor pages filter rows away before the window runs, so they can't.
+    fold_count = total_mode == "exact" and not cursor
+    if fold_count:
+        query = query.add_columns(func.count().over().label("full_count"))
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    total: int | None = None
+    total_kind: TotalKind = total_mode
+    if fold_count and (rows or not offset):
+        total = rows[0].full_count if rows else 0
+    elif total_mode == "exact":
+        # Cursor page, or an offset past the last row
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
+    elif total_mode == "estimate":
+        # Count at most cap + 1 matching rows; report the cap beyond that
+        cap = settings.prompts_count_estimate_cap
+        capped = base_query.with_only_columns(Prompt.id).limit(cap + 1).subquery()
+        total_result = await db.execute(select(func.count()).select_from(capped))
+        total = total_result.scalar() or 0
+        if total <= cap:
+            total_kind = "exact"
+        else:
+            total = cap
+
+    next_cursor = None
+    if has_more and (plan is None or plan.keyset):
+        last = rows[-1]
+        next_cursor = encode_cursor(order, last.sort_key, last.id)
+
+    # Rows are already typed by the database - serialize them directly
+    # instead of validating through PromptsListResponse
+    response = FastJSONResponse(
+        {
+            "prompts": [dict(zip(field_names, row)) for row in rows],
+            "total": total,
+            "total_kind": total_kind,
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": next_cursor,
+        },
+        headers=etag_headers(etag),
+    )
+    list_cache.set(cache_key, response.body)
+    return response
+
+
+@router.get("/changes", response_model=PromptChangesResponse)
+async def list_prompt_changes(
+    since: str | None = Query(
+        default=None, description="Sync token from a previous call's next_token"
+    ),
+    limit: int = Query(default=500, ge=1, le=1000),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+) -> FastJSONResponse:
+    """List prompts created, updated or deleted after a sync token.
+
+    - Without `since`, returns no changes and a token for the current state;
+      take it before loading the full list, then poll with it
+    - Each prompt appears once, in its latest state, or in `deleted`
+    - Only changes of committed transactions are returned, so a token never
+      skips a write that commits later
+    - Tombstones are kept for 30 days; a token from before pruned ones gets
+      410 Gone, and the client reloads the full list and takes a new token
+    """
+    # Every transaction older than the snapshot's xmin has finished
+    xmin = await snapshot_xmin(db)
+
+    if since is None:
+        return FastJSONResponse(
+            {
+                "changed": [],
+                "deleted": [],
+                "next_token": encode_sync_token(xmin, 0),
+                "has_more": False,
+            }
         )
-        query = base_query.order_by(rank_expression.desc())
-    else:
-        query = base_query.order_by(Prompt.updated_at.desc())
 
-    # Apply pagination
-    query = query.limit(limit).offset(offset)
+    since_xid, since_seq = decode_sync_token(since)
+    horizon = (
+        await db.execute(
+            select(PromptChangeHorizon.xid, PromptChangeHorizon.seq).where(
+                PromptChangeHorizon.user_id == user_id
+            )
+        )
+    ).one_or_none()
+    if horizon is not None and (since_xid, since_seq) < tuple(horizon):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token has expired",
+        )
+
+    result = await db.execute(
+        select(PromptChange.xid, PromptChange.seq, PromptChange.prompt_id, *RESPONSE_COLUMNS)
+        .outerjoin(Prompt, Prompt.id == PromptChange.prompt_id)
+        .where(
+            PromptChange.user_id == user_id,
+            tuple_(PromptChange.xid, PromptChange.seq) > tuple_(since_xid, since_seq),
+            PromptChange.xid < xmin,
+        )
+        .order_by(PromptChange.xid, PromptChange.seq)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = []
+    deleted = []
+    for row in rows:
+        if row.id is None:
+            deleted.append(row.prompt_id)
+        else:
+            changed.append(dict(zip(RESPONSE_FIELDS, row[3:])))
+
+    # A full window means everything before xmin has been delivered
+    next_token = (
+        encode_sync_token(rows[-1].xid, rows[-1].seq)
+        if has_more
+        else encode_sync_token(max(xmin, since_xid), 0 if xmin > since_xid else since_seq)
+    )
+
+    return FastJSONResponse(
+        {
+            "changed": changed,
+            "deleted": deleted,
+            "next_token": next_token,
+            "has_more": has_more,
+        }
+    )
+
+
+@router.get("/stream")
+async def stream_prompt_events(
+    user_id: UUID = Depends(get_current_user_id),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    """Stream the user's prompt change events as Server-Sent Events.
+
+    - Events: `created`, `updated`, `deleted` (with `id`), `imported`
+      (with `count`) and `resync` when events may have been missed
+    - A comment line is sent as heartbeat while idle
+    - Holds no database connection; events come from the worker's shared
+      LISTEN connection
+    - Ends when the worker shuts down; clients reconnect after `retry`
+    """
+
+    async def generate() -> AsyncIterator[str]:
+        queue = feed.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.stream_heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is CLOSED:
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            feed.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_prompts(
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    gzip: bool = Query(default=False, description="Compress the export with gzip"),
+    q: str | None = Query(default=None, description="Full-text search query"),
+    category: str | None = Query(default=None, description="Exact category filter"),
+    tags: str | None = Query(
+        default=None, description="Comma-separated tags filter (AND logic)"
+    ),
+    user_id: UUID = Depends(get_current_user_id),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    """Stream the user's prompts as NDJSON or CSV.
+
+    - Accepts the same filters as `GET /prompts`
+    - Rows are read from a server-side cursor and written as they arrive,
+      so memory use does not grow with library size
+    - In CSV, `tags` is a JSON array of strings
+    """
+    query = (
+        select(*RESPONSE_COLUMNS)
+        .where(*_prompt_filters(user_id, q, category, tags))
+        .order_by(Prompt.updated_at.desc(), Prompt.id.desc())
+        .execution_options(yield_per=settings.export_batch_size)
+    )
+
+    async def generate() -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # 31 = gzip container
+
+        def encode(text: str) -> bytes:
+            data = text.encode()
+            return compressor.compress(data) if compressor else data
+
+        # The request's session is closed before streaming starts, so the
+        # cursor needs a session of its own
+        async with rls_session(user_id) as db:
+            result = await db.stream(query)
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                # Sent on its own, so an export without rows still has it
+                writer.writerow(EXPORT_CSV_HEADER)
+                yield encode(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+            async for partition in result.partitions():
+                if export_format == "csv":
+                    for row in partition:
+                        writer.writerow(
+                            [
+                                row.id,
+                                row.title,
+                                row.content,
+                                row.category or "",
+                                # Tags may contain commas; a JSON array is unambiguous
+                                json.dumps(row.tags or []),
+                                row.created_at.isoformat(),
+                                row.updated_at.isoformat(),
+                            ]
+                        )
+                    chunk = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    chunk = "".join(
+                        PromptResponse.model_validate(row).model_dump_json() + "\n"
+                        for row in partition
+                    )
+                yield encode(chunk)
+
+        if compressor:
+            yield compressor.flush()
+
+    filename = f"prompts.{export_format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else EXPORT_MEDIA_TYPES[export_format]
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/duplicates", response_model=DuplicateClustersResponse)
+async def list_duplicate_prompts(
+    limit: int = Query(default=50, ge=1, le=200, description="Maximum clusters to return"),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+    version: int = Depends(get_library_version),
+    etag: str = Depends(get_library_etag),
+) -> FastJSONResponse:
+    """Group the user's prompts into clusters of near-duplicates.
+
+    Clusters are found through LSH buckets rather than by comparing every
+    pair; largest clusters come first, each ordered by updated_at.
+    """
+    index = await signature_indexes.get(db, user_id, version)
+    clusters = index.clusters()[:limit]
 
-    result = await db.execute(query)
-    prompts = result.scalars().all()
+    prompt_ids = [prompt_id for cluster in clusters for prompt_id in cluster]
+    result = await db.execute(
+        select(*RESPONSE_COLUMNS)
+        .where(Prompt.id.in_(prompt_ids), Prompt.user_id == user_id)
+        .order_by(Prompt.updated_at.desc(), Prompt.id.desc())
+    )
+    prompts = {row.id: dict(zip(RESPONSE_FIELDS, row)) for row in result}
+    grouped: list[list[dict[str, Any]]] = [[] for _ in clusters]
+    cluster_of = {
+        prompt_id: number for number, cluster in enumerate(clusters) for prompt_id in cluster
+    }
+    for prompt_id, prompt in prompts.items():
+        grouped[cluster_of[prompt_id]].append(prompt)
 
-    return PromptsListResponse(
-        prompts=[PromptResponse.model_validate(p) for p in prompts],
-        total=total,
-        limit=limit,
-        offset=offset,
+    return FastJSONResponse(
+        {"clusters": [cluster for cluster in grouped if len(cluster) > 1]},
+        headers=etag_headers(etag),
     )
 
 
@@ -114,12 +819,13 @@ async def get_prompt(
     prompt_id: UUID,
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
-) -> PromptResponse:
+    etag: str = Depends(get_library_etag),
+) -> FastJSONResponse:
     """Get a single prompt by ID."""
     result = await db.execute(
-        select(Prompt).where(Prompt.id == prompt_id, Prompt.user_id == user_id)
+        select(*RESPONSE_COLUMNS).where(Prompt.id == prompt_id, Prompt.user_id == user_id)
     )
-    prompt = result.scalar_one_or_none()
+    prompt = result.one_or_none()
 
     if not prompt:
         raise HTTPException(
@@ -127,21 +833,100 @@ async def get_prompt(
             detail="Prompt not found",
         )
 
-    return PromptResponse.model_validate(prompt)
+    return FastJSONResponse(dict(zip(RESPONSE_FIELDS, prompt)), headers=etag_headers(etag))
 
 
-@router.put("/{prompt_id}", response_model=PromptResponse)
-async def update_prompt(
+@router.get("/{prompt_id}/similar", response_model=SimilarPromptsResponse)
+async def list_similar_prompts(
     prompt_id: UUID,
-    prompt_data: PromptUpdate,
+    limit: int = Query(default=10, ge=1, le=100),
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
-) -> PromptResponse:
-    """Update an existing prompt."""
+    version: int = Depends(get_library_version),
+    etag: str = Depends(get_library_etag),
+) -> FastJSONResponse:
+    """List the user's prompts most similar to a prompt, best match first.
+
+    Similarity is the cosine of the prompts' embeddings; each result carries
+    it as `score`.
+    """
+    index = await vector_indexes.get(db, user_id, version)
+    vector = index.vector(prompt_id)
+    if vector is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prompt not found",
+        )
+
+    scores = dict(index.search(vector, limit, exclude=prompt_id))
     result = await db.execute(
-        select(Prompt).where(Prompt.id == prompt_id, Prompt.user_id == user_id)
+        select(*RESPONSE_COLUMNS).where(Prompt.id.in_(scores), Prompt.user_id == user_id)
     )
-    prompt = result.scalar_one_or_none()
+    prompts = [dict(zip(RESPONSE_FIELDS, row)) for row in result]
+    for prompt in prompts:
+        prompt["score"] = scores[prompt["id"]]
+    prompts.sort(key=lambda prompt: prompt["score"], reverse=True)
+
+    return FastJSONResponse({"prompts": prompts}, headers=etag_headers(etag))
+
+
+async def _write_prompt_fields(
+    db: AsyncSession,
+    prompt_id: UUID,
+    user_id: UUID,
+    values: dict[str, Any],
+):
+    """
+    Write changed fields of a prompt and return its response columns.
+
+    Rows whose values already match are excluded in the WHERE clause, so a
+    no-op edit updates nothing and fires no triggers; the stored row is read
+    back instead. Index values whose text is all in `values` are stored by
+    the UPDATE statement itself; a partial edit of that text stores them
+    afterwards from the returned row. Raises 404 if the prompt doesn't exist.
+    """
+    ownership = (Prompt.id == prompt_id, Prompt.user_id == user_id)
+    prompt = None
+
+    if values:
+        changed = or_(
+            *(getattr(Prompt, field).is_distinct_from(value) for field, value in values.items())
+        )
+        written = (
+            update(Prompt)
+            .where(*ownership, changed)
+            .values(**values)
+            .returning(*RESPONSE_COLUMNS)
+            .cte("written")
+        )
+        upserts = []
+        stored_after = []
+        for indexes, fields in ((vector_indexes, EMBEDDED_FIELDS), (signature_indexes, SIGNED_FIELDS)):
+            if not values.keys() & fields:
+                continue
+            if values.keys() >= fields:
+                value = indexes.compute(values["title"], values["content"], values.get("tags"))
+                upserts.append(indexes.upsert_written(written, value))
+            else:
+                stored_after.append(indexes)
+
+        result = await db.execute(
+            _with_side_effects(
+                written,
+                upserts,
+                prompt_event_notification(user_id, "updated", id=str(prompt_id)),
+            )
+        )
+        prompt = result.one_or_none()
+        if prompt:
+            text = [(prompt_id, prompt.title, prompt.content, prompt.tags)]
+            for indexes in stored_after:
+                await indexes.store(db, user_id, text)
+
+    if not prompt:
+        # Nothing changed (or no such prompt) - return the stored row as is
+        result = await db.execute(select(*RESPONSE_COLUMNS).where(*ownership))
+        prompt = result.one_or_none()
 
     if not prompt:
         raise HTTPException(
@@ -149,13 +934,45 @@ async def update_prompt(
             detail="Prompt not found",
         )
 
-    prompt.title = prompt_data.title
-    prompt.content = prompt_data.content
-    prompt.category = prompt_data.category
-    prompt.tags = prompt_data.tags or []
-
     await db.commit()
-    await db.refresh(prompt)
+    return prompt
+
+
+@router.put("/{prompt_id}", response_model=PromptResponse)
+async def update_prompt(
+    prompt_id: UUID,
+    prompt_data: PromptUpdate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+) -> PromptResponse:
+    """Update an existing prompt."""
+    prompt = await _write_prompt_fields(
+        db,
+        prompt_id,
+        user_id,
+        {
+            "title": prompt_data.title,
+            "content": prompt_data.content,
+            "category": prompt_data.category,
+            "tags": prompt_data.tags or [],
+        },
+    )
+    return PromptResponse.model_validate(prompt)
+
+
+@router.patch("/{prompt_id}", response_model=PromptResponse)
+async def patch_prompt(
+    prompt_id: UUID,
+    prompt_data: PromptPatch,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db_with_rls),
+) -> PromptResponse:
+    """Partially update a prompt; only fields present in the body are written."""
+    values = prompt_data.model_dump(exclude_unset=True)
+    if "tags" in values:
+        values["tags"] = values["tags"] or []
+
+    prompt = await _write_prompt_fields(db, prompt_id, user_id, values)
     return PromptResponse.model_validate(prompt)
 
 
@@ -166,16 +983,22 @@ async def delete_prompt(
     db: AsyncSession = Depends(get_db_with_rls),
 ) -> None:
     """Delete a prompt."""
+    written = (
+        delete(Prompt)
+        .where(Prompt.id == prompt_id, Prompt.user_id == user_id)
+        .returning(Prompt.id)
+        .cte("written")
+    )
     result = await db.execute(
-        select(Prompt).where(Prompt.id == prompt_id, Prompt.user_id == user_id)
+        _with_side_effects(
+            written, [], prompt_event_notification(user_id, "deleted", id=str(prompt_id))
+        )
     )
-    prompt = result.scalar_one_or_none()
 
-    if not prompt:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Prompt not found",
         )
 
-    await db.delete(prompt)
     await db.commit()
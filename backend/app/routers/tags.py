@@ -1,10 +1,17 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import desc, func, select
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_current_user_id, get_db_with_rls
-from app.models.prompt import Prompt
+from app.autocomplete import autocomplete, prefix_pattern
+from app.dependencies import (
+    etag_headers,
+    get_current_user_id,
+    get_db_with_rls,
+    get_library_etag,
+    get_library_version,
+)
+from app.models.tag_counts import UserTagCount
 from app.schemas.prompt import TagsResponse
 
 router = APIRouter(prefix="/tags", tags=["tags"])
@@ -12,36 +19,36 @@ router = APIRouter(prefix="/tags", tags=["tags"])
 
 @router.get("", response_model=TagsResponse)
 async def list_tags(
+    response: Response,
     q: str | None = Query(default=None, description="Prefix filter for tags"),
     user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db_with_rls),
+    version: int = Depends(get_library_version),
+    etag: str = Depends(get_library_etag),
 ) -> TagsResponse:
     """Get user's unique tags sorted by usage frequency.
 
     - Returns tags from user's prompts
     - Optional prefix filter via `q` parameter
     - Sorted by usage frequency (most used first)
+    - Identical concurrent requests share one query
     - Limited to 20 tags
     """
-    # Unnest the tags array to get individual tags from all user's prompts - explicitly scoped to user
-    unnested = (
-        select(func.unnest(Prompt.tags).label("tag"))
-        .where(Prompt.user_id == user_id)
-        .subquery()
-    )
+    async def fetch(db: AsyncSession) -> list[str]:
+        # Read the trigger-maintained per-user counters - explicitly scoped to user
+        query = select(UserTagCount.tag).where(UserTagCount.user_id == user_id)
 
-    # Count occurrences of each tag
-    count_col = func.count().label("cnt")
-    query = select(unnested.c.tag, count_col).group_by(unnested.c.tag)
+        # Apply case-insensitive prefix filter (served by the lower(tag) index)
+        if q:
+            query = query.where(func.lower(UserTagCount.tag).like(prefix_pattern(q.lower())))
 
-    # Apply prefix filter if provided
-    if q:
-        query = query.where(unnested.c.tag.ilike(f"{q}%"))
+        # Order by frequency (most used first) and limit to 20
+        query = query.order_by(UserTagCount.count.desc(), UserTagCount.tag).limit(20)
 
-    # Order by frequency (most used first) and limit to 20
-    query = query.order_by(desc(count_col)).limit(20)
+        result = await db.execute(query)
+        return list(result.scalars())
 
-    result = await db.execute(query)
-    rows = result.all()
+    names = await autocomplete("tags", user_id, version, q, 20, db, fetch)
+    response.headers.update(etag_headers(etag))
 
-    return TagsResponse(tags=[row.tag for row in rows])
+    return TagsResponse(tags=names)
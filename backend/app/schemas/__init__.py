@@ -1,18 +1,42 @@
 """Pydantic schemas for API request/response validation."""
 from app.schemas.prompt import (
+    BulkImportDuplicate,
+    BulkImportError,
+    BulkImportResponse,
     CategoriesResponse,
+    DuplicateClustersResponse,
+    DuplicateMatch,
+    PromptChangesResponse,
     PromptCreate,
+    PromptCreateResponse,
+    PromptFieldsResponse,
+    PromptPatch,
     PromptResponse,
     PromptUpdate,
     PromptsListResponse,
+    ScoredPromptResponse,
+    SimilarPromptsResponse,
     TagsResponse,
+    TotalKind,
 )
 
 __all__ = [
+    "BulkImportDuplicate",
+    "BulkImportError",
+    "BulkImportResponse",
     "CategoriesResponse",
+    "DuplicateClustersResponse",
+    "DuplicateMatch",
+    "PromptChangesResponse",
     "PromptCreate",
+    "PromptCreateResponse",
+    "PromptFieldsResponse",
+    "PromptPatch",
     "PromptResponse",
     "PromptUpdate",
     "PromptsListResponse",
+    "ScoredPromptResponse",
+    "SimilarPromptsResponse",
     "TagsResponse",
+    "TotalKind",
 ]
@@ -1,8 +1,9 @@
 """Pydantic schemas for Prompt API."""
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class PromptCreate(BaseModel):
@@ -23,6 +24,23 @@ class PromptUpdate(BaseModel):
     tags: list[str] | None = Field(default=None)
 
 
+class PromptPatch(BaseModel):
+    """Schema for partially updating a prompt; omitted fields are left as is."""
+
+    title: str | None = Field(default=None, min_length=1, max_length=500)
+    content: str | None = Field(default=None, min_length=1)
+    category: str | None = Field(default=None, max_length=100)
+    tags: list[str] | None = Field(default=None)
+
+    @field_validator("title", "content")
+    @classmethod
+    def not_null(cls, value: str | None) -> str:
+        """Title and content may be omitted but not cleared."""
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
 class PromptResponse(BaseModel):
     """Schema for prompt response."""
 
@@ -38,13 +56,111 @@ class PromptResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PromptFieldsResponse(BaseModel):
+    """A listed prompt limited by `fields`; only `id` and the requested fields are present.
+
+    `snippet` is a preview of content, returned only when requested.
+    """
+
+    id: UUID
+    user_id: UUID | None = None
+    title: str | None = None
+    content: str | None = None
+    category: str | None = None
+    tags: list[str] | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    snippet: str | None = None
+
+
+class DuplicateMatch(BaseModel):
+    """An existing prompt that is likely a near-duplicate.
+
+    `similarity` estimates the Jaccard similarity of the two prompts'
+    word 3-shingles (0 to 1).
+    """
+
+    id: UUID
+    similarity: float
+
+
+class PromptCreateResponse(PromptResponse):
+    """Schema for a created prompt with its likely duplicates."""
+
+    likely_duplicates: list[DuplicateMatch] = []
+
+
+class DuplicateClustersResponse(BaseModel):
+    """Schema for near-duplicate clusters, largest first."""
+
+    clusters: list[list[PromptResponse]]
+
+
+TotalKind = Literal["exact", "estimate", "none"]
+
+
 class PromptsListResponse(BaseModel):
-    """Schema for paginated prompts list response."""
+    """Schema for paginated prompts list response.
+
+    `total` is exact, a lower bound (`estimate`), or omitted (`none`)
+    depending on `total_kind`. Prompts are complete unless `fields` was
+    given.
+    """
 
-    prompts: list[PromptResponse]
-    total: int
+    prompts: list[PromptResponse] | list[PromptFieldsResponse]
+    total: int | None
+    total_kind: TotalKind = "exact"
     limit: int
     offset: int
+    next_cursor: str | None = None
+
+
+class PromptChangesResponse(BaseModel):
+    """Schema for delta sync response.
+
+    Pass `next_token` as `since` on the next call; keep calling while
+    `has_more` is true.
+    """
+
+    changed: list[PromptResponse]
+    deleted: list[UUID]
+    next_token: str
+    has_more: bool
+
+
+class ScoredPromptResponse(PromptResponse):
+    """A prompt with its cosine similarity to the query (-1 to 1)."""
+
+    score: float
+
+
+class SimilarPromptsResponse(BaseModel):
+    """Schema for similar prompts response, most similar first."""
+
+    prompts: list[ScoredPromptResponse]
+
+
+class BulkImportError(BaseModel):
+    """A record of a bulk import that was not created."""
+
+    index: int
+    detail: str
+
+
+class BulkImportDuplicate(BaseModel):
+    """An imported record that is likely a near-duplicate of other prompts."""
+
+    index: int
+    id: UUID
+    likely_duplicates: list[DuplicateMatch]
+
+
+class BulkImportResponse(BaseModel):
+    """Schema for bulk import result."""
+
+    created: int
+    errors: list[BulkImportError]
+    duplicates: list[BulkImportDuplicate] = []
 
 
 class TagsResponse(BaseModel):
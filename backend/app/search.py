@@ -0,0 +1,97 @@
+"""Full-text search backends for GET /prompts.
+
+A backend turns the `q` of a listing into a filter and a sort key for the
+list query. PostgresSearch ranks with ts_rank on search_vector; BM25Search
+ranks in memory and hands the database a ranked list of ids. Which one
+list_prompts uses is chosen by Settings.search_backend.
+"""
+from typing import NamedTuple, Protocol
+from uuid import UUID
+
+from sqlalchemy import ARRAY, ColumnElement, any_, func, literal
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bm25 import Document, UserTermIndex, document_terms
+from app.config import get_settings
+from app.models.prompt import Prompt
+from app.user_index import UserIndexes
+
+
+class SearchPlan(NamedTuple):
+    """How a search restricts and orders the list query."""
+
+    filter: ColumnElement[bool]
+    sort_key: ColumnElement
+    # Whether the sort key is stable enough to serve keyset cursors
+    keyset: bool
+
+
+class SearchBackend(Protocol):
+    """Plans the list query for a search."""
+
+    async def plan(
+        self, db: AsyncSession, user_id: UUID, version: int, q: str
+    ) -> SearchPlan: ...
+
+
+def ranked_plan(prompt_ids: list[UUID]) -> SearchPlan:
+    """Plan that keeps only the given prompts, in the given order."""
+    ranked = literal(prompt_ids, ARRAY(PG_UUID(as_uuid=True)))
+    return SearchPlan(
+        filter=Prompt.id == any_(ranked),
+        sort_key=-func.array_position(ranked, Prompt.id),
+        keyset=False,
+    )
+
+
+class PostgresSearch:
+    """Rank with ts_rank over the weighted search_vector."""
+
+    async def plan(
+        self, db: AsyncSession, user_id: UUID, version: int, q: str
+    ) -> SearchPlan:
+        tsquery = func.plainto_tsquery("english", q)
+        return SearchPlan(
+            filter=Prompt.search_vector.op("@@")(tsquery),
+            sort_key=func.ts_rank(Prompt.search_vector, tsquery),
+            keyset=True,
+        )
+
+
+class TermIndexes(UserIndexes[UserTermIndex, Document]):
+    """Per-user BM25 indexes, built from prompt text."""
+
+    def new_index(self) -> UserTermIndex:
+        return UserTermIndex()
+
+    def compute(self, title: str, content: str, tags: list[str] | None) -> Document:
+        return document_terms(title, content, tags)
+
+
+class BM25Search:
+    """Rank the best `candidates` matches with an in-memory BM25 index."""
+
+    def __init__(self, indexes: TermIndexes, candidates: int) -> None:
+        self.indexes = indexes
+        self.candidates = candidates
+
+    async def plan(
+        self, db: AsyncSession, user_id: UUID, version: int, q: str
+    ) -> SearchPlan:
+        index = await self.indexes.get(db, user_id, version)
+        matches = index.search(q, self.candidates)
+        return ranked_plan([prompt_id for prompt_id, _ in matches])
+
+
+def create_search_backend() -> SearchBackend:
+    """Build the backend named by Settings.search_backend."""
+    settings = get_settings()
+    if settings.search_backend == "bm25":
+        return BM25Search(
+            TermIndexes(settings.search_index_max_prompts), settings.search_candidates
+        )
+    return PostgresSearch()
+
+
+search_backend = create_search_backend()
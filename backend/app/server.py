@@ -0,0 +1,161 @@
+"""Production server: gunicorn supervising uvicorn workers.
+
+    python -m app.server
+
+Settings.server_* configure it. Workers run uvloop and httptools and
+require the lifespan hook, so each one warms up before accepting
+requests. On SIGTERM a worker stops accepting connections, ends its
+change streams (which would otherwise never finish) and gives in-flight
+requests server_graceful_timeout seconds, less SHUTDOWN_MARGIN, before
+cancelling them and running the lifespan shutdown; gunicorn kills it only
+after the full server_graceful_timeout. Workers that served
+server_max_requests (plus jitter, so they do not all restart at once) are
+replaced the same way.
+
+PostgreSQL refuses connections past its max_connections (100 by default),
+so the server splits db_max_connections across the workers. Each worker
+holds one LISTEN connection plus up to db_pool_size + db_max_overflow
+pooled ones (warm-up opens db_pool_size of them), so with W workers:
+
+    W * (1 + db_pool_size + db_max_overflow) <= db_max_connections
+
+The default 80 leaves room for migrations, admin sessions and the
+superuser reserve. db_pool_size and db_max_overflow are lowered to each
+worker's share before the workers start; with 8 workers each gets a pool
+of 3 + 6 overflow.
+"""
+import os
+import sys
+from typing import Any
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn import Server
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+from app.config import Settings, get_settings
+
+# Seconds left for the lifespan shutdown (final metrics flush, closing
+# connections) between cancelling requests and gunicorn's kill
+SHUTDOWN_MARGIN = 5.0
+
+# Connections a worker holds outside its pool: pubsub's LISTEN connection
+LISTEN_CONNECTIONS = 1
+# The default worker count is capped at this, and so that each worker
+# gets at least MIN_WORKER_POOL pooled connections
+MAX_DEFAULT_WORKERS = 8
+MIN_WORKER_POOL = 4
+
+
+class DrainingServer(Server):
+    """Uvicorn server that ends the worker's change streams as shutdown starts."""
+
+    async def shutdown(self, sockets=None) -> None:
+        # Imported here: the gunicorn master never loads the app
+        from app.events import feed
+
+        feed.close()
+        await super().shutdown(sockets)
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools, failing to boot if the lifespan fails."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": max(
+            int(get_settings().server_graceful_timeout - SHUTDOWN_MARGIN), 1
+        ),
+    }
+
+    async def _serve(self) -> None:
+        # As in uvicorn's worker, with DrainingServer in place of Server
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def default_workers(settings: Settings) -> int:
+    """Number of CPUs this process may run on, capped by MAX_DEFAULT_WORKERS and db_max_connections."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    affordable = settings.db_max_connections // (LISTEN_CONNECTIONS + MIN_WORKER_POOL)
+    return max(min(cpus, MAX_DEFAULT_WORKERS, affordable), 1)
+
+
+def worker_pool(settings: Settings, workers: int) -> tuple[int, int]:
+    """
+    Each worker's (db_pool_size, db_max_overflow) within its share of db_max_connections.
+
+    Settings that already fit are kept; otherwise a third of the share
+    stays open, as with the 10 + 20 defaults.
+    """
+    pooled = settings.db_max_connections // workers - LISTEN_CONNECTIONS
+    if pooled < 1:
+        raise ValueError(
+            f"db_max_connections={settings.db_max_connections} cannot serve {workers} "
+            f"workers; each needs at least {LISTEN_CONNECTIONS + 1} connections"
+        )
+    if settings.db_pool_size + settings.db_max_overflow <= pooled:
+        return settings.db_pool_size, settings.db_max_overflow
+    pool_size = max(pooled // 3, 1)
+    return pool_size, pooled - pool_size
+
+
+def gunicorn_options(settings: Settings, workers: int) -> dict[str, Any]:
+    """Map Settings onto gunicorn's configuration."""
+    return {
+        "bind": f"{settings.server_host}:{settings.server_port}",
+        "workers": workers,
+        "worker_class": "app.server.UvicornWorker",
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests_jitter,
+        "graceful_timeout": settings.server_graceful_timeout,
+        # Workers do not heartbeat during the lifespan startup, so this must
+        # leave room for the warm-up
+        "timeout": settings.server_timeout,
+        "keepalive": settings.server_keepalive,
+        "accesslog": "-",
+        "errorlog": "-",
+    }
+
+
+class GunicornApp(BaseApplication):
+    """Gunicorn application configured from Settings instead of a config file."""
+
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Imported in each worker, so engines and caches are not shared across forks
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    """Fit the workers' pools into db_max_connections, then run gunicorn."""
+    settings = get_settings()
+    workers = settings.server_workers or default_workers(settings)
+    pool_size, max_overflow = worker_pool(settings, workers)
+    # Workers are forked from here and read Settings from this environment
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    get_settings.cache_clear()
+    GunicornApp(gunicorn_options(get_settings(), workers)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Opt-in log of slow SQL statements with sampled EXPLAIN plans.
+
+With Settings.slow_query_threshold_ms set, every statement slower than the
+threshold is recorded in a per-worker ring buffer: SQL with literals and
+IN lists collapsed, the shapes (not values) of its parameters, duration
+and route. A slow_query_explain_rate fraction of slow SELECTs is re-run
+under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint that is always rolled
+back, and the plan is stored with the entry.
+"""
+import logging
+import random
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from app.config import get_settings
+from app.metrics import UNMATCHED_ROUTE, current_request
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![$\w])\d+(?:\.\d+)?\b")
+# Runs of bind placeholders, as rendered for IN lists and multi-row VALUES;
+# asyncpg's dialect adds casts such as $1::VARCHAR or $2::UUID[]
+_PLACEHOLDER = (
+    r"\$\d+(?:::\w+(?: (?:WITH|WITHOUT) TIME ZONE| PRECISION| VARYING)?(?:\[\])*)?"
+)
+_PLACEHOLDER_LIST_RE = re.compile(
+    rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+", re.IGNORECASE
+)
+_VALUES_LIST_RE = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and placeholder lists so equal shapes compare equal."""
+    sql = _WHITESPACE_RE.sub(" ", statement).strip()
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_LIST_RE.sub("...", sql)
+    return _VALUES_LIST_RE.sub(r"\1, ...", sql)
+
+
+def parameter_shape(value: Any) -> str:
+    """Describe a bound parameter without revealing it."""
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return f"str[{len(value)}]"
+    if isinstance(value, (bytes, bytearray)):
+        return f"bytes[{len(value)}]"
+    if isinstance(value, (list, tuple)):
+        return f"array[{len(value)}]"
+    return type(value).__name__
+
+
+def _parameter_shapes(parameters: Any) -> list[str]:
+    if isinstance(parameters, dict):
+        return [f"{key}: {parameter_shape(value)}" for key, value in parameters.items()]
+    return [parameter_shape(value) for value in parameters or ()]
+
+
+def _explain(connection, statement: str, parameters: Any) -> list[str] | None:
+    """Run EXPLAIN (ANALYZE, BUFFERS) in a savepoint that is always rolled back."""
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception:
+        logger.exception("EXPLAIN of a slow statement failed")
+        return None
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Bounded ring buffer of slow statements, newest last."""
+
+    def __init__(self, threshold_ms: float, explain_rate: float, size: int) -> None:
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self.entries: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def observe(
+        self, connection, statement: str, parameters: Any, duration: float, executemany: bool
+    ) -> None:
+        """Statement observer for app.metrics.instrument_engine."""
+        if duration >= self.threshold:
+            self.record(connection, statement, parameters, duration, executemany)
+
+    def record(
+        self, connection, statement: str, parameters: Any, duration: float, executemany: bool
+    ) -> None:
+        """Store a statement that took longer than the threshold."""
+        stats = current_request.get()
+        entry: dict[str, Any] = {
+            "at": datetime.now(timezone.utc),
+            "duration_ms": round(duration * 1000, 2),
+            "route": stats.route if stats else UNMATCHED_ROUTE,
+            "sql": normalize_sql(statement),
+            "parameters": [] if executemany else _parameter_shapes(parameters),
+            "plan": None,
+        }
+
+        # Re-running is only safe for reads; writes are left unexplained
+        is_read = statement.lstrip()[:6].upper() == "SELECT"
+        if is_read and not executemany and random.random() < self.explain_rate:
+            entry["plan"] = _explain(connection, statement, parameters)
+
+        self.entries.append(entry)
+        logger.warning(
+            "Slow statement (%.1f ms) on %s: %s", entry["duration_ms"], entry["route"], entry["sql"]
+        )
+
+    def recent(self, limit: int) -> list[dict[str, Any]]:
+        """Return up to limit entries, newest first."""
+        return list(reversed(self.entries))[:limit]
+
+
+def create_slow_query_log() -> SlowQueryLog | None:
+    """
+    Return a slow-statement log if a threshold is configured.
+
+    Register its observe method with app.metrics.instrument_engine, which
+    times each statement once for both.
+    """
+    settings = get_settings()
+    if settings.slow_query_threshold_ms is None:
+        return None
+
+    return SlowQueryLog(
+        settings.slow_query_threshold_ms,
+        settings.slow_query_explain_rate,
+        settings.slow_query_log_size,
+    )
@@ -0,0 +1,159 @@
+"""Per-worker cache of verified JWTs, with revocations shared across workers."""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db import async_session_factory
+from app.models.revoked_token import RevokedToken
+from app.pubsub import listener
+
+TOKEN_REVOKED_CHANNEL = "token_revoked"
+
+
+def _digest(token: str) -> bytes:
+    """Key tokens by digest so the cache never holds usable credentials."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """
+    Bounded LRU of tokens whose signature and claims were already verified.
+
+    Entries expire at the token's own `exp`. Revoked tokens are refused
+    until they would have expired anyway. Revocations are stored in the
+    revoked_tokens table, which callers check before caching a token, and
+    reach every running worker through publish_revocation. The worker keeps
+    the most recent ones (at most maxsize) to skip that check.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # digest -> (user_id, exp)
+        self._entries: OrderedDict[bytes, tuple[UUID, float]] = OrderedDict()
+        # digest -> exp of recently revoked tokens, oldest first
+        self._revoked: OrderedDict[bytes, float] = OrderedDict()
+
+    def lookup(self, token: str) -> UUID | None:
+        """Return the user id of a cached, unexpired token."""
+        key = _digest(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def store(self, token: str, user_id: UUID, exp: float) -> bool:
+        """
+        Cache a freshly verified token.
+
+        Returns False (and caches nothing) if the token is known to be revoked.
+        """
+        key = _digest(token)
+        if key in self._revoked:
+            return False
+
+        self._entries[key] = (user_id, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return True
+
+    def revoke(self, token: str, exp: float) -> None:
+        """Refuse a single token from now on."""
+        self.revoke_digest(_digest(token), exp)
+
+    def revoke_digest(self, key: bytes, exp: float) -> None:
+        """Refuse the token with this digest from now on."""
+        self._prune_revoked()
+        self._revoked[key] = exp
+        self._revoked.move_to_end(key)
+        # Forgotten ones are still refused through the revoked_tokens table
+        while len(self._revoked) > self.maxsize:
+            self._revoked.popitem(last=False)
+        self._entries.pop(key, None)
+
+    def is_revoked(self, token: str) -> bool:
+        """Whether this worker knows the token to be revoked."""
+        return _digest(token) in self._revoked
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _prune_revoked(self) -> None:
+        now = time.time()
+        for key in [key for key, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[key]
+
+
+token_cache = TokenCache(get_settings().jwt_cache_size)
+
+
+async def is_token_revoked(db: AsyncSession, token: str) -> bool:
+    """Whether the token was revoked, going by this worker's memory, then the revoked_tokens table."""
+    if token_cache.is_revoked(token):
+        return True
+    key = _digest(token)
+    result = await db.execute(select(RevokedToken.expires_at).where(RevokedToken.digest == key))
+    expires_at = result.scalar_one_or_none()
+    if expires_at is None:
+        return False
+    token_cache.revoke_digest(key, expires_at.timestamp())
+    return True
+
+
+async def publish_revocation(db: AsyncSession, token: str, exp: float) -> None:
+    """
+    Record the revocation and tell every worker once db commits.
+
+    Only the token's digest is stored and sent. Revocations that have
+    expired are pruned by the same statement.
+    """
+    key = _digest(token)
+    pruned = delete(RevokedToken).where(RevokedToken.expires_at <= func.now())
+    recorded = (
+        insert(RevokedToken)
+        .values(digest=key, expires_at=datetime.fromtimestamp(exp, timezone.utc))
+        .on_conflict_do_nothing()
+    )
+    await db.execute(
+        select(func.pg_notify(TOKEN_REVOKED_CHANNEL, f"{key.hex()}:{exp}")).add_cte(
+            pruned.cte("pruned"), recorded.cte("recorded")
+        )
+    )
+
+
+async def load_revocations() -> None:
+    """Remember the most recent unexpired revocations; run once LISTEN is up so none are missed."""
+    async with async_session_factory() as db:
+        result = await db.execute(
+            select(RevokedToken.digest, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at > func.now())
+            .order_by(RevokedToken.expires_at.desc())
+            .limit(token_cache.maxsize)
+        )
+        # Oldest first, so the newest stay if the cache overflows
+        for digest, expires_at in reversed(result.all()):
+            token_cache.revoke_digest(digest, expires_at.timestamp())
+
+
+def _on_revocation(payload: str) -> None:
+    digest, exp = payload.split(":")
+    token_cache.revoke_digest(bytes.fromhex(digest), float(exp))
+
+
+listener.subscribe(TOKEN_REVOKED_CHANNEL, _on_revocation)
@@ -0,0 +1,363 @@
+"""Per-user in-memory indexes over values derived from prompt text."""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Generic, Protocol, TypeVar
+from uuid import UUID
+
+from sqlalchemy import CTE, ColumnElement, LargeBinary, literal, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import rls_session, snapshot_xmin
+from app.models.library_version import LibraryVersion
+from app.models.prompt import Prompt
+from app.models.prompt_change import PromptChange, PromptChangeHorizon
+
+logger = logging.getLogger(__name__)
+
+# Prompts computed per transaction when filling in missing values
+BACKFILL_BATCH_SIZE = 500
+
+# (id, title, content, tags) of a prompt
+PromptText = tuple[UUID, str, str, list[str] | None]
+
+
+V = TypeVar("V")
+V_contra = TypeVar("V_contra", contravariant=True)
+
+
+class UserIndex(Protocol[V_contra]):
+    """What UserIndexes needs from one user's index."""
+
+    version: int
+    token: tuple[int, int]
+
+    def __len__(self) -> int: ...
+
+    def upsert(self, prompt_id: UUID, value: V_contra) -> None: ...
+
+    def remove(self, prompt_id: UUID) -> None: ...
+
+
+I = TypeVar("I", bound=UserIndex)
+
+
+class UserIndexes(ABC, Generic[I, V]):
+    """
+    LRU of per-user indexes, bounded by the total number of entries held.
+
+    An index is loaded on first use and brought up to date from the prompt
+    change log whenever the user's library_version has moved, so writes
+    made by any worker are applied incrementally. Values are computed from
+    the prompt text as the index loads and refreshes; StoredUserIndexes
+    computes them on write and reads them back instead.
+
+    Subclasses implement new_index and compute.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._indexes: OrderedDict[UUID, I] = OrderedDict()
+        self._locks: dict[UUID, asyncio.Lock] = {}
+        self._loads: dict[UUID, asyncio.Task] = {}
+
+    @abstractmethod
+    def new_index(self) -> I:
+        """Return an empty index for one user."""
+
+    @abstractmethod
+    def compute(self, title: str, content: str, tags: list[str] | None) -> V:
+        """Return the value indexed for a prompt's text."""
+
+    async def get(self, db: AsyncSession, user_id: UUID, version: int) -> I:
+        """Return the user's index, current as of library_version."""
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.version != version:
+                if await self._pruned_since(db, user_id, index):
+                    # Deletes it has not applied may be gone from the change log
+                    index = None
+            if index is None:
+                index = await self._load(db, user_id)
+                self._indexes[user_id] = index
+            elif index.version != version:
+                await self._refresh(db, user_id, index)
+            index.version = version
+            self._indexes.move_to_end(user_id)
+            self._evict(keep=user_id)
+        return index
+
+    def loaded(self, user_id: UUID) -> I | None:
+        """Return the user's index if it is in memory, without refreshing it."""
+        return self._indexes.get(user_id)
+
+    def load_in_background(self, user_id: UUID) -> None:
+        """Start loading the user's index with its own session, unless already underway."""
+        if user_id not in self._indexes and user_id not in self._loads:
+            self._loads[user_id] = asyncio.create_task(self._load_detached(user_id))
+
+    async def _load_detached(self, user_id: UUID) -> None:
+        try:
+            async with rls_session(user_id) as db:
+                result = await db.execute(
+                    select(LibraryVersion.version).where(LibraryVersion.user_id == user_id)
+                )
+                await self.get(db, user_id, result.scalar_one_or_none() or 0)
+        except Exception:
+            logger.exception("Loading %s for user %s failed", type(self).__name__, user_id)
+        finally:
+            self._loads.pop(user_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of loaded indexes and entries held."""
+        return {
+            "users": len(self._indexes),
+            "entries": sum(len(index) for index in self._indexes.values()),
+        }
+
+    def _compute_all(self, prompts: Iterable[PromptText]) -> list[tuple[UUID, V]]:
+        return [
+            (prompt_id, self.compute(title, content, tags))
+            for prompt_id, title, content, tags in prompts
+        ]
+
+    async def _load(self, db: AsyncSession, user_id: UUID) -> I:
+        index = self.new_index()
+        xmin = await snapshot_xmin(db)
+        await self._load_values(db, user_id, index)
+        index.token = (xmin, 0)
+        return index
+
+    async def _load_values(self, db: AsyncSession, user_id: UUID, index: I) -> None:
+        result = await db.execute(
+            select(Prompt.id, Prompt.title, Prompt.content, Prompt.tags).where(
+                Prompt.user_id == user_id
+            )
+        )
+        # Computing a whole library is CPU-bound; keep the loop responsive
+        for prompt_id, value in await asyncio.to_thread(self._compute_all, result.all()):
+            index.upsert(prompt_id, value)
+
+    async def _pruned_since(self, db: AsyncSession, user_id: UUID, index: I) -> bool:
+        """Whether tombstones the index has not applied yet have been pruned."""
+        result = await db.execute(
+            select(PromptChangeHorizon.xid).where(PromptChangeHorizon.user_id == user_id)
+        )
+        horizon = result.scalar_one_or_none()
+        return horizon is not None and horizon >= index.token[0]
+
+    async def _refresh(self, db: AsyncSession, user_id: UUID, index: I) -> None:
+        """
+        Apply every change visible to db's snapshot since the index's token.
+
+        Transactions still running at the snapshot have an xid of at least
+        its xmin, so the next refresh starts there. Changes committed since
+        then are applied now as well (re-applying one later is harmless), so
+        the index covers everything up to the library_version read earlier.
+        """
+        xmin = await snapshot_xmin(db)
+        changes = (PromptChange.user_id == user_id, PromptChange.xid >= index.token[0])
+        await self._apply_changes(db, user_id, index, changes)
+        index.token = (max(xmin, index.token[0]), 0)
+
+    async def _apply_changes(
+        self, db: AsyncSession, user_id: UUID, index: I, changes: tuple[ColumnElement[bool], ...]
+    ) -> None:
+        result = await db.execute(
+            select(PromptChange.prompt_id, Prompt.title, Prompt.content, Prompt.tags)
+            .outerjoin(Prompt, Prompt.id == PromptChange.prompt_id)
+            .where(*changes)
+        )
+        for prompt_id, title, content, tags in result:
+            if title is None:
+                index.remove(prompt_id)
+            else:
+                index.upsert(prompt_id, self.compute(title, content, tags))
+
+    def _evict(self, keep: UUID) -> None:
+        total = sum(len(index) for index in self._indexes.values())
+        for user_id in list(self._indexes):
+            if total <= self.max_entries:
+                break
+            lock = self._locks.get(user_id)
+            # A held lock means a load, refresh or backfill is using the index
+            if user_id != keep and not (lock and lock.locked()):
+                total -= len(self._indexes.pop(user_id))
+                self._locks.pop(user_id, None)
+
+
+class StoredUserIndexes(UserIndexes[I, V]):
+    """
+    UserIndexes whose values are computed on write and stored in `model`.
+
+    `model` is a table keyed by prompt_id with user_id and a bytes column
+    named `column`. Prompts without a stored value (existing or
+    bulk-imported ones) are computed and stored by a background task with
+    its own session, a batch at a time off the event loop, and join the
+    index as each batch commits; until then they are missing from the
+    index.
+
+    Subclasses set `model` and `column` and implement encode and decode as
+    well.
+    """
+
+    model: type
+    column: str
+
+    def __init__(self, max_entries: int) -> None:
+        super().__init__(max_entries)
+        # Prompts waiting for a value, and the task computing them, per user
+        self._missing: dict[UUID, set[UUID]] = {}
+        self._backfills: dict[UUID, asyncio.Task] = {}
+
+    @abstractmethod
+    def encode(self, value: V) -> bytes:
+        """Serialize a value for `column`."""
+
+    @abstractmethod
+    def decode(self, data: bytes) -> V:
+        """Deserialize a value read from `column`."""
+
+    async def store(
+        self, db: AsyncSession, user_id: UUID, prompts: Iterable[PromptText]
+    ) -> list[tuple[UUID, V]]:
+        """
+        Compute and upsert values as part of db's transaction.
+
+        Returns (prompt_id, value) pairs so callers can use them right away.
+        """
+        values = self._compute_all(prompts)
+        await self._upsert(db, user_id, values)
+        return values
+
+    def upsert_written(self, written: CTE, value: V) -> Insert:
+        """
+        Build an upsert of value for the prompts `written` returns.
+
+        `written` is a data-modifying CTE returning id and user_id; add the
+        upsert to the same statement as another CTE so the value is stored
+        without a round trip of its own.
+        """
+        data = literal(self.encode(value), LargeBinary)
+        statement = insert(self.model).from_select(
+            ["prompt_id", "user_id", self.column],
+            select(written.c.id, written.c.user_id, data),
+        )
+        return self._on_conflict_update(statement)
+
+    def _on_conflict_update(self, statement: Insert) -> Insert:
+        return statement.on_conflict_do_update(
+            index_elements=["prompt_id"],
+            set_={self.column: statement.excluded[self.column]},
+        )
+
+    async def _upsert(self, db: AsyncSession, user_id: UUID, values: list[tuple[UUID, V]]) -> None:
+        if values:
+            statement = insert(self.model).values(
+                [
+                    {"prompt_id": prompt_id, "user_id": user_id, self.column: self.encode(value)}
+                    for prompt_id, value in values
+                ]
+            )
+            await db.execute(self._on_conflict_update(statement))
+
+    async def _load_values(self, db: AsyncSession, user_id: UUID, index: I) -> None:
+        stored = getattr(self.model, self.column)
+        result = await db.execute(
+            select(Prompt.id, stored)
+            .outerjoin(self.model, self.model.prompt_id == Prompt.id)
+            .where(Prompt.user_id == user_id)
+        )
+        missing = []
+        for prompt_id, data in result:
+            if data is None:
+                missing.append(prompt_id)
+            else:
+                index.upsert(prompt_id, self.decode(data))
+        self._schedule_backfill(user_id, missing)
+
+    async def _apply_changes(
+        self, db: AsyncSession, user_id: UUID, index: I, changes: tuple[ColumnElement[bool], ...]
+    ) -> None:
+        stored = getattr(self.model, self.column)
+        result = await db.execute(
+            select(PromptChange.prompt_id, PromptChange.deleted, stored)
+            .outerjoin(self.model, self.model.prompt_id == PromptChange.prompt_id)
+            .where(*changes)
+        )
+        missing = []
+        for prompt_id, deleted, data in result:
+            if deleted:
+                index.remove(prompt_id)
+            elif data is None:
+                missing.append(prompt_id)
+            else:
+                index.upsert(prompt_id, self.decode(data))
+        self._schedule_backfill(user_id, missing)
+
+    def _schedule_backfill(self, user_id: UUID, prompt_ids: list[UUID]) -> None:
+        if not prompt_ids:
+            return
+        self._missing.setdefault(user_id, set()).update(prompt_ids)
+        if user_id not in self._backfills:
+            self._backfills[user_id] = asyncio.create_task(self._backfill(user_id))
+
+    async def _backfill(self, user_id: UUID) -> None:
+        """Compute and store values for a user's prompts that have none yet."""
+        missing = self._missing[user_id]
+        try:
+            # Stops early if the index is evicted; loading it again reschedules
+            while missing and user_id in self._indexes:
+                batch = [missing.pop() for _ in range(min(BACKFILL_BATCH_SIZE, len(missing)))]
+                # Under the user's lock, so a concurrent refresh cannot apply a
+                # delete of one of these prompts before it is inserted here
+                async with self._locks.setdefault(user_id, asyncio.Lock()):
+                    index = self._indexes.get(user_id)
+                    if index is None:
+                        break
+                    async with rls_session(user_id) as db:
+                        result = await db.execute(
+                            select(Prompt.id, Prompt.title, Prompt.content, Prompt.tags).where(
+                                Prompt.id.in_(batch), Prompt.user_id == user_id
+                            )
+                        )
+                        values = await asyncio.to_thread(self._compute_all, result.all())
+                        values = await self._upsert_existing(db, user_id, values)
+                        await db.commit()
+                    for prompt_id, value in values:
+                        index.upsert(prompt_id, value)
+        except Exception:
+            logger.exception("Backfilling %s values for user %s failed", self.column, user_id)
+        finally:
+            self._missing.pop(user_id, None)
+            self._backfills.pop(user_id, None)
+
+    async def _upsert_existing(
+        self, db: AsyncSession, user_id: UUID, values: list[tuple[UUID, V]]
+    ) -> list[tuple[UUID, V]]:
+        """
+        Upsert values, skipping prompts deleted since they were read.
+
+        A delete committed after the batch was read fails its foreign key;
+        the batch is then retried one savepoint at a time. Returns the
+        values stored.
+        """
+        try:
+            async with db.begin_nested():
+                await self._upsert(db, user_id, values)
+            return values
+        except IntegrityError:
+            stored = []
+            for value in values:
+                try:
+                    async with db.begin_nested():
+                        await self._upsert(db, user_id, [value])
+                    stored.append(value)
+                except IntegrityError:
+                    pass
+            return stored
@@ -0,0 +1,116 @@
+"""Per-user in-memory similarity indexes over prompt embeddings."""
+from uuid import UUID
+
+import numpy as np
+
+from app.config import get_settings
+from app.embeddings import EMBEDDING_DIM, EMBEDDING_DTYPE, embed_text, from_bytes, to_bytes
+from app.models.prompt_embedding import PromptEmbedding
+from app.user_index import StoredUserIndexes
+
+
+class UserVectors:
+    """
+    Dense matrix of one user's embeddings with row bookkeeping.
+
+    Rows live in a preallocated float32 array that doubles when full;
+    removal swaps the last row into the hole, so the live rows are always
+    matrix[:len(self)].
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        self.ids: list[UUID] = []
+        self.rows: dict[UUID, int] = {}
+        self.matrix = np.empty((16, dim), dtype=EMBEDDING_DTYPE)
+        # library_version and change-log position the index reflects
+        self.version = -1
+        self.token = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, prompt_id: UUID, vector: np.ndarray) -> None:
+        """Insert or replace a prompt's vector."""
+        row = self.rows.get(prompt_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.matrix):
+                grown = np.empty((row * 2, self.matrix.shape[1]), dtype=EMBEDDING_DTYPE)
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.ids.append(prompt_id)
+            self.rows[prompt_id] = row
+        self.matrix[row] = vector
+
+    def remove(self, prompt_id: UUID) -> None:
+        """Drop a prompt's vector if present."""
+        row = self.rows.pop(prompt_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+        self.ids.pop()
+
+    def vector(self, prompt_id: UUID) -> np.ndarray | None:
+        """Return a prompt's vector, or None if it isn't indexed."""
+        row = self.rows.get(prompt_id)
+        return None if row is None else self.matrix[row]
+
+    def search(
+        self, query: np.ndarray, k: int, exclude: UUID | None = None
+    ) -> list[tuple[UUID, float]]:
+        """Return the k most cosine-similar prompts, best first."""
+        return self.search_many(query[np.newaxis, :], k, exclude)[0]
+
+    def search_many(
+        self, queries: np.ndarray, k: int, exclude: UUID | None = None
+    ) -> list[list[tuple[UUID, float]]]:
+        """Top-k for a batch of queries with a single matrix product."""
+        n = len(self.ids)
+        if n == 0:
+            return [[] for _ in range(len(queries))]
+
+        # Vectors are unit length, so the dot product is the cosine
+        scores = self.matrix[:n] @ queries.T
+        if exclude is not None and exclude in self.rows:
+            scores[self.rows[exclude]] = -np.inf
+            n -= 1
+        k = min(k, n)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for column in range(scores.shape[1]):
+            candidates = top[:, column]
+            ordered = candidates[np.argsort(-scores[candidates, column])]
+            results.append(
+                [(self.ids[row], float(scores[row, column])) for row in ordered]
+            )
+        return results
+
+
+class VectorIndexes(StoredUserIndexes[UserVectors, np.ndarray]):
+    """Per-user similarity indexes over prompt_embeddings."""
+
+    model = PromptEmbedding
+    column = "embedding"
+
+    def new_index(self) -> UserVectors:
+        return UserVectors()
+
+    def compute(self, title: str, content: str, tags: list[str] | None) -> np.ndarray:
+        return embed_text(title, content, tags)
+
+    def encode(self, vector: np.ndarray) -> bytes:
+        return to_bytes(vector)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return from_bytes(data)
+
+
+vector_indexes = VectorIndexes(get_settings().vector_index_max_vectors)
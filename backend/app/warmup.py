@@ -0,0 +1,74 @@
+"""Worker warm-up, run by the lifespan hook before /health reports ready.
+
+Opens the connection pool to its full size, so the first requests do not
+pay for connection setup, then loads the in-memory per-user indexes of the
+Settings.warmup_users users with the most library writes, the ones whose
+cold loads are the slowest. Failures are logged and skipped, and the
+warm-up stops after Settings.warmup_timeout: a worker that could not warm
+up still serves, only more slowly at first.
+"""
+import asyncio
+import logging
+from uuid import UUID
+
+from sqlalchemy import select, text
+
+from app.config import Settings, get_settings
+from app.db import async_session_factory, engine, rls_session
+from app.dedup import signature_indexes
+from app.models.library_version import LibraryVersion
+from app.search import BM25Search, search_backend
+from app.user_index import UserIndexes
+from app.vector_index import vector_indexes
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_pool(size: int) -> None:
+    """Hold size connections at once so the pool opens them all."""
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(size)))
+
+
+async def warm_indexes(users: int) -> None:
+    """Load every in-memory index of the most active users."""
+    indexes: list[UserIndexes] = [signature_indexes, vector_indexes]
+    if isinstance(search_backend, BM25Search):
+        indexes.append(search_backend.indexes)
+
+    async with async_session_factory() as db:
+        result = await db.execute(
+            select(LibraryVersion.user_id, LibraryVersion.version)
+            .order_by(LibraryVersion.version.desc())
+            .limit(users)
+        )
+        active: list[tuple[UUID, int]] = list(result.tuples())
+
+    for user_id, version in active:
+        async with rls_session(user_id) as db:
+            for user_indexes in indexes:
+                await user_indexes.get(db, user_id, version)
+
+
+async def warm_up() -> None:
+    """Warm the pool, then the indexes, within warmup_timeout; never raises."""
+    settings = get_settings()
+    try:
+        await asyncio.wait_for(_warm_up(settings), settings.warmup_timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up cut short after %.0fs", settings.warmup_timeout)
+
+
+async def _warm_up(settings: Settings) -> None:
+    try:
+        await warm_pool(settings.db_pool_size)
+    except Exception:
+        logger.exception("Connection pool warm-up failed")
+    if settings.warmup_users:
+        try:
+            await warm_indexes(settings.warmup_users)
+        except Exception:
+            logger.exception("Index warm-up failed")
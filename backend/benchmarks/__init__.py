@@ -0,0 +1 @@
+"""Benchmarks for the Prompt Library API hot paths."""
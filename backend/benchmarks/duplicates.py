@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measure near-duplicate lookup and clustering on the in-memory LSH index.
+
+Fills a UserSignatures index with synthetic prompts, a tenth of which are
+lightly edited copies of others, then times query() as create_prompt calls
+it and clusters() as GET /prompts/duplicates does. No database is needed:
+
+    python -m benchmarks.duplicates [--sizes 1000,10000,100000]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+
+from app.config import get_settings
+from app.dedup import UserSignatures
+from app.minhash import signature
+
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def make_prompts(count: int, rng: random.Random) -> list[str]:
+    prompts = []
+    for i in range(count):
+        if prompts and i % 10 == 0:
+            # Near-copy: replace one word of an earlier prompt
+            words = rng.choice(prompts).split()
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            prompts.append(" ".join(words))
+        else:
+            prompts.append(" ".join(rng.choices(WORDS, k=60)))
+    return prompts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        prompts = make_prompts(size, rng)
+        index = UserSignatures(get_settings().duplicate_threshold)
+        start = time.perf_counter()
+        for text in prompts:
+            index.upsert(uuid.uuid4(), signature("", text))
+        build_seconds = time.perf_counter() - start
+
+        lookups = []
+        for text in rng.sample(prompts, min(args.queries, size)):
+            sig = signature("", text)
+            start = time.perf_counter()
+            index.query(sig)
+            lookups.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        clusters = index.clusters()
+        cluster_seconds = time.perf_counter() - start
+
+        cuts = statistics.quantiles(lookups, n=100)
+        results.append(
+            {
+                "prompts": size,
+                "build_s": round(build_seconds, 2),
+                "query_p50_ms": round(cuts[49] * 1e3, 3),
+                "query_p99_ms": round(cuts[98] * 1e3, 3),
+                "clusters": len(clusters),
+                "clusters_s": round(cluster_seconds, 3),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
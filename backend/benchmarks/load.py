@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Load test the prompts API against synthetic tenants.
+
+Seeds --users users with --prompts prompts each (see benchmarks.seeding),
+then runs each scenario for --duration seconds with --concurrency workers
+against the real ASGI app in this process, inside its lifespan so the
+change listener and warm-up run as in a worker. Workers are spread over the
+tenants, each with its own client and session cookie. A --warmup period
+per scenario (not recorded) fills indexes and caches first. The result is
+JSON with the run's parameters and commit, and per scenario the request
+count, errors, throughput and p50/p95/p99 latency, for comparing commits.
+Client and server share one event loop, so numbers are relative, not
+capacity. The synthetic tenants are deleted at the end. Needs a migrated
+database:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.load \
+        [--users 20] [--prompts 1000] [--concurrency 16] [--duration 10] \
+        [--scenarios list,search,...] [--no-cache] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+from app.cache import ResponseCache
+from app.config import get_settings
+from app.db import engine
+from app.main import app
+from app.routers import prompts as prompts_router
+from app.routers.auth import create_jwt_token
+from benchmarks.seeding import (
+    CATEGORIES,
+    CATEGORY_WEIGHTS,
+    TAG_VOCABULARY,
+    WORDS,
+    delete_users,
+    make_prompt,
+    seed_tenants,
+)
+
+PAGE_SIZE = 20
+# Readers mostly stay on the first pages
+MAX_OFFSET_PAGE = 5
+MAX_CURSOR_PAGES = 10
+
+
+class Worker:
+    """One simulated client: a tenant's session plus per-scenario state."""
+
+    def __init__(
+        self, client: httpx.AsyncClient, prompt_ids: list[uuid.UUID], rng: random.Random
+    ) -> None:
+        self.client = client
+        self.rng = rng
+        # Disjoint from other workers of the same tenant, so deletes never collide
+        self.prompt_ids = prompt_ids
+        self.cursor: str | None = None
+        self.cursor_pages = 0
+
+    def word(self) -> str:
+        # Low ranks dominate, like the seeded text
+        return WORDS[min(int(self.rng.expovariate(0.1)), len(WORDS) - 1)]
+
+
+async def list_offset(worker: Worker) -> httpx.Response:
+    page = worker.rng.randrange(MAX_OFFSET_PAGE)
+    return await worker.client.get(
+        "/prompts", params={"limit": PAGE_SIZE, "offset": page * PAGE_SIZE}
+    )
+
+
+async def list_cursor(worker: Worker) -> httpx.Response:
+    params: dict[str, Any] = {"limit": PAGE_SIZE, "total": "none"}
+    if worker.cursor:
+        params["cursor"] = worker.cursor
+    response = await worker.client.get("/prompts", params=params)
+    worker.cursor_pages += 1
+    worker.cursor = response.json().get("next_cursor") if response.is_success else None
+    if worker.cursor_pages >= MAX_CURSOR_PAGES:
+        worker.cursor, worker.cursor_pages = None, 0
+    return response
+
+
+async def search(worker: Worker) -> httpx.Response:
+    words = {worker.word() for _ in range(worker.rng.randint(1, 2))}
+    return await worker.client.get("/prompts", params={"q": " ".join(words), "limit": PAGE_SIZE})
+
+
+async def filter_prompts(worker: Worker) -> httpx.Response:
+    params: dict[str, Any] = {"limit": PAGE_SIZE}
+    if worker.rng.random() < 0.7:
+        params["category"] = worker.rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+    if "category" not in params or worker.rng.random() < 0.5:
+        rank = min(int(worker.rng.expovariate(0.05)), len(TAG_VOCABULARY) - 1)
+        params["tags"] = TAG_VOCABULARY[rank]
+    return await worker.client.get("/prompts", params=params)
+
+
+async def tags(worker: Worker) -> httpx.Response:
+    # Half plain listings, half autocomplete as the user types
+    params = {"q": worker.word()[: worker.rng.randint(1, 3)]} if worker.rng.random() < 0.5 else {}
+    return await worker.client.get("/tags", params=params)
+
+
+async def categories(worker: Worker) -> httpx.Response:
+    params = {"q": worker.rng.choice(CATEGORIES)[:2]} if worker.rng.random() < 0.5 else {}
+    return await worker.client.get("/categories", params=params)
+
+
+def _prompt_body(worker: Worker) -> dict[str, Any]:
+    prompt = make_prompt(uuid.uuid4(), worker.rng)
+    return {field: prompt[field] for field in ("title", "content", "category", "tags")}
+
+
+async def create(worker: Worker) -> httpx.Response:
+    response = await worker.client.post("/prompts", json=_prompt_body(worker))
+    if response.is_success:
+        worker.prompt_ids.append(uuid.UUID(response.json()["id"]))
+    return response
+
+
+async def update(worker: Worker) -> httpx.Response | None:
+    if not worker.prompt_ids:
+        return None
+    prompt_id = worker.rng.choice(worker.prompt_ids)
+    body = _prompt_body(worker)
+    return await worker.client.patch(
+        f"/prompts/{prompt_id}", json={"title": body["title"], "tags": body["tags"]}
+    )
+
+
+async def delete(worker: Worker) -> httpx.Response | None:
+    if not worker.prompt_ids:
+        return None
+    prompt_id = worker.prompt_ids.pop(worker.rng.randrange(len(worker.prompt_ids)))
+    return await worker.client.delete(f"/prompts/{prompt_id}")
+
+
+# Run in this order; delete last so the other writes still have prompts
+SCENARIOS: dict[str, Callable[[Worker], Awaitable[httpx.Response | None]]] = {
+    "list": list_offset,
+    "list_cursor": list_cursor,
+    "search": search,
+    "filter": filter_prompts,
+    "tags": tags,
+    "categories": categories,
+    "create": create,
+    "update": update,
+    "delete": delete,
+}
+
+
+def summarize(samples: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    """Throughput and latency percentiles of one scenario run."""
+    result: dict[str, Any] = {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+    if len(samples) >= 2:
+        cuts = statistics.quantiles(samples, n=100)
+        result.update(
+            mean_ms=round(statistics.fmean(samples) * 1e3, 2),
+            p50_ms=round(cuts[49] * 1e3, 2),
+            p95_ms=round(cuts[94] * 1e3, 2),
+            p99_ms=round(cuts[98] * 1e3, 2),
+        )
+    return result
+
+
+async def run_scenario(
+    scenario: Callable[[Worker], Awaitable[httpx.Response | None]],
+    workers: list[Worker],
+    duration: float,
+) -> dict[str, Any]:
+    """Call scenario from every worker in a closed loop until duration runs out."""
+    samples: list[float] = []
+    errors = 0
+
+    async def loop(worker: Worker) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await scenario(worker)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response is None:
+                # Nothing left for this worker to do
+                return
+            samples.append(time.perf_counter() - start)
+            if response.is_error:
+                errors += 1
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(loop(worker) for worker in workers))
+    return summarize(samples, errors, time.perf_counter() - start)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(
+    tenants: dict[uuid.UUID, list[uuid.UUID]],
+    names: list[str],
+    args: argparse.Namespace,
+    results: dict[str, Any],
+) -> None:
+    """Give each worker a client for its tenant and run the scenarios in order."""
+    settings = get_settings()
+    transport = httpx.ASGITransport(app=app)
+    clients = []
+    workers = []
+    user_ids = list(tenants)
+    # Workers sharing a tenant split its prompts between them
+    slots = -(-args.concurrency // len(user_ids))
+    for i in range(args.concurrency):
+        user_id = user_ids[i % len(user_ids)]
+        slot = i // len(user_ids)
+        client = httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={"access_token": create_jwt_token(user_id, settings)},
+        )
+        clients.append(client)
+        workers.append(Worker(client, tenants[user_id][slot::slots], random.Random(args.seed + i)))
+
+    try:
+        for name in names:
+            if args.warmup:
+                await run_scenario(SCENARIOS[name], workers, args.warmup)
+            results["scenarios"][name] = await run_scenario(SCENARIOS[name], workers, args.duration)
+    finally:
+        for client in clients:
+            await client.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--prompts", type=int, default=1000, help="Prompts per user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unrecorded seconds per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the prompts list cache")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    settings = get_settings()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    tenants = await seed_tenants(args.users, args.prompts, rng)
+    seed_seconds = time.perf_counter() - start
+
+    if args.no_cache:
+        prompts_router.list_cache = ResponseCache(0, 0)
+
+    results: dict[str, Any] = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "users": args.users,
+            "prompts_per_user": args.prompts,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "list_cache": not args.no_cache,
+            "search_backend": settings.search_backend,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "scenarios": {},
+    }
+    try:
+        # ASGITransport sends no lifespan events, so run the app's lifespan here
+        async with app.router.lifespan_context(app):
+            await run_scenarios(tenants, names, args, results)
+    finally:
+        await delete_users(list(tenants))
+        await engine.dispose()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
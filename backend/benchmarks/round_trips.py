@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Count database round trips per prompts endpoint.
+
+Runs each prompts endpoint once against the real ASGI app and records what
+reaches PostgreSQL: statements plus BEGIN/COMMIT/ROLLBACK. Each endpoint
+reports its round-trip count and the statements in order. The user's
+in-memory indexes are loaded first, so no background index load runs on
+the engine while a request is measured. Needs a migrated database:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.round_trips
+
+A write is BEGIN, set_config (the RLS hook), one statement and COMMIT:
+the INSERT, UPDATE or DELETE runs as a CTE next to the embedding and
+signature upserts and the pg_notify for the change feed. Measured against
+PostgreSQL 16, that is 4 round trips for POST, for a PUT that changes the
+title and for DELETE (down from 8, 7 and 5). A PATCH that changes only part
+of the indexed text adds an upsert per index, since the rest of the text
+is only known from the updated row. Reads end in ROLLBACK when the session
+closes.
+"""
+import asyncio
+import json
+from typing import Any
+
+import httpx
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.db import engine
+from app.main import app
+from app.routers.auth import create_jwt_token
+from app.slow_queries import normalize_sql
+from benchmarks.seeding import create_user, delete_users
+
+# Characters of each normalized statement to report
+STATEMENT_PREVIEW = 80
+
+
+class RoundTripCounter:
+    """Record statements and transaction control calls on the engine."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._on_statement)
+        for name in ("begin", "commit", "rollback"):
+            event.listen(sync_engine, name, self._on_transaction(name.upper()))
+
+    def _on_statement(self, conn, cursor, statement, *args) -> None:
+        self.calls.append(normalize_sql(statement)[:STATEMENT_PREVIEW])
+
+    def _on_transaction(self, name: str):
+        def listener(*args) -> None:
+            self.calls.append(name)
+        return listener
+
+    def reset(self) -> dict[str, Any]:
+        calls, self.calls = self.calls, []
+        return {"round_trips": len(calls), "statements": calls}
+
+
+async def main() -> None:
+    user_id = await create_user()
+    token = create_jwt_token(user_id, get_settings())
+    counter = RoundTripCounter()
+    results: dict[str, dict[str, Any]] = {}
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={"access_token": token},
+        ) as client:
+            # Load the duplicate index, or the first write starts loading it
+            (await client.get("/prompts/duplicates")).raise_for_status()
+
+            counter.reset()
+            response = await client.post(
+                "/prompts", json={"title": "Bench", "content": "Round trip bench"}
+            )
+            response.raise_for_status()
+            prompt_id = response.json()["id"]
+            results["POST /prompts"] = counter.reset()
+
+            (await client.get("/prompts")).raise_for_status()
+            results["GET /prompts"] = counter.reset()
+
+            (await client.get(f"/prompts/{prompt_id}")).raise_for_status()
+            results["GET /prompts/{id}"] = counter.reset()
+
+            response = await client.put(
+                f"/prompts/{prompt_id}",
+                json={"title": "Bench 2", "content": "Round trip bench"},
+            )
+            response.raise_for_status()
+            results["PUT /prompts/{id}"] = counter.reset()
+
+            (await client.delete(f"/prompts/{prompt_id}")).raise_for_status()
+            results["DELETE /prompts/{id}"] = counter.reset()
+    finally:
+        await delete_users([user_id])
+        await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Compare GET /prompts?q= latency of the Postgres and BM25 search backends.
+
+Seeds one user with synthetic prompts, then runs the same searches through
+the real ASGI app with each backend swapped in and the list cache disabled.
+The BM25 index is built by the first search, which is reported separately.
+Needs a migrated database:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.search_backends \
+        [--prompts 10000] [--queries 200]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+from app.cache import ResponseCache
+from app.config import get_settings
+from app.db import engine
+from app.main import app
+from app.routers import prompts as prompts_router
+from app.routers.auth import create_jwt_token
+from app.search import BM25Search, PostgresSearch, TermIndexes
+from benchmarks.seeding import create_user, delete_users, insert_prompts
+
+STEMS = ("summar", "translat", "analy", "refactor", "explain", "review", "generat", "extract")
+SUFFIXES = ("", "y", "ize", "ization", "ing", "ed", "er", "s")
+# Shared stems give prefix searches several terms to expand to
+WORDS = [stem + suffix for stem in STEMS for suffix in SUFFIXES]
+FILLER = [f"term{i}" for i in range(2000)]
+
+
+async def seed(user_id, count: int, rng: random.Random) -> None:
+    """Insert count prompts built from WORDS, so every search has matches."""
+    rows = [
+        {
+            "user_id": user_id,
+            "title": " ".join(rng.choices(WORDS, k=3)),
+            "content": " ".join(rng.choices(WORDS + FILLER, k=80)),
+            "category": rng.choice(["writing", "code", "data"]),
+            "tags": rng.sample(WORDS, 2),
+        }
+        for _ in range(count)
+    ]
+    await insert_prompts(user_id, rows)
+
+
+def make_queries(count: int, rng: random.Random) -> list[str]:
+    """Mix of one-word, two-word and prefix searches."""
+    queries = []
+    for i in range(count):
+        if i % 3 == 0:
+            queries.append(rng.choice(WORDS))
+        elif i % 3 == 1:
+            queries.append(" ".join(rng.sample(WORDS, 2)))
+        else:
+            queries.append(rng.choice(WORDS)[:4])
+    return queries
+
+
+async def run(client: httpx.AsyncClient, queries: list[str]) -> dict[str, float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        response = await client.get("/prompts", params={"q": query, "limit": 20})
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "p50_ms": round(cuts[49] * 1e3, 2),
+        "p95_ms": round(cuts[94] * 1e3, 2),
+        "p99_ms": round(cuts[98] * 1e3, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    rng = random.Random(0)
+    user_id = await create_user()
+    try:
+        await seed(user_id, args.prompts, rng)
+        queries = make_queries(args.queries, rng)
+
+        # Every request must reach the backend
+        prompts_router.list_cache = ResponseCache(0, 0)
+        backends = {
+            "postgres": PostgresSearch(),
+            "bm25": BM25Search(
+                TermIndexes(settings.search_index_max_prompts), settings.search_candidates
+            ),
+        }
+        results: dict[str, dict] = {"prompts": args.prompts, "queries": args.queries}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={"access_token": create_jwt_token(user_id, settings)},
+        ) as client:
+            for name, backend in backends.items():
+                prompts_router.search_backend = backend
+                start = time.perf_counter()
+                (await client.get("/prompts", params={"q": WORDS[0]})).raise_for_status()
+                results[name] = {
+                    "first_search_ms": round((time.perf_counter() - start) * 1e3, 2),
+                    **await run(client, queries),
+                }
+    finally:
+        await delete_users([user_id])
+        await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Synthetic tenants for benchmarks.
+
+Users are inserted directly (the users table has no RLS); prompts go in as
+multi-row INSERTs of BATCH_SIZE rows through each owner's RLS session,
+since COPY is not available on RLS-protected tables. Benchmarks remove
+their users with delete_users when they finish. Sizes and
+distributions aim at real libraries: content length is log-normal
+(median ~90 words), categories and tags are skewed so a few are common
+and most are rare, and some prompts have no category or tags.
+"""
+import random
+import uuid
+from typing import Any
+
+from sqlalchemy import delete, insert
+
+from app.db import async_session_factory, rls_session
+from app.models.prompt import Prompt
+from app.models.user import User
+
+BATCH_SIZE = 1000
+
+CATEGORIES = (
+    "writing", "coding", "analysis", "marketing", "education",
+    "research", "support", "design", "legal", "finance",
+)
+CATEGORY_WEIGHTS = (30, 25, 15, 10, 8, 6, 4, 3, 2, 1)
+# Share of prompts without a category
+UNCATEGORIZED = 0.1
+
+WORDS = (
+    "summarize explain rewrite translate review refactor generate analyze draft "
+    "outline compare classify extract improve simplify debug document test plan "
+    "email report article blog post story essay code function query dataset table "
+    "chart customer product campaign lesson student research paper abstract contract "
+    "policy budget forecast design interface component api endpoint schema migration "
+    "tone style audience format bullet points step steps example examples context "
+    "concise detailed friendly formal technical creative clear short long list"
+).split()
+TAG_VOCABULARY = tuple(f"{word}-{suffix}" for suffix in ("a", "b", "c", "d") for word in WORDS[:50])
+TAG_COUNT_WEIGHTS = (10, 25, 30, 20, 10, 5)
+
+
+def _zipf_weights(count: int) -> list[float]:
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+_WORD_WEIGHTS = _zipf_weights(len(WORDS))
+_TAG_WEIGHTS = _zipf_weights(len(TAG_VOCABULARY))
+
+
+def make_prompt(user_id: uuid.UUID, rng: random.Random) -> dict[str, Any]:
+    """Return the values of one synthetic prompt, with a client-side id."""
+    length = min(max(int(rng.lognormvariate(4.5, 0.8)), 5), 1500)
+    tag_count = rng.choices(range(len(TAG_COUNT_WEIGHTS)), TAG_COUNT_WEIGHTS)[0]
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "title": " ".join(rng.choices(WORDS, _WORD_WEIGHTS, k=rng.randint(3, 8))).capitalize(),
+        "content": " ".join(rng.choices(WORDS, _WORD_WEIGHTS, k=length)),
+        "category": (
+            None if rng.random() < UNCATEGORIZED else rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+        ),
+        "tags": sorted(set(rng.choices(TAG_VOCABULARY, _TAG_WEIGHTS, k=tag_count))),
+    }
+
+
+async def create_users(count: int) -> list[uuid.UUID]:
+    """Insert count throwaway users in one statement."""
+    async with async_session_factory() as db:
+        result = await db.execute(
+            insert(User)
+            .values(
+                [
+                    {"google_id": f"bench-{uuid.uuid4()}", "email": f"bench-{i}@example.com"}
+                    for i in range(count)
+                ]
+            )
+            .returning(User.id)
+        )
+        user_ids = list(result.scalars())
+        await db.commit()
+    return user_ids
+
+
+async def create_user() -> uuid.UUID:
+    """Insert a throwaway user to own benchmark prompts."""
+    [user_id] = await create_users(1)
+    return user_id
+
+
+async def insert_prompts(user_id: uuid.UUID, rows: list[dict[str, Any]]) -> None:
+    """Bulk insert prompt values owned by user_id, one commit per batch."""
+    async with rls_session(user_id) as db:
+        for start in range(0, len(rows), BATCH_SIZE):
+            await db.execute(insert(Prompt).values(rows[start:start + BATCH_SIZE]))
+            await db.commit()
+
+
+async def delete_users(user_ids: list[uuid.UUID]) -> None:
+    """Remove benchmark users; everything they own cascades."""
+    async with async_session_factory() as db:
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def seed_tenants(
+    users: int, prompts_per_user: int, rng: random.Random
+) -> dict[uuid.UUID, list[uuid.UUID]]:
+    """Create users with synthetic prompts; returns each user's prompt ids."""
+    tenants = {}
+    for user_id in await create_users(users):
+        rows = [make_prompt(user_id, rng) for _ in range(prompts_per_user)]
+        await insert_prompts(user_id, rows)
+        tenants[user_id] = [row["id"] for row in rows]
+    return tenants
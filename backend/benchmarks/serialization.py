@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Compare list serialization paths for a 100-row page.
+
+"orm" mirrors the previous list_prompts: ORM instances, PromptResponse per
+row, then FastAPI re-validating the PromptsListResponse through
+response_model. "core" mirrors the current one: Core rows zipped into dicts
+and encoded once with orjson. No database is needed:
+
+    python -m benchmarks.serialization [--rows 100] [--iterations 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.prompt import Prompt
+from app.responses import FastJSONResponse
+from app.routers.prompts import RESPONSE_FIELDS
+from app.schemas.prompt import PromptResponse, PromptsListResponse
+
+CONTENT = "Summarize the following text in three bullet points. " * 20
+
+
+def make_rows(count: int) -> list[tuple]:
+    """Build tuples shaped like a RESPONSE_COLUMNS row."""
+    now = datetime.now(timezone.utc)
+    user_id = uuid.uuid4()
+    return [
+        (uuid.uuid4(), user_id, f"Prompt {i}", CONTENT, "writing", ["a", "b"], now, now)
+        for i in range(count)
+    ]
+
+
+async def orm_path(rows: list[tuple], field) -> bytes:
+    prompts = [Prompt(**dict(zip(RESPONSE_FIELDS, row))) for row in rows]
+    content = PromptsListResponse(
+        prompts=[PromptResponse.model_validate(p) for p in prompts],
+        total=len(rows),
+        limit=len(rows),
+        offset=0,
+    )
+    encoded = await serialize_response(field=field, response_content=content)
+    return json.dumps(encoded).encode()
+
+
+async def core_path(rows: list[tuple], field) -> bytes:
+    return FastJSONResponse(
+        {
+            "prompts": [dict(zip(RESPONSE_FIELDS, row)) for row in rows],
+            "total": len(rows),
+            "total_kind": "exact",
+            "limit": len(rows),
+            "offset": 0,
+            "next_cursor": None,
+        }
+    ).body
+
+
+async def measure(path, rows: list[tuple], iterations: int) -> dict[str, float]:
+    field = create_response_field(name="response", type_=PromptsListResponse)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await path(rows, field)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await path(rows, field)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "us_per_request": round(elapsed / iterations * 1e6, 1),
+        "peak_alloc_kib": round(peak / 1024, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {
+        "rows": args.rows,
+        "orm": await measure(orm_path, rows, args.iterations),
+        "core": await measure(core_path, rows, args.iterations),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Measure top-k similarity latency of the in-memory vector index.
+
+Fills a UserVectors index with random unit vectors at each size, then times
+single-query search (as GET /prompts/{id}/similar does) and batched search
+of several queries with one matrix product. No database is needed:
+
+    python -m benchmarks.vector_search [--sizes 10000,100000,1000000] [--k 10]
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+import numpy as np
+
+from app.embeddings import EMBEDDING_DIM, EMBEDDING_DTYPE
+from app.vector_index import UserVectors
+
+
+def random_unit_vectors(count: int, rng: np.random.Generator) -> np.ndarray:
+    vectors = rng.standard_normal((count, EMBEDDING_DIM)).astype(EMBEDDING_DTYPE)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_index(count: int, rng: np.random.Generator) -> tuple[UserVectors, float]:
+    index = UserVectors()
+    vectors = random_unit_vectors(count, rng)
+    start = time.perf_counter()
+    for vector in vectors:
+        index.upsert(uuid.uuid4(), vector)
+    return index, time.perf_counter() - start
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "p50_ms": round(cuts[49] * 1e3, 3),
+        "p95_ms": round(cuts[94] * 1e3, 3),
+        "p99_ms": round(cuts[98] * 1e3, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        index, build_seconds = build_index(size, rng)
+        queries = random_unit_vectors(args.queries, rng)
+
+        single = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k)
+            single.append(time.perf_counter() - start)
+
+        batched = []
+        for start_row in range(0, args.queries, args.batch):
+            batch = queries[start_row:start_row + args.batch]
+            start = time.perf_counter()
+            index.search_many(batch, args.k)
+            batched.append((time.perf_counter() - start) / len(batch))
+
+        results.append(
+            {
+                "vectors": size,
+                "matrix_mib": round(index.matrix.nbytes / 2**20, 1),
+                "build_s": round(build_seconds, 2),
+                "single": percentiles(single),
+                "batched_per_query": percentiles(batched) if len(batched) > 1 else None,
+            }
+        )
+
+    print(json.dumps({"dim": EMBEDDING_DIM, "k": args.k, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
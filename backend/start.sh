@@ -7,6 +7,17 @@ echo "Starting backend service..."
 echo "Running database migrations..."
 python run_migrations.py
 
-# Start the application with hot-reload
-echo "Starting uvicorn server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+# Development: single process with hot-reload
+if [ "${RELOAD:-false}" = "true" ]; then
+    echo "Starting uvicorn server with hot-reload..."
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+fi
+
+# Production: workers share metrics through snapshot files; drop the ones
+# left by a previous run, whose counters would otherwise still be reported
+export METRICS_DIR="${METRICS_DIR:-/tmp/prompt-library-metrics}"
+mkdir -p "$METRICS_DIR"
+rm -f "$METRICS_DIR"/*.json "$METRICS_DIR"/*.tmp
+
+echo "Starting production server..."
+exec python -m app.server
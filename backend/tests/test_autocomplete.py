@@ -0,0 +1,89 @@
+"""Autocomplete cache lookups and single-flight sharing."""
+import asyncio
+import uuid
+
+import pytest
+
+from app import autocomplete as module
+from app.autocomplete import autocomplete, autocomplete_cache, prefix_pattern
+from app.cache import TTLCache
+
+USER = uuid.uuid4()
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(module, "autocomplete_cache", TTLCache(100, 60))
+    yield module.autocomplete_cache
+
+
+def test_prefix_pattern_escapes_like_wildcards():
+    assert prefix_pattern("50%_a\\") == "50\\%\\_a\\\\%"
+
+
+def test_narrower_prefix_served_from_complete_broader_result(fresh_cache):
+    fresh_cache.set((USER, "tags", 1, "co"), (["code", "Coding", "copy"], True))
+
+    assert module._from_cache((USER, "tags", 1, "cod"), 20) == ["code", "Coding"]
+    assert fresh_cache.stats()["hits"] == 1
+    assert fresh_cache.stats()["misses"] == 0
+
+
+def test_miss_is_counted_once_however_many_prefixes_are_tried(fresh_cache):
+    fresh_cache.set((USER, "tags", 1, "c"), (["code"] * 20, False))
+
+    assert module._from_cache((USER, "tags", 1, "codin"), 20) is None
+    assert module._from_cache((USER, "tags", 1, "xyz"), 20) is None
+    assert fresh_cache.stats()["hits"] == 0
+    assert fresh_cache.stats()["misses"] == 2
+
+
+async def test_shared_query_runs_on_its_own_session(monkeypatch):
+    sessions = []
+
+    class Session:
+        pass
+
+    class RlsSession:
+        def __init__(self, user_id):
+            self.session = Session()
+
+        async def __aenter__(self):
+            sessions.append(self.session)
+            return self.session
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(module, "rls_session", RlsSession)
+    started = asyncio.Event()
+    release = asyncio.Event()
+    used = []
+
+    async def fetch(db):
+        used.append(db)
+        started.set()
+        await release.wait()
+        return ["code"]
+
+    callers = [FakeSession(), FakeSession()]
+    first = asyncio.create_task(autocomplete("tags", USER, 1, "c", 20, callers[0], fetch))
+    await started.wait()
+    second = asyncio.create_task(autocomplete("tags", USER, 1, "c", 20, callers[1], fetch))
+    await asyncio.sleep(0)
+
+    # The first caller going away leaves the shared query running
+    first.cancel()
+    release.set()
+
+    assert await second == ["code"]
+    assert used == sessions and len(sessions) == 1
+    assert all(caller.closed for caller in callers)
@@ -0,0 +1,77 @@
+"""In-memory BM25 index."""
+from uuid import uuid4
+
+from app.bm25 import MIN_COMPACT_SLOTS, UserTermIndex, document_terms, tokenize
+
+
+def build(*prompts):
+    index = UserTermIndex()
+    ids = []
+    for title, content, tags in prompts:
+        prompt_id = uuid4()
+        index.upsert(prompt_id, document_terms(title, content, tags))
+        ids.append(prompt_id)
+    return index, ids
+
+
+def test_tokenize_case_folds_words():
+    assert tokenize("Rewrite THIS e-mail, please!") == ["rewrite", "this", "e", "mail", "please"]
+
+
+def test_fields_are_weighted():
+    terms = document_terms("email", "email email", ["email"])
+    assert terms == {"email": 1.0 + 0.4 + 0.2 * 2}
+
+
+def test_search_requires_every_word():
+    index, (both, only_email) = build(
+        ("Rewrite email", "Make the email friendlier", None),
+        ("Email draft", "Draft a reply", None),
+    )
+    assert [prompt_id for prompt_id, _ in index.search("rewrite email", 10)] == [both]
+    assert {prompt_id for prompt_id, _ in index.search("email", 10)} == {both, only_email}
+    assert index.search("invoice", 10) == []
+
+
+def test_title_match_ranks_first():
+    index, (in_title, in_content) = build(
+        ("Translate", "Turn text into French", None),
+        ("French helper", "Translate the text", None),
+    )
+    assert [prompt_id for prompt_id, _ in index.search("translate", 10)] == [in_title, in_content]
+
+
+def test_last_word_matches_as_prefix():
+    index, (summary, _) = build(
+        ("Summarize meeting", "Notes", None),
+        ("Sum numbers", "Add them", None),
+    )
+    assert [prompt_id for prompt_id, _ in index.search("summ", 10)] == [summary]
+
+
+def test_upsert_replaces_and_remove_drops():
+    index, (prompt_id,) = build(("Old title", "Old content", None))
+    index.upsert(prompt_id, document_terms("New title", "New content", None))
+    assert index.search("old", 10) == []
+    assert [found for found, _ in index.search("new", 10)] == [prompt_id]
+
+    index.remove(prompt_id)
+    assert index.search("new", 10) == []
+    assert len(index) == 0
+
+
+def test_compaction_keeps_live_prompts_searchable():
+    index, ids = build(*[(f"Prompt {i}", "shared words", None) for i in range(MIN_COMPACT_SLOTS * 3)])
+    for prompt_id in ids[: MIN_COMPACT_SLOTS * 2 + 1]:
+        index.remove(prompt_id)
+
+    survivors = set(ids[MIN_COMPACT_SLOTS * 2 + 1:])
+    # Compacted once dead slots outnumbered live ones
+    assert len(index.slot_ids) < len(ids)
+    assert len(index) == len(survivors)
+    assert {prompt_id for prompt_id, _ in index.search("shared", len(ids))} == survivors
+
+
+def test_limit_keeps_best_matches():
+    index, ids = build(*[("Task", "task " * (i + 1), None) for i in range(20)])
+    assert len(index.search("task", 5)) == 5
@@ -0,0 +1,46 @@
+"""Streaming NDJSON / JSON-array parsing for bulk imports."""
+from app.bulk import iter_json_records
+
+
+async def parse(*chunks: bytes, max_record_chars: int = 1000) -> list:
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [record async for record in iter_json_records(stream(), max_record_chars)]
+
+
+async def test_ndjson_fails_only_malformed_lines():
+    records = await parse(b'{"a": 1}\n\nnot json\n{"a": 2}')
+    assert [(i, r) for i, r, _ in records] == [(0, {"a": 1}), (1, None), (2, {"a": 2})]
+    assert records[1][2].startswith("Malformed JSON")
+
+
+async def test_array_split_across_chunks():
+    records = await parse(b' [{"a": ', b'1}, 2', b'3, "x"', b"]\n")
+    assert records == [(0, {"a": 1}, None), (1, 23, None), (2, "x", None)]
+
+
+async def test_empty_array():
+    assert await parse(b"[ ]") == []
+
+
+async def test_array_with_trailing_comma_stops():
+    records = await parse(b"[1, 2,]")
+    assert [r for _, r, _ in records[:2]] == [1, 2]
+    assert records[2][1] is None and records[2][2].startswith("Malformed JSON")
+
+
+async def test_unterminated_array_stops():
+    records = await parse(b"[1, 2")
+    assert records[-1] == (2, None, "Malformed JSON: unterminated array; import stopped")
+
+
+async def test_data_after_the_array_is_an_error():
+    records = await parse(b"[1]\n", b"  ", b"[2]")
+    assert records == [(0, 1, None), (1, None, "Malformed JSON: unexpected data after the array")]
+
+
+async def test_oversized_ndjson_record_stops():
+    records = await parse(b'{"a": "' + b"x" * 50, b"x" * 50, max_record_chars=64)
+    assert records == [(0, None, "Record exceeds maximum size")]
@@ -0,0 +1,63 @@
+"""Response body caching by owner generation."""
+from app.cache import ResponseCache
+
+
+def test_hit_and_miss():
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+    cache.set(("u", 1, "list"), b"body")
+    assert cache.get(("u", 1, "list")) == b"body"
+    assert cache.get(("u", 1, "other")) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "bytes": 4}
+
+
+def test_newer_generation_drops_the_owners_older_entries():
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+    cache.set(("u", 1, "a"), b"a1")
+    cache.set(("u", 1, "b"), b"b1")
+    cache.set(("v", 1, "a"), b"v1")
+    cache.set(("u", 2, "a"), b"a2")
+    assert cache.get(("u", 1, "a")) is None
+    assert cache.get(("u", 1, "b")) is None
+    assert cache.get(("u", 2, "a")) == b"a2"
+    assert cache.get(("v", 1, "a")) == b"v1"
+    assert cache.bytes == 4
+
+
+def test_older_generation_is_not_stored():
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+    cache.set(("u", 2, "a"), b"new")
+    cache.set(("u", 1, "a"), b"old")
+    assert cache.get(("u", 1, "a")) is None
+    assert cache.get(("u", 2, "a")) == b"new"
+
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+    cache.set(("u", 1, "a"), b"12345")
+    cache.set(("u", 1, "a"), b"12")
+    assert cache.stats()["size"] == 1
+    assert cache.bytes == 2
+
+
+def test_evicts_least_recently_used_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=1000)
+    cache.set(("u", 1, "a"), b"a")
+    cache.set(("u", 1, "b"), b"b")
+    cache.get(("u", 1, "a"))
+    cache.set(("u", 1, "c"), b"c")
+    assert cache.get(("u", 1, "b")) is None
+    assert cache.get(("u", 1, "a")) == b"a"
+
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    for name in "abcde":
+        cache.set(("u", 1, name), name.encode() * 25)
+    assert cache.bytes == 100
+    assert cache.get(("u", 1, "a")) is None
+    assert cache.get(("u", 1, "e")) is not None
+
+
+def test_skips_bodies_over_a_quarter_of_the_budget():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set(("u", 1, "a"), b"x" * 26)
+    assert cache.get(("u", 1, "a")) is None
+    assert cache.bytes == 0
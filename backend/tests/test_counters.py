@@ -0,0 +1,71 @@
+"""Tag and category counters maintained by the prompt triggers.
+
+Needs TEST_DATABASE_URL like test_rls; skipped otherwise.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.db import RLS_USER_ID_KEY
+from app.models.prompt import Prompt
+from app.models.tag_counts import UserCategoryCount, UserTagCount
+from app.models.user import User
+from tests.conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+async def user_id(sessions):
+    async with sessions() as db:
+        result = await db.execute(
+            insert(User)
+            .values(google_id=f"counters-test-{uuid.uuid4()}", email="counters-test@example.com")
+            .returning(User.id)
+        )
+        user_id = result.scalar_one()
+        await db.commit()
+
+    yield user_id
+
+    async with sessions() as db:
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+async def counts(db) -> tuple[dict[str, int], dict[str, int]]:
+    tags = await db.execute(select(UserTagCount.tag, UserTagCount.count))
+    categories = await db.execute(select(UserCategoryCount.category, UserCategoryCount.count))
+    return dict(tags.tuples().all()), dict(categories.tuples().all())
+
+
+async def test_counters_follow_multi_row_writes(sessions, user_id):
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        result = await db.execute(
+            insert(Prompt)
+            .values(
+                [
+                    {"user_id": user_id, "title": "One", "content": "Text", "tags": ["b", "a"], "category": "x"},
+                    {"user_id": user_id, "title": "Two", "content": "Text", "tags": ["a", "c"], "category": "x"},
+                    {"user_id": user_id, "title": "Three", "content": "Text", "tags": ["c", "b"], "category": None},
+                ]
+            )
+            .returning(Prompt.id)
+        )
+        one, two, three = result.scalars()
+        assert await counts(db) == ({"a": 2, "b": 2, "c": 2}, {"x": 2})
+
+        await db.execute(
+            update(Prompt).where(Prompt.id.in_([one, two])).values(tags=["d"], category="y")
+        )
+        assert await counts(db) == ({"b": 1, "c": 1, "d": 2}, {"y": 2})
+
+        # Keeps the keys: a zero delta
+        await db.execute(update(Prompt).where(Prompt.id == three).values(title="Renamed"))
+        assert await counts(db) == ({"b": 1, "c": 1, "d": 2}, {"y": 2})
+
+        await db.execute(delete(Prompt).where(Prompt.id.in_([two, three])))
+        assert await counts(db) == ({"d": 1}, {"y": 1})
+        await db.commit()
@@ -0,0 +1,26 @@
+"""If-None-Match comparison against library ETags."""
+from app.dependencies import _etag_matches
+
+ETAG = 'W/"3f2a"'
+
+
+def test_matches_the_same_tag():
+    assert _etag_matches(ETAG, 'W/"3f2a"')
+
+
+def test_comparison_is_weak():
+    assert _etag_matches(ETAG, '"3f2a"')
+    assert _etag_matches('"3f2a"', 'W/"3f2a"')
+
+
+def test_matches_any_tag_in_a_list():
+    assert _etag_matches(ETAG, '"0000", W/"3f2a" ,"ffff"')
+
+
+def test_wildcard_matches_anything():
+    assert _etag_matches(ETAG, " * ")
+
+
+def test_different_tags_do_not_match():
+    assert not _etag_matches(ETAG, 'W/"3f2b", "3f2"')
+    assert not _etag_matches(ETAG, "")
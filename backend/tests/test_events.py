@@ -0,0 +1,69 @@
+"""Fan-out of prompt change events to stream subscribers."""
+import json
+from uuid import uuid4
+
+from app.events import CLOSED, RESYNC_EVENT, ChangeFeed, _event_payload
+
+
+def drain(queue) -> list:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_delivers_only_to_the_users_subscribers():
+    feed = ChangeFeed(queue_size=10)
+    alice, bob = uuid4(), uuid4()
+    first, second, other = feed.subscribe(alice), feed.subscribe(alice), feed.subscribe(bob)
+
+    feed.on_notification(_event_payload(alice, "created", {"id": "p1"}))
+
+    assert drain(first) == drain(second) == [{"type": "created", "id": "p1"}]
+    assert drain(other) == []
+
+
+def test_unsubscribe_forgets_empty_users():
+    feed = ChangeFeed(queue_size=10)
+    alice = uuid4()
+    first, second = feed.subscribe(alice), feed.subscribe(alice)
+    assert feed.stats() == {"users": 1, "subscribers": 2}
+
+    feed.unsubscribe(alice, first)
+    feed.on_notification(_event_payload(alice, "deleted", {}))
+    assert drain(first) == []
+    assert drain(second) == [{"type": "deleted"}]
+
+    feed.unsubscribe(alice, second)
+    assert feed.stats() == {"users": 0, "subscribers": 0}
+
+
+def test_subscriber_that_falls_behind_gets_a_resync():
+    feed = ChangeFeed(queue_size=2)
+    alice = uuid4()
+    queue = feed.subscribe(alice)
+    for n in range(3):
+        feed.on_notification(json.dumps({"user_id": str(alice), "type": "updated", "n": n}))
+
+    assert drain(queue) == [RESYNC_EVENT]
+
+
+def test_resync_all_reaches_every_subscriber():
+    feed = ChangeFeed(queue_size=10)
+    queues = [feed.subscribe(uuid4()), feed.subscribe(uuid4())]
+    feed.resync_all()
+    assert [drain(queue) for queue in queues] == [[RESYNC_EVENT], [RESYNC_EVENT]]
+
+
+def test_close_ends_current_and_later_streams():
+    feed = ChangeFeed(queue_size=10)
+    alice = uuid4()
+    queue = feed.subscribe(alice)
+    feed.on_notification(_event_payload(alice, "created", {}))
+
+    feed.close()
+    feed.on_notification(_event_payload(alice, "created", {}))
+    feed.resync_all()
+
+    assert drain(queue) == [CLOSED]
+    assert drain(feed.subscribe(alice)) == [CLOSED]
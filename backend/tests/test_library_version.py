@@ -0,0 +1,77 @@
+"""Library version counter: bumped once per writing transaction, at commit.
+
+Needs TEST_DATABASE_URL like test_rls; skipped otherwise.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.db import RLS_USER_ID_KEY
+from app.models.library_version import LibraryVersion
+from app.models.prompt import Prompt
+from app.models.user import User
+from tests.conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+async def user_id(sessions):
+    async with sessions() as db:
+        result = await db.execute(
+            insert(User)
+            .values(google_id=f"version-test-{uuid.uuid4()}", email="version-test@example.com")
+            .returning(User.id)
+        )
+        user_id = result.scalar_one()
+        await db.commit()
+
+    yield user_id
+
+    async with sessions() as db:
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+async def library_version(sessions, user_id: uuid.UUID) -> int | None:
+    async with sessions() as db:
+        result = await db.execute(
+            select(LibraryVersion.version).where(LibraryVersion.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+
+def new_prompt(user_id: uuid.UUID):
+    return insert(Prompt).values(user_id=user_id, title="Prompt", content="Text").returning(Prompt.id)
+
+
+async def test_each_transaction_bumps_the_version_once(sessions, user_id):
+    assert await library_version(sessions, user_id) is None
+
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        prompt_id = (await db.execute(new_prompt(user_id))).scalar_one()
+        await db.execute(update(Prompt).where(Prompt.id == prompt_id).values(title="Renamed"))
+        await db.execute(new_prompt(user_id))
+        await db.commit()
+    assert await library_version(sessions, user_id) == 1
+
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        await db.execute(delete(Prompt).where(Prompt.id == prompt_id))
+        await db.commit()
+    assert await library_version(sessions, user_id) == 2
+
+
+async def test_concurrent_writers_only_wait_for_each_others_commit(sessions, user_id):
+    async with sessions() as first, sessions() as second:
+        first.info[RLS_USER_ID_KEY] = second.info[RLS_USER_ID_KEY] = str(user_id)
+        await first.execute(new_prompt(user_id))
+        # Would wait for the first transaction if the write locked a shared row
+        await asyncio.wait_for(second.execute(new_prompt(user_id)), timeout=5)
+        await first.commit()
+        await second.commit()
+
+    assert await library_version(sessions, user_id) == 2
@@ -0,0 +1,87 @@
+"""Metrics snapshots, merging across workers and rendering."""
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import (
+    LATENCY_BUCKETS,
+    STATEMENT_START_KEY,
+    Registry,
+    merge,
+    render,
+    time_statements,
+)
+
+LABELS = (("route", "/prompts"), ("method", "GET"), ("status", "200"))
+
+
+def worker_snapshot(requests: int, latency: float, checked_out: int) -> dict:
+    registry = Registry()
+    registry.inc("http_requests_total", LABELS, requests)
+    for _ in range(requests):
+        registry.observe("http_request_duration_seconds", LABELS[:2], LATENCY_BUCKETS, latency)
+    snapshot = registry.snapshot()
+    snapshot["gauges"].append(["db_pool_checked_out", (), checked_out])
+    return snapshot
+
+
+def test_merge_sums_counters_histograms_and_gauges():
+    merged = merge([worker_snapshot(3, 0.02, 1), worker_snapshot(2, 0.3, 4)], stale_after=60)
+
+    assert merged["counters"][("http_requests_total", LABELS)] == 5
+    assert merged["gauges"][("db_pool_checked_out", ())] == 5
+    histogram = merged["histograms"][("http_request_duration_seconds", LABELS[:2])]
+    assert sum(histogram.counts) == 5
+    assert histogram.sum == pytest.approx(3 * 0.02 + 2 * 0.3)
+
+
+def test_merge_drops_gauges_of_stale_workers_but_keeps_counters():
+    stale = worker_snapshot(4, 0.01, 7)
+    stale["time"] = time.time() - 120
+    merged = merge([stale, worker_snapshot(1, 0.01, 2)], stale_after=15)
+
+    assert merged["counters"][("http_requests_total", LABELS)] == 5
+    assert merged["gauges"][("db_pool_checked_out", ())] == 2
+
+
+def test_merge_accepts_json_decoded_labels():
+    snapshot = worker_snapshot(1, 0.01, 0)
+    # orjson turns label tuples into lists
+    snapshot["counters"] = [[name, [list(pair) for pair in labels], value]
+                            for name, labels, value in snapshot["counters"]]
+    merged = merge([snapshot], stale_after=60)
+    assert merged["counters"][("http_requests_total", LABELS)] == 1
+
+
+def test_render_cumulates_buckets():
+    text = render(merge([worker_snapshot(2, 0.02, 0), worker_snapshot(1, 0.3, 0)], stale_after=60))
+
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_request_duration_seconds_bucket{route="/prompts",method="GET",le="0.025"} 2' in text
+    assert 'http_request_duration_seconds_bucket{route="/prompts",method="GET",le="+Inf"} 3' in text
+    assert 'http_request_duration_seconds_count{route="/prompts",method="GET"} 3' in text
+    assert 'http_requests_total{route="/prompts",method="GET",status="200"} 3.0' in text
+
+
+def test_render_escapes_label_values():
+    merged = merge([], stale_after=60)
+    merged["counters"][("http_requests_total", (("route", 'a"b\\c'),))] = 1
+    assert 'http_requests_total{route="a\\"b\\\\c"} 1.0' in render(merged)
+
+
+def test_statements_are_timed_once_and_failures_leave_no_start_time():
+    engine = create_engine("sqlite://")
+    observed = []
+    time_statements(engine, [lambda conn, statement, *rest: observed.append(statement)])
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 2"))
+
+        assert observed == ["SELECT 1", "SELECT 2"]
+        assert conn.connection.info[STATEMENT_START_KEY] == {}
+    engine.dispose()
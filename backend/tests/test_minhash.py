@@ -0,0 +1,56 @@
+"""MinHash signatures, LSH bands and the per-user duplicate index."""
+from uuid import uuid4
+
+import numpy as np
+
+from app.dedup import UserSignatures
+from app.minhash import BANDS, NUM_PERM, bands, from_bytes, signature, similarity, to_bytes
+
+TEXT = (
+    "Summarize the following customer support conversation in three bullet "
+    "points, then list any follow-up actions the agent promised and who owns them."
+)
+
+
+def test_signature_is_deterministic():
+    assert np.array_equal(signature("Title", TEXT), signature("Title", TEXT))
+    assert signature("Title", TEXT).shape == (NUM_PERM,)
+
+
+def test_identical_text_is_fully_similar():
+    assert similarity(signature("Title", TEXT), signature("title", TEXT.upper())) == 1.0
+
+
+def test_near_duplicate_scores_above_unrelated_text():
+    original = signature("Support summary", TEXT)
+    edited = signature("Support summary", TEXT.replace("three", "four"))
+    unrelated = signature("Haiku", "Write a haiku about autumn leaves falling on a quiet pond")
+    assert similarity(original, edited) > 0.6
+    assert similarity(original, unrelated) < 0.1
+
+
+def test_signature_survives_bytes_round_trip():
+    sig = signature("Title", TEXT)
+    assert np.array_equal(from_bytes(to_bytes(sig)), sig)
+
+
+def test_bands_split_the_signature():
+    keys = list(bands(signature("Title", TEXT)))
+    assert len(keys) == BANDS
+    assert len(set(map(len, keys))) == 1
+
+
+def test_index_finds_near_duplicates_only():
+    index = UserSignatures(threshold=0.5)
+    original, copy, other = uuid4(), uuid4(), uuid4()
+    index.upsert(original, signature("Support summary", TEXT))
+    index.upsert(copy, signature("Support summary", TEXT.replace("three", "four")))
+    index.upsert(other, signature("Haiku", "Write a haiku about autumn leaves on a quiet pond"))
+
+    matches = index.query(signature("Support summary", TEXT), exclude=original)
+    assert [prompt_id for prompt_id, _ in matches] == [copy]
+    assert index.clusters() == [[original, copy]] or index.clusters() == [[copy, original]]
+
+    index.remove(copy)
+    assert index.query(signature("Support summary", TEXT), exclude=original) == []
+    assert len(index) == 2
@@ -0,0 +1,57 @@
+"""Keyset cursors and sync tokens."""
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import (
+    ORDER_RANK,
+    ORDER_UPDATED,
+    decode_cursor,
+    decode_sync_token,
+    encode_cursor,
+    encode_sync_token,
+)
+
+
+def test_updated_cursor_round_trips():
+    key = datetime(2026, 2, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(ORDER_UPDATED, key, row_id), ORDER_UPDATED) == (key, row_id)
+
+
+def test_rank_cursor_round_trips():
+    row_id = uuid4()
+    cursor = encode_cursor(ORDER_RANK, 0.0607927, row_id)
+    assert decode_cursor(cursor, ORDER_RANK) == (0.0607927, row_id)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(ORDER_UPDATED, datetime.now(timezone.utc), uuid4())
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+def test_cursor_of_another_order_is_rejected():
+    cursor = encode_cursor(ORDER_RANK, 0.5, uuid4())
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, ORDER_UPDATED)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", "eyJvIjoidXBkYXRlZCJ9"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, ORDER_UPDATED)
+    assert exc.value.status_code == 400
+
+
+def test_sync_token_round_trips():
+    assert decode_sync_token(encode_sync_token(123456789, 7)) == (123456789, 7)
+
+
+@pytest.mark.parametrize("token", ["", "12", "a.b", "1.2.3"])
+def test_malformed_sync_token_is_rejected(token):
+    with pytest.raises(HTTPException) as exc:
+        decode_sync_token(token)
+    assert exc.value.status_code == 400
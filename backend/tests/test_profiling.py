@@ -0,0 +1,63 @@
+"""Admin check behind the X-Profile header."""
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import jwt
+import pytest
+
+from app import profiling
+from app.config import Settings
+from app.profile_cache import profile_cache
+from app.profiling import _is_admin
+from app.routers.auth_general import UserProfile
+from app.token_cache import token_cache
+
+SETTINGS = Settings(database_url="postgresql+asyncpg://localhost/test", admin_emails="admin@example.com")
+
+
+def scope(token: str | None = None) -> dict:
+    headers = [(b"cookie", f"access_token={token}".encode())] if token else []
+    return {"type": "http", "method": "GET", "path": "/", "headers": headers}
+
+
+def token_for(user_id) -> str:
+    payload = {"user_id": str(user_id), "exp": int(time.time()) + 3600}
+    return jwt.encode(payload, SETTINGS.jwt_secret, algorithm=SETTINGS.jwt_algorithm)
+
+
+def profile(user_id, email: str) -> UserProfile:
+    return UserProfile(
+        id=str(user_id), email=email, name=None, picture_url=None, created_at=datetime.now(timezone.utc)
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    """Every case below must be settled before any query."""
+    def refuse():
+        raise AssertionError("queried the database")
+
+    monkeypatch.setattr(profiling, "get_settings", lambda: SETTINGS)
+    monkeypatch.setattr(profiling, "async_session_factory", refuse)
+
+
+async def test_requests_without_a_valid_token_are_refused():
+    assert not await _is_admin(scope())
+    assert not await _is_admin(scope("not-a-jwt"))
+
+
+async def test_no_admins_configured(monkeypatch):
+    monkeypatch.setattr(profiling, "get_settings", lambda: Settings(database_url=SETTINGS.database_url))
+    assert not await _is_admin(scope(token_for(uuid4())))
+
+
+async def test_cached_profile_outside_the_admin_list():
+    user_id = uuid4()
+    profile_cache.set(user_id, profile(user_id, "someone@example.com"))
+    assert not await _is_admin(scope(token_for(user_id)))
+
+    # Same once the token itself is cached
+    token = token_for(user_id)
+    token_cache.store(token, user_id, time.time() + 3600)
+    assert not await _is_admin(scope(token))
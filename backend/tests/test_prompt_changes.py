@@ -0,0 +1,101 @@
+"""Change log triggers: user deletes and tombstone pruning.
+
+Needs TEST_DATABASE_URL like test_rls; skipped otherwise.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, insert, select, text, update
+
+from app.db import RLS_USER_ID_KEY
+from app.models.prompt import Prompt
+from app.models.prompt_change import PromptChange, PromptChangeHorizon
+from app.models.user import User
+from tests.conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+
+
+async def create_user(sessions) -> uuid.UUID:
+    async with sessions() as db:
+        result = await db.execute(
+            insert(User)
+            .values(google_id=f"changes-test-{uuid.uuid4()}", email="changes-test@example.com")
+            .returning(User.id)
+        )
+        user_id = result.scalar_one()
+        await db.commit()
+    return user_id
+
+
+async def create_prompts(sessions, user_id: uuid.UUID, count: int) -> list[uuid.UUID]:
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        result = await db.execute(
+            insert(Prompt)
+            .values(
+                [
+                    {"user_id": user_id, "title": f"Prompt {i}", "content": "Text", "tags": ["a", "b"]}
+                    for i in range(count)
+                ]
+            )
+            .returning(Prompt.id)
+        )
+        prompt_ids = list(result.scalars())
+        await db.commit()
+    return prompt_ids
+
+
+async def test_deleting_a_user_cascades_through_the_change_log(sessions):
+    user_id = await create_user(sessions)
+    await create_prompts(sessions, user_id, 3)
+
+    async with sessions() as db:
+        # Runs where the RLS setting reads '' after an earlier tenant's transaction
+        await db.execute(text("SELECT set_config('app.current_user_id', '', false)"))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        changes = await db.execute(select(func.count()).select_from(PromptChange))
+        assert changes.scalar_one() == 0
+
+
+async def test_expired_tombstones_are_pruned_behind_a_horizon(sessions):
+    user_id = await create_user(sessions)
+    expired, deleted_now, kept = await create_prompts(sessions, user_id, 3)
+
+    try:
+        async with sessions() as db:
+            db.info[RLS_USER_ID_KEY] = str(user_id)
+            await db.execute(delete(Prompt).where(Prompt.id == expired))
+            await db.execute(
+                update(PromptChange)
+                .where(PromptChange.prompt_id == expired)
+                .values(changed_at=func.now() - text("interval '31 days'"))
+            )
+            tombstone = (
+                await db.execute(
+                    select(PromptChange.xid, PromptChange.seq).where(
+                        PromptChange.prompt_id == expired
+                    )
+                )
+            ).one()
+            await db.commit()
+
+        async with sessions() as db:
+            db.info[RLS_USER_ID_KEY] = str(user_id)
+            await db.execute(delete(Prompt).where(Prompt.id == deleted_now))
+            await db.commit()
+
+            remaining = await db.execute(
+                select(PromptChange.prompt_id, PromptChange.deleted).order_by(PromptChange.seq)
+            )
+            assert remaining.all() == [(kept, False), (deleted_now, True)]
+            horizon = await db.execute(select(PromptChangeHorizon.xid, PromptChangeHorizon.seq))
+            assert horizon.one() == tuple(tombstone)
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
@@ -0,0 +1,20 @@
+"""orjson-rendered responses."""
+from datetime import datetime, timezone
+from uuid import UUID
+
+import orjson
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+
+from app.responses import FastJSONResponse
+
+ID = "7d5c2a3e-2f4b-4c1d-9a8e-1b2c3d4e5f60"
+
+
+def test_renders_uuids_from_asyncpg_and_python():
+    response = FastJSONResponse({"ids": [AsyncpgUUID(ID), UUID(ID)]})
+    assert orjson.loads(response.body) == {"ids": [ID, ID]}
+
+
+def test_renders_utc_datetimes_with_z():
+    response = FastJSONResponse({"at": datetime(2026, 2, 1, 12, 0, tzinfo=timezone.utc)})
+    assert orjson.loads(response.body) == {"at": "2026-02-01T12:00:00Z"}
@@ -0,0 +1,97 @@
+"""Row-Level Security isolation on the pooled engine under concurrency.
+
+Needs TEST_DATABASE_URL pointing at a migrated database, reached as a role
+that RLS applies to (not a superuser and without BYPASSRLS); skipped
+otherwise.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, insert, select, text
+
+from app.db import RLS_USER_ID_KEY
+from app.models.prompt import Prompt
+from app.models.user import User
+from tests.conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+
+PROMPTS_PER_TENANT = 5
+CONCURRENT_SESSIONS = 40
+
+CURRENT_USER_SETTING = text("SELECT current_setting('app.current_user_id', true)")
+
+
+@pytest.fixture
+async def tenants(sessions):
+    async with sessions() as db:
+        result = await db.execute(
+            insert(User)
+            .values(
+                [
+                    {"google_id": f"rls-test-{uuid.uuid4()}", "email": "rls-test@example.com"}
+                    for _ in range(2)
+                ]
+            )
+            .returning(User.id)
+        )
+        user_ids = list(result.scalars())
+        await db.commit()
+
+    for user_id in user_ids:
+        async with sessions() as db:
+            db.info[RLS_USER_ID_KEY] = str(user_id)
+            await db.execute(
+                insert(Prompt).values(
+                    [
+                        {"user_id": user_id, "title": f"Prompt {i}", "content": "Text"}
+                        for i in range(PROMPTS_PER_TENANT)
+                    ]
+                )
+            )
+            await db.commit()
+
+    yield user_ids
+
+    # Cascades to the prompts; referential actions are not subject to RLS
+    async with sessions() as db:
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def read_as(sessions, user_id: uuid.UUID, pause: float) -> tuple[str, set, int]:
+    """Read the RLS setting and every visible prompt owner within one transaction."""
+    async with sessions() as db:
+        db.info[RLS_USER_ID_KEY] = str(user_id)
+        setting = (await db.execute(CURRENT_USER_SETTING)).scalar_one()
+        # Yield mid-transaction so other tenants' sessions run in between
+        await asyncio.sleep(pause)
+        owners = set((await db.execute(select(Prompt.user_id))).scalars())
+        count = (await db.execute(select(func.count()).select_from(Prompt))).scalar_one()
+        await db.commit()
+    return setting, owners, count
+
+
+async def test_interleaved_tenants_only_see_their_own_rows(sessions, tenants):
+    expected = [tenants[i % 2] for i in range(CONCURRENT_SESSIONS)]
+    results = await asyncio.gather(
+        *(read_as(sessions, user_id, pause=0.001 * (i % 3)) for i, user_id in enumerate(expected))
+    )
+
+    for user_id, (setting, owners, count) in zip(expected, results):
+        assert setting == str(user_id)
+        assert owners == {user_id}
+        assert count == PROMPTS_PER_TENANT
+
+
+async def test_tenant_context_ends_with_the_transaction(sessions, tenants):
+    # Every pooled connection has now served a tenant
+    await asyncio.gather(*(read_as(sessions, user_id, pause=0.01) for user_id in tenants))
+
+    for _ in range(2):
+        async with sessions() as db:
+            setting = (await db.execute(CURRENT_USER_SETTING)).scalar_one()
+            visible = (await db.execute(select(func.count()).select_from(Prompt))).scalar_one()
+        assert setting in (None, "")
+        assert visible == 0
@@ -0,0 +1,33 @@
+"""Splitting the database connection budget across server workers."""
+import pytest
+
+from app.config import Settings
+from app.server import LISTEN_CONNECTIONS, MAX_DEFAULT_WORKERS, default_workers, worker_pool
+
+
+def settings(**values) -> Settings:
+    return Settings(database_url="postgresql+asyncpg://localhost/test", **values)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 8, 16])
+def test_workers_stay_within_the_budget(workers):
+    config = settings()
+    pool_size, max_overflow = worker_pool(config, workers)
+    assert pool_size >= 1
+    assert workers * (LISTEN_CONNECTIONS + pool_size + max_overflow) <= config.db_max_connections
+
+
+def test_pool_settings_that_fit_are_kept():
+    assert worker_pool(settings(db_pool_size=10, db_max_overflow=20), 2) == (10, 20)
+    assert worker_pool(settings(), 8) == (3, 6)
+
+
+def test_budget_too_small_for_the_workers():
+    with pytest.raises(ValueError):
+        worker_pool(settings(db_max_connections=10), 6)
+
+
+def test_default_workers_are_capped(monkeypatch):
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(64)))
+    assert default_workers(settings()) == MAX_DEFAULT_WORKERS
+    assert default_workers(settings(db_max_connections=20)) == 4
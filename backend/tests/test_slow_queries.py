@@ -0,0 +1,58 @@
+"""SQL normalization and parameter shapes of the slow statement log."""
+import pytest
+
+from app.slow_queries import normalize_sql, parameter_shape
+
+
+@pytest.mark.parametrize(
+    ("statement", "normalized"),
+    [
+        ("SELECT *\n  FROM prompts\n WHERE id = $1", "SELECT * FROM prompts WHERE id = $1"),
+        ("SELECT 1 FROM t WHERE a = 'it''s' AND b = 42.5", "SELECT ? FROM t WHERE a = ? AND b = ?"),
+        ("SELECT * FROM t WHERE id IN ($1, $2, $3)", "SELECT * FROM t WHERE id IN (...)"),
+        ("SELECT * FROM t WHERE id IN ($1)", "SELECT * FROM t WHERE id IN ($1)"),
+        ("SELECT col1, t2.x FROM t2 LIMIT $1", "SELECT col1, t2.x FROM t2 LIMIT $1"),
+        # Bind casts rendered by the asyncpg dialect
+        (
+            "SELECT * FROM t WHERE id IN ($1::VARCHAR, $2::VARCHAR)",
+            "SELECT * FROM t WHERE id IN (...)",
+        ),
+        (
+            "SELECT * FROM t WHERE a IN ($1::TIMESTAMP WITH TIME ZONE, $2::TIMESTAMP WITH TIME ZONE)",
+            "SELECT * FROM t WHERE a IN (...)",
+        ),
+        (
+            "INSERT INTO t (a, b) VALUES ($1::UUID, $2::VARCHAR[]), ($3::UUID, $4::VARCHAR[])",
+            "INSERT INTO t (a, b) VALUES (...), ...",
+        ),
+        (
+            "SELECT $1::VARCHAR AS a, b FROM t WHERE c = $2::INTEGER",
+            "SELECT $1::VARCHAR AS a, b FROM t WHERE c = $2::INTEGER",
+        ),
+    ],
+)
+def test_normalize_sql(statement, normalized):
+    assert normalize_sql(statement) == normalized
+
+
+@pytest.mark.parametrize("cast", ["", "::VARCHAR", "::UUID"])
+def test_in_lists_of_any_length_normalize_alike(cast):
+    short = normalize_sql(f"SELECT * FROM t WHERE id IN ($1{cast}, $2{cast})")
+    long = normalize_sql(
+        "SELECT * FROM t WHERE id IN (" + ", ".join(f"${i}{cast}" for i in range(1, 7)) + ")"
+    )
+    assert short == long
+
+
+@pytest.mark.parametrize(
+    ("value", "shape"),
+    [
+        (None, "null"),
+        ("secret", "str[6]"),
+        (b"\x00\x01", "bytes[2]"),
+        (["a", "b", "c"], "array[3]"),
+        (7, "int"),
+    ],
+)
+def test_parameter_shape_hides_values(value, shape):
+    assert parameter_shape(value) == shape
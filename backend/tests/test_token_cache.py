@@ -0,0 +1,112 @@
+"""Verified-token cache and revocations.
+
+The revoked_tokens tests need TEST_DATABASE_URL like test_rls; the rest
+run without a database.
+"""
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+
+from app import token_cache as token_cache_module
+from app.models.revoked_token import RevokedToken
+from app.token_cache import TokenCache, _digest, is_token_revoked, publish_revocation
+from tests.conftest import TEST_DATABASE_URL
+
+needs_database = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+
+
+def later(seconds: float = 3600) -> float:
+    return time.time() + seconds
+
+
+def test_lookup_returns_stored_user_and_counts_hits():
+    cache = TokenCache(10)
+    user_id = uuid4()
+    assert cache.lookup("token") is None
+    assert cache.store("token", user_id, later())
+    assert cache.lookup("token") == user_id
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_expired_entries_are_dropped_on_lookup():
+    cache = TokenCache(10)
+    cache.store("token", uuid4(), time.time() - 1)
+    assert cache.lookup("token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(2)
+    first, second, third = uuid4(), uuid4(), uuid4()
+    cache.store("first", first, later())
+    cache.store("second", second, later())
+    cache.lookup("first")
+    cache.store("third", third, later())
+    assert cache.lookup("second") is None
+    assert cache.lookup("first") == first
+    assert cache.lookup("third") == third
+
+
+def test_revoking_drops_the_entry_and_refuses_the_token():
+    cache = TokenCache(10)
+    cache.store("token", uuid4(), later())
+    cache.revoke("token", later())
+    assert cache.lookup("token") is None
+    assert cache.is_revoked("token")
+    assert not cache.store("token", uuid4(), later())
+
+
+def test_revocations_are_forgotten_once_expired():
+    cache = TokenCache(10)
+    cache.revoke("old", time.time() - 1)
+    cache.revoke("new", later())
+    assert not cache.is_revoked("old")
+    assert cache.is_revoked("new")
+
+
+def test_remembered_revocations_are_bounded():
+    cache = TokenCache(2)
+    for token in ("a", "b", "c"):
+        cache.revoke(token, later())
+    assert [cache.is_revoked(token) for token in ("a", "b", "c")] == [False, True, True]
+
+
+@needs_database
+async def test_revocations_reach_workers_started_later(sessions, monkeypatch):
+    token = f"token-{uuid4()}"
+    try:
+        async with sessions() as db:
+            await publish_revocation(db, token, later())
+            await db.commit()
+
+        # A fresh worker never saw the notification
+        monkeypatch.setattr(token_cache_module, "token_cache", TokenCache(10))
+        async with sessions() as db:
+            assert await is_token_revoked(db, token)
+            assert not await is_token_revoked(db, f"other-{uuid4()}")
+        assert token_cache_module.token_cache.is_revoked(token)
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(RevokedToken).where(RevokedToken.digest == _digest(token)))
+            await db.commit()
+
+
+@needs_database
+async def test_recording_a_revocation_prunes_expired_ones(sessions):
+    expired, current = f"expired-{uuid4()}", f"current-{uuid4()}"
+    try:
+        async with sessions() as db:
+            await publish_revocation(db, expired, time.time() - 1)
+            await db.commit()
+        async with sessions() as db:
+            await publish_revocation(db, current, later())
+            await db.commit()
+
+            assert await db.get(RevokedToken, _digest(expired)) is None
+            assert await db.get(RevokedToken, _digest(current)) is not None
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(RevokedToken).where(RevokedToken.digest == _digest(current)))
+            await db.commit()
@@ -0,0 +1,118 @@
+"""Per-user index LRU: abstract hooks, eviction and backfill storage.
+
+The backfill test needs TEST_DATABASE_URL like test_rls; the rest run
+without a database.
+"""
+import asyncio
+import uuid
+from uuid import UUID
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app.db import RLS_USER_ID_KEY
+from app.dedup import signature_indexes
+from app.models.prompt import Prompt
+from app.models.prompt_signature import PromptSignature
+from app.models.user import User
+from app.user_index import StoredUserIndexes, UserIndexes
+from tests.conftest import TEST_DATABASE_URL
+
+
+class Entries(dict):
+    version = 0
+    token = (0, 0)
+
+    def upsert(self, prompt_id: UUID, value: int) -> None:
+        self[prompt_id] = value
+
+    def remove(self, prompt_id: UUID) -> None:
+        self.pop(prompt_id, None)
+
+
+class LengthIndexes(UserIndexes[Entries, int]):
+    def new_index(self) -> Entries:
+        return Entries()
+
+    def compute(self, title: str, content: str, tags: list[str] | None) -> int:
+        return len(content)
+
+
+def fill(indexes: LengthIndexes, user_id: UUID, entries: int) -> None:
+    index = indexes.new_index()
+    for _ in range(entries):
+        index.upsert(uuid.uuid4(), 1)
+    indexes._indexes[user_id] = index
+    indexes._locks[user_id] = asyncio.Lock()
+
+
+def test_hooks_are_abstract():
+    with pytest.raises(TypeError):
+        UserIndexes(10)
+
+    class Unencoded(StoredUserIndexes[Entries, int]):
+        new_index = LengthIndexes.new_index
+        compute = LengthIndexes.compute
+
+    with pytest.raises(TypeError):
+        Unencoded(10)
+
+
+def test_evicts_least_recently_used_users_first():
+    indexes = LengthIndexes(max_entries=4)
+    oldest, older, newest = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    for user_id in (oldest, older, newest):
+        fill(indexes, user_id, 2)
+
+    indexes._evict(keep=newest)
+    assert list(indexes._indexes) == [older, newest]
+    assert oldest not in indexes._locks
+
+
+async def test_eviction_skips_indexes_whose_lock_is_held():
+    indexes = LengthIndexes(max_entries=4)
+    busy, idle, newest = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    for user_id in (busy, idle, newest):
+        fill(indexes, user_id, 2)
+
+    async with indexes._locks[busy]:
+        indexes._evict(keep=newest)
+    assert list(indexes._indexes) == [busy, newest]
+    assert busy in indexes._locks
+
+
+@pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL is not set")
+async def test_backfill_skips_prompts_deleted_since_they_were_read(sessions):
+    async with sessions() as db:
+        result = await db.execute(
+            insert(User)
+            .values(google_id=f"index-test-{uuid.uuid4()}", email="index-test@example.com")
+            .returning(User.id)
+        )
+        user_id = result.scalar_one()
+        await db.commit()
+
+    try:
+        async with sessions() as db:
+            db.info[RLS_USER_ID_KEY] = str(user_id)
+            result = await db.execute(
+                insert(Prompt)
+                .values(user_id=user_id, title="Kept", content="Text")
+                .returning(Prompt.id)
+            )
+            kept = result.scalar_one()
+            deleted = uuid.uuid4()
+            value = signature_indexes.compute("Kept", "Text", None)
+
+            stored = await signature_indexes._upsert_existing(
+                db, user_id, [(deleted, value), (kept, value)]
+            )
+            await db.commit()
+
+            assert [prompt_id for prompt_id, _ in stored] == [kept]
+            signed = await db.execute(select(PromptSignature.prompt_id))
+            assert signed.scalars().all() == [kept]
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
@@ -0,0 +1,78 @@
+"""Dense per-user embedding matrices and top-k search."""
+from uuid import uuid4
+
+import numpy as np
+
+from app.vector_index import UserVectors
+
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_grows_past_the_initial_capacity():
+    vectors = UserVectors(dim=2)
+    ids = [uuid4() for _ in range(40)]
+    for n, prompt_id in enumerate(ids):
+        vectors.upsert(prompt_id, unit(1, n))
+    assert len(vectors) == 40
+    assert all(np.allclose(vectors.vector(prompt_id), unit(1, n)) for n, prompt_id in enumerate(ids))
+
+
+def test_upsert_replaces_in_place():
+    vectors = UserVectors(dim=2)
+    prompt_id = uuid4()
+    vectors.upsert(prompt_id, unit(1, 0))
+    vectors.upsert(prompt_id, unit(0, 1))
+    assert len(vectors) == 1
+    assert np.allclose(vectors.vector(prompt_id), unit(0, 1))
+
+
+def test_remove_moves_the_last_row_into_the_hole():
+    vectors = UserVectors(dim=2)
+    a, b, c = uuid4(), uuid4(), uuid4()
+    vectors.upsert(a, unit(1, 0))
+    vectors.upsert(b, unit(0, 1))
+    vectors.upsert(c, unit(1, 1))
+
+    vectors.remove(a)
+    vectors.remove(uuid4())
+
+    assert len(vectors) == 2
+    assert vectors.vector(a) is None
+    assert vectors.ids == [c, b]
+    assert np.allclose(vectors.vector(c), unit(1, 1))
+    assert np.allclose(vectors.vector(b), unit(0, 1))
+
+
+def test_search_ranks_by_cosine_and_honours_exclude():
+    vectors = UserVectors(dim=2)
+    near, middle, far = uuid4(), uuid4(), uuid4()
+    vectors.upsert(far, unit(0, 1))
+    vectors.upsert(near, unit(1, 0.1))
+    vectors.upsert(middle, unit(1, 1))
+
+    results = vectors.search(unit(1, 0), k=2)
+    assert [prompt_id for prompt_id, _ in results] == [near, middle]
+    assert results[0][1] > results[1][1]
+
+    assert [prompt_id for prompt_id, _ in vectors.search(unit(1, 0), k=5, exclude=near)] == [middle, far]
+
+
+def test_search_many_answers_each_query():
+    vectors = UserVectors(dim=2)
+    x, y = uuid4(), uuid4()
+    vectors.upsert(x, unit(1, 0))
+    vectors.upsert(y, unit(0, 1))
+
+    results = vectors.search_many(np.stack([unit(1, 0), unit(0, 1)]), k=1)
+    assert [[prompt_id for prompt_id, _ in result] for result in results] == [[x], [y]]
+
+
+def test_search_of_an_empty_index():
+    vectors = UserVectors(dim=2)
+    assert vectors.search(unit(1, 0), k=3) == []
+    only = uuid4()
+    vectors.upsert(only, unit(1, 0))
+    assert vectors.search(unit(1, 0), k=3, exclude=only) == []